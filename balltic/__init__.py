@@ -1,6 +1,7 @@
 __author__ = 'Anthony Byuraev'
 
 __all__ = [
+    '__version__',
     'Gas',
     'GunPowder',
     'PneumaticGun',
@@ -8,11 +9,48 @@ __all__ = [
     'PneumaticGrid',
     'ArtilleryGrid',
     'PressureLevel',
+    'export_levels',
+    'ArtilleryLumped',
+    'cross_check',
+    'PneumaticEnsemble',
+    'ArtilleryEnsemble',
+    'sweep',
+    'convergence',
+    'inverse',
+    'surrogate',
+    'Surrogate',
+    'SolutionCache',
+    'History',
+    'StepController',
+    'Diagnostics',
+    'MUSCL',
+    'Checkpoint',
+    'FieldRecorder',
+    'open_fields',
+    'Crossing',
+    'ShotStart',
+    'PeakPressure',
+    'AllBurnt',
 ]
 
+from ._version import __version__
 from .gasdynamics.pneumatic import PneumaticGrid
 from .gasdynamics.artillery import ArtilleryGrid
-from .termodynamics.plevel import PressureLevel
+from .gasdynamics.ensemble import ArtilleryEnsemble, PneumaticEnsemble
+from .gasdynamics.sweep import sweep
+from .gasdynamics.convergence import convergence
+from .gasdynamics.inverse import inverse
+from .gasdynamics.surrogate import Surrogate, surrogate
+from .termodynamics.plevel import PressureLevel, export_levels
+from .termodynamics.lumped import ArtilleryLumped, cross_check
 from .core.gunpowder import GunPowder
 from .core.guns import ArtilleryGun, PneumaticGun
 from .core.gas import Gas
+from .core.history import History
+from .core.step import StepController
+from .core.diagnostics import Diagnostics
+from .core.reconstruction import MUSCL
+from .core.checkpoint import Checkpoint
+from .core.cache import SolutionCache
+from .core.fields import FieldRecorder, open_fields
+from .core.events import AllBurnt, Crossing, PeakPressure, ShotStart
@@ -0,0 +1,327 @@
+"""
+benchmark.py - модуль отвечает за измерение производительности
+    газодинамических решателей и сравнение с сохраненными результатами
+
+Запуск из командной строки:
+
+    python -m balltic.benchmark --output bench.json
+    python -m balltic.benchmark --baseline bench.json --budget 0.1
+"""
+
+__author__ = 'Anthony Byuraev'
+
+__all__ = [
+    'BenchmarkResult',
+    'Regression',
+    'run_benchmarks',
+    'compare',
+    'write_results',
+    'read_results',
+]
+
+import gc
+import sys
+import json
+import time
+import typing
+import argparse
+import platform
+import tracemalloc
+
+import numpy as np
+
+from balltic._version import __version__
+from balltic.config import DEFAULT_GP, G_CANNON, P_CANNON
+from balltic.core.gas import Gas
+from balltic.core.guns import ArtilleryGun, PneumaticGun
+from balltic.core.history import History
+from balltic.gasdynamics.artillery import ArtilleryGrid
+from balltic.gasdynamics.pneumatic import PneumaticGrid
+
+SOLVERS = ('pneumatic', 'artillery')
+NODES = (50, 100, 200, 500, 1000, 2000, 5000)
+KURANTS = (0.25, 0.5)
+FORMAT_VERSION = 1
+
+
+class BenchmarkResult(typing.NamedTuple):
+    """
+    Результат измерения одного случая
+
+    solver: str
+        'pneumatic' (PneumaticGrid) или 'artillery' (ArtilleryGrid)
+    backend: str
+        Вычислительное ядро решателя
+    nodes: int
+        Количество узлов сетки
+    kurant: float
+        Число Куранта
+    steps: int
+        Количество шагов по времени в измерении
+    wall_time: float
+        Наименьшее время шагов по всем повторам, с
+    steps_per_second: float
+        Количество шагов в секунду
+    us_per_cell_step: float
+        Время одного шага на одну ячейку, мкс
+    peak_memory: int
+        Наибольший объем памяти, выделенной при создании решателя
+        и выполнении шагов, байт. None без измерения памяти
+    solved: bool
+        Вылетел ли снаряд за время измерения
+    """
+    solver:           str
+    backend:          str
+    nodes:            int
+    kurant:           float
+    steps:            int
+    wall_time:        float
+    steps_per_second: float
+    us_per_cell_step: float
+    peak_memory:      int
+    solved:           bool
+
+    @property
+    def key(self) -> tuple:
+        return self.solver, self.backend, self.nodes, self.kurant
+
+
+class Regression(typing.NamedTuple):
+    """
+    Замедление случая относительно сохраненного результата
+
+    key: tuple
+        solver, backend, nodes, kurant
+    baseline, current: float
+        Время шага на ячейку, мкс
+    ratio: float
+        Отношение current / baseline
+    """
+    key:      tuple
+    baseline: float
+    current:  float
+    ratio:    float
+
+
+def _solver(name: str, nodes: int, kurant: float, backend: str):
+    """
+    Решатель с параметрами `P_CANNON`/`G_CANNON` без расчета в конструкторе
+    """
+    history = History(scalars_only=True)
+    if name == 'pneumatic':
+        gas = Gas(**{key: P_CANNON[key] for key in Gas._fields})
+        gun = PneumaticGun(**{key: P_CANNON[key]
+                              for key in PneumaticGun._fields
+                              if key in P_CANNON})
+        return PneumaticGrid(gun, gas, nodes=nodes, kurant=kurant,
+                             backend=backend, history=history, solve=False)
+    if name == 'artillery':
+        gun = ArtilleryGun(**{key: value for key, value in G_CANNON.items()
+                              if key != 'nodes'})
+        return ArtilleryGrid(gun, DEFAULT_GP['name'], nodes=nodes,
+                             kurant=kurant, backend=backend, history=history,
+                             solve=False)
+    raise ValueError('Параметр solver должен быть "pneumatic" или "artillery"')
+
+
+def _steps(solver, steps: typing.Optional[int]) -> int:
+    """
+    Выполнение `steps` шагов или расчета до вылета снаряда
+    """
+    if steps is None:
+        solver.solve()
+        return solver._step_count
+    for state in solver.iter_steps(every=steps):
+        return state.step
+    return 0
+
+
+def run_benchmarks(solvers: typing.Sequence[str] = SOLVERS,
+                   nodes: typing.Sequence[int] = NODES,
+                   kurants: typing.Sequence[float] = KURANTS,
+                   backends: typing.Sequence[str] = ('numpy',),
+                   steps: typing.Optional[int] = 200,
+                   repeat: int = 3,
+                   memory: bool = True,
+                   progress: typing.Callable[[BenchmarkResult], None] = None
+                   ) -> typing.List[BenchmarkResult]:
+    """
+    Измеряет время шагов решателей для всех сочетаний параметров
+
+    Время создания решателя не учитывается. Из `repeat` повторов
+    берется наименьшее время. Память измеряется отдельным повтором
+    под tracemalloc, чтобы не искажать время
+
+    Parameters
+    ----------
+    solvers: sequence of str, optional
+        'pneumatic' и/или 'artillery'
+    nodes: sequence of int, optional
+        Количество узлов сетки
+    kurants: sequence of float, optional
+        Числа Куранта
+    backends: sequence of str, optional
+        Вычислительные ядра: 'numpy', 'numba'
+    steps: int, optional
+        Количество шагов в измерении, None - расчет до вылета снаряда
+    repeat: int, optional
+        Количество повторов
+    memory: bool, optional
+        Измерять ли наибольший объем выделенной памяти
+    progress: callable, optional
+        Вызывается с результатом каждого случая
+
+    Returns
+    -------
+    results: list of BenchmarkResult
+    """
+    if steps is not None and steps < 1:
+        raise ValueError('Параметр steps должен быть натуральным числом')
+    if repeat < 1:
+        raise ValueError('Параметр repeat должен быть натуральным числом')
+
+    results = []
+    for solver_name in solvers:
+        for backend in backends:
+            for kurant in kurants:
+                for nodes_ in nodes:
+                    # первый расчет - компиляция и прогрев кэшей
+                    _steps(_solver(solver_name, nodes_, kurant, backend), 1)
+                    best = np.inf
+                    for _ in range(repeat):
+                        solver = _solver(solver_name, nodes_, kurant, backend)
+                        gc.collect()
+                        start = time.perf_counter()
+                        done = _steps(solver, steps)
+                        best = min(best, time.perf_counter() - start)
+                    peak = None
+                    if memory:
+                        gc.collect()
+                        tracemalloc.start()
+                        try:
+                            _steps(_solver(solver_name, nodes_, kurant,
+                                           backend), steps)
+                            peak = tracemalloc.get_traced_memory()[1]
+                        finally:
+                            tracemalloc.stop()
+                    result = BenchmarkResult(
+                        solver=solver_name,
+                        backend=backend,
+                        nodes=int(nodes_),
+                        kurant=float(kurant),
+                        steps=int(done),
+                        wall_time=best,
+                        steps_per_second=done / best,
+                        us_per_cell_step=1e6 * best / (done * nodes_),
+                        peak_memory=peak,
+                        solved=bool(solver.is_solved),
+                    )
+                    if progress is not None:
+                        progress(result)
+                    results.append(result)
+    return results
+
+
+def compare(results: typing.Sequence[BenchmarkResult],
+            baseline: typing.Sequence[BenchmarkResult],
+            budget: float = 0.1) -> typing.List[Regression]:
+    """
+    Случаи, время шага на ячейку которых превышает сохраненное
+        больше, чем в 1 + `budget` раз
+
+    Сравниваются случаи с совпадающими solver, backend, nodes, kurant
+    """
+    if budget < 0:
+        raise ValueError('Параметр budget должен быть неотрицательным')
+    reference = {result.key: result for result in baseline}
+    regressions = []
+    for result in results:
+        if result.key not in reference:
+            continue
+        ratio = result.us_per_cell_step / reference[result.key].us_per_cell_step
+        if ratio > 1 + budget:
+            regressions.append(Regression(
+                key=result.key,
+                baseline=reference[result.key].us_per_cell_step,
+                current=result.us_per_cell_step,
+                ratio=ratio,
+            ))
+    return regressions
+
+
+def write_results(path: str, results: typing.Sequence[BenchmarkResult]) -> None:
+    """
+    Запись результатов и описания окружения в JSON
+    """
+    document = {
+        'format': FORMAT_VERSION,
+        'version': __version__,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': [result._asdict() for result in results],
+    }
+    with open(path, 'w', encoding='utf-8') as file_:
+        json.dump(document, file_, indent=2, ensure_ascii=False)
+
+
+def read_results(path: str) -> typing.List[BenchmarkResult]:
+    """
+    Чтение результатов, записанных `write_results`
+    """
+    with open(path, encoding='utf-8') as file_:
+        document = json.load(file_)
+    if document.get('format') != FORMAT_VERSION:
+        raise ValueError('Неподдерживаемый формат результатов')
+    return [BenchmarkResult(**result) for result in document['results']]
+
+
+def main(argv: typing.Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m balltic.benchmark',
+        description='Производительность PneumaticGrid и ArtilleryGrid')
+    parser.add_argument('--solver', nargs='+', default=SOLVERS,
+                        choices=SOLVERS)
+    parser.add_argument('--nodes', nargs='+', type=int, default=NODES)
+    parser.add_argument('--kurant', nargs='+', type=float, default=KURANTS)
+    parser.add_argument('--backend', nargs='+', default=['numpy'])
+    parser.add_argument('--steps', type=int, default=200,
+                        help='шагов в измерении, 0 - до вылета снаряда')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true')
+    parser.add_argument('--output', help='файл JSON для результатов')
+    parser.add_argument('--baseline', help='файл JSON сохраненных результатов')
+    parser.add_argument('--budget', type=float, default=0.1,
+                        help='допустимое относительное замедление')
+    args = parser.parse_args(argv)
+
+    def report(result: BenchmarkResult) -> None:
+        memory = '-' if result.peak_memory is None \
+            else f'{result.peak_memory / 2 ** 20:.1f} MiB'
+        print(f'{result.solver:10} {result.backend:6} '
+              f'nodes={result.nodes:<5} kurant={result.kurant:<5} '
+              f'{result.steps_per_second:10.1f} steps/s '
+              f'{result.us_per_cell_step:8.3f} us/cell-step '
+              f'{result.wall_time:8.3f} s {memory}')
+
+    results = run_benchmarks(solvers=args.solver, nodes=args.nodes,
+                             kurants=args.kurant, backends=args.backend,
+                             steps=args.steps or None, repeat=args.repeat,
+                             memory=not args.no_memory, progress=report)
+    if args.output:
+        write_results(args.output, results)
+    if args.baseline:
+        regressions = compare(results, read_results(args.baseline),
+                              args.budget)
+        for regression in regressions:
+            print('slower: {} {} nodes={} kurant={}'.format(*regression.key),
+                  f'{regression.baseline:.3f} -> {regression.current:.3f} '
+                  f'us/cell-step (x{regression.ratio:.2f})')
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""
+burning.py - модуль отвечает за законы газообразования пороха ψ(z)
+"""
+
+__author__ = 'Anthony Byuraev'
+
+__all__ = [
+    'BurningLaw',
+    'TwoStageLaw',
+    'GeometricLaw',
+    'TabulatedLaw',
+    'get_law',
+]
+
+import typing
+
+import numpy as np
+
+
+class BurningLaw(object):
+    """
+    Основа закона газообразования: относительная доля сгоревшего
+        пороха ψ как функция относительной толщины сгоревшего свода z
+
+    Законы вычисляются векторно для массивов любой формы
+    """
+    #: Значение z, начиная с которого порох сгорел полностью
+    z_end = 1.0
+
+    def __call__(self, zet: np.ndarray) -> np.ndarray:
+        return self.psi(zet)
+
+    def psi(self, zet: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def tabulate(self, points: int = 4097) -> 'TabulatedLaw':
+        """
+        Таблица значений закона с линейной интерполяцией
+        """
+        return TabulatedLaw(self, points)
+
+
+class TwoStageLaw(BurningLaw):
+    """
+    Двухстадийный закон газообразования
+
+        ψ = k_1 z (1 + λ_1 z),                            z <= 1
+        ψ = ψ_s + k_2 (z - 1) (1 + λ_2 (z - 1)),          1 < z <= z_k
+        ψ = 1,                                            z > z_k
+
+    где ψ_s = k_1 (1 + λ_1) - доля пороха, сгоревшая к распаду зерна
+
+    Parameters
+    ----------
+    k_1, lambda_1: float
+        Характеристики формы до распада зерна
+    k_2, lambda_2: float, optional
+        Характеристики формы после распада зерна
+    z_k: float, optional
+        Относительная толщина свода в момент полного сгорания
+    """
+    def __repr__(self):
+        return (f'{self.__class__.__name__}({self.k_1}, {self.lambda_1}, '
+                f'{self.k_2}, {self.lambda_2}, {self.z_end})')
+
+    def __init__(self, k_1: float, lambda_1: float,
+                 k_2: float = 0.0, lambda_2: float = 0.0,
+                 z_k: float = 1.0) -> None:
+        self.k_1 = k_1
+        self.lambda_1 = lambda_1
+        self.k_2 = k_2
+        self.lambda_2 = lambda_2
+        self.z_end = z_k
+        self.psi_s = k_1 * (1 + lambda_1)
+
+    @classmethod
+    def from_gunpowder(cls, gunpowder) -> 'TwoStageLaw':
+        return cls(gunpowder.k_1, gunpowder.lambda_1,
+                   gunpowder.k_2, gunpowder.lambda_2, gunpowder.z_k)
+
+    def psi(self, zet: np.ndarray) -> np.ndarray:
+        return np.where(
+            zet <= 1,
+            self.k_1 * zet * (1 + self.lambda_1 * zet),
+            np.where(
+                zet <= self.z_end,
+                self.psi_s + self.k_2 * (zet - 1)
+                * (1 + self.lambda_2 * (zet - 1)),
+                1.0
+            )
+        )
+
+
+class GeometricLaw(BurningLaw):
+    """
+    Закон газообразования зерна простой формы (геометрический закон)
+
+        ψ = κ z (1 + λ z + μ z^2),     z <= 1
+        ψ = 1,                         z > 1
+
+    Parameters
+    ----------
+    kappa, lambda_, mu: float
+        Характеристики формы зерна, κ (1 + λ + μ) = 1
+    """
+    def __repr__(self):
+        return (f'{self.__class__.__name__}'
+                f'({self.kappa}, {self.lambda_}, {self.mu})')
+
+    def __init__(self, kappa: float, lambda_: float, mu: float = 0.0) -> None:
+        self.kappa = kappa
+        self.lambda_ = lambda_
+        self.mu = mu
+
+    @classmethod
+    def ribbon(cls, alpha: float, beta: float) -> 'GeometricLaw':
+        """
+        Лента (пластинка) со сторонами 2e_1 <= 2b <= 2c
+
+        Parameters
+        ----------
+        alpha: float
+            Отношение 2e_1 / 2b
+        beta: float
+            Отношение 2e_1 / 2c
+        """
+        kappa = 1 + alpha + beta
+        return cls(kappa,
+                   -(alpha + beta + alpha * beta) / kappa,
+                   alpha * beta / kappa)
+
+    @classmethod
+    def tube(cls, beta: float) -> 'GeometricLaw':
+        """
+        Трубка с толщиной свода 2e_1 и длиной 2c
+
+        Parameters
+        ----------
+        beta: float
+            Отношение 2e_1 / 2c
+        """
+        return cls.ribbon(0.0, beta)
+
+    @classmethod
+    def cube(cls) -> 'GeometricLaw':
+        """
+        Куб или шар
+        """
+        return cls.ribbon(1.0, 1.0)
+
+    def psi(self, zet: np.ndarray) -> np.ndarray:
+        return np.where(
+            zet <= 1,
+            self.kappa * zet * (1 + self.lambda_ * zet + self.mu * zet ** 2),
+            1.0
+        )
+
+
+class TabulatedLaw(BurningLaw):
+    """
+    Закон газообразования, заданный таблицей на равномерной сетке по z
+
+    Parameters
+    ----------
+    law: BurningLaw
+        Табулируемый закон
+    points: int, optional
+        Количество точек таблицы на отрезке [0, z_end]
+    """
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.law!r}, {self.zet.size})'
+
+    def __init__(self, law: BurningLaw, points: int = 4097) -> None:
+        self.law = law
+        self.z_end = law.z_end
+        self.zet = np.linspace(0, law.z_end, points)
+        self.table = law.psi(self.zet)
+
+    def psi(self, zet: np.ndarray) -> np.ndarray:
+        return np.interp(zet, self.zet, self.table, right=1.0)
+
+
+def get_law(gunpowder,
+            burning: typing.Union[str, BurningLaw] = 'formula') -> BurningLaw:
+    """
+    Возвращает закон газообразования для пороха
+
+    Parameters
+    ----------
+    gunpowder: GunPowder
+        Порох
+    burning: str or BurningLaw, optional
+        'formula' - двухстадийный закон пороха,
+        'table' - таблица двухстадийного закона, общая для всех расчетов
+        с этим порохом, или экземпляр BurningLaw
+    """
+    if isinstance(burning, BurningLaw):
+        return burning
+    if burning == 'formula':
+        return TwoStageLaw.from_gunpowder(gunpowder)
+    if burning == 'table':
+        return gunpowder.burning_table()
+    raise ValueError('Параметр burning должен быть "formula", "table" '
+                     'или BurningLaw')
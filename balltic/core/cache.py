@@ -0,0 +1,171 @@
+"""
+cache.py - модуль отвечает за кэш решений на диске,
+    адресуемый содержимым исходных данных
+"""
+
+__author__ = 'Anthony Byuraev'
+
+__all__ = ['SolutionCache']
+
+import os
+import json
+import time
+import uuid
+import typing
+import hashlib
+
+import numpy as np
+
+from balltic._version import __version__
+
+FORMAT_VERSION = 2
+SUFFIX = '.npz'
+
+
+class SolutionCache(object):
+    """
+    Кэш решений в каталоге на диске
+
+    Ключ записи - хэш SHA-256 всех исходных данных расчета: параметров
+    орудия, параметров пороха или газа, закона газообразования, схемы,
+    количества узлов, политик записи истории и выбора шага, а также
+    версии библиотеки. Запись - сжатый файл ``.npz`` с полным конечным
+    состоянием расчета, как в контрольной точке.
+
+    Записи вытесняются по давности использования (LRU), когда суммарный
+    размер превышает `max_size` или количество записей - `max_entries`.
+    Файлы записываются атомарно, а отсутствующие или поврежденные
+    записи считаются промахом, поэтому один каталог могут использовать
+    несколько процессов одновременно
+
+    Parameters
+    ----------
+    path: str
+        Каталог кэша
+    max_size: int, optional
+        Наибольший суммарный размер записей в байтах
+    max_entries: int, optional
+        Наибольшее количество записей
+    """
+    def __repr__(self):
+        return (f'{self.__class__.__name__}({self.path!r}, '
+                f'max_size={self.max_size}, max_entries={self.max_entries})')
+
+    def __init__(self, path: str, max_size: int = 256 * 2 ** 20,
+                 max_entries: int = None) -> None:
+        if max_size is not None and max_size <= 0:
+            raise ValueError('Параметр max_size должен быть положительным')
+        if max_entries is not None and max_entries < 1:
+            raise ValueError('Параметр max_entries должен быть '
+                             'натуральным числом')
+        self.path = path
+        self.max_size = max_size
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(path, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries())
+
+    def key(self, spec: dict) -> str:
+        """
+        Ключ записи по описанию исходных данных
+        """
+        spec = dict(spec, version=__version__, format=FORMAT_VERSION)
+        text = json.dumps(spec, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> typing.Optional[typing.Dict[str, np.ndarray]]:
+        """
+        Массивы записи или None при промахе
+        """
+        file_path = self._file(key)
+        try:
+            with np.load(file_path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+            _touch(file_path)
+        except (OSError, ValueError, KeyError, EOFError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return arrays
+
+    def put(self, key: str, arrays: typing.Dict[str, np.ndarray]) -> None:
+        """
+        Атомарная запись и вытеснение давно использованных записей
+        """
+        temporary = os.path.join(
+            self.path, f'.{key}.{os.getpid()}.{uuid.uuid4().hex}.tmp')
+        try:
+            with open(temporary, 'wb') as file_:
+                np.savez_compressed(file_, **arrays)
+            os.replace(temporary, self._file(key))
+            _touch(self._file(key))
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        self._evict()
+
+    def clear(self) -> None:
+        """
+        Удаление всех записей
+        """
+        for entry in self._entries():
+            _remove(entry.path)
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, key + SUFFIX)
+
+    def _entries(self) -> list:
+        entries = []
+        with os.scandir(self.path) as scan:
+            for entry in scan:
+                if entry.name.endswith(SUFFIX) and not entry.name.startswith('.'):
+                    try:
+                        entries.append((entry, entry.stat()))
+                    except FileNotFoundError:
+                        continue
+        return [entry for entry, _ in sorted(
+            entries, key=lambda item: item[1].st_mtime_ns)]
+
+    def _evict(self) -> None:
+        """
+        Удаление записей от давно использованных к недавним
+            до выполнения ограничений
+        """
+        entries = self._entries()
+        sizes = []
+        for entry in entries:
+            try:
+                sizes.append(entry.stat().st_size)
+            except FileNotFoundError:
+                sizes.append(0)
+        total = sum(sizes)
+        count = len(entries)
+        for entry, size in zip(entries, sizes):
+            if (self.max_size is None or total <= self.max_size) \
+                    and (self.max_entries is None or count <= self.max_entries):
+                break
+            _remove(entry.path)
+            total -= size
+            count -= 1
+
+
+def _touch(path: str) -> None:
+    """
+    Время использования записи с точностью до наносекунд: время
+        изменения файла, назначаемое ядром, грубее порядка записей
+    """
+    now = time.time_ns()
+    os.utime(path, ns=(now, now))
+
+
+def _remove(path: str) -> None:
+    """
+    Удаление файла, возможно уже удаленного другим процессом
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
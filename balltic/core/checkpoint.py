@@ -0,0 +1,154 @@
+"""
+checkpoint.py - модуль отвечает за контрольные точки расчета
+
+Контрольная точка - файл формата ``.npz`` (сжатый), содержащий
+массивы состояния и описание расчета в виде строки JSON
+"""
+
+__author__ = 'Anthony Byuraev'
+
+__all__ = ['Checkpoint', 'write_checkpoint', 'read_checkpoint']
+
+import os
+import json
+import time
+import typing
+
+import numpy as np
+
+from balltic.core.burning import (BurningLaw, GeometricLaw, TabulatedLaw,
+                                  TwoStageLaw)
+from balltic.core.flux import FluxScheme, get_scheme
+
+FORMAT_VERSION = 1
+
+
+class Checkpoint(object):
+    """
+    Политика периодической записи контрольных точек во время расчета
+
+    Файл перезаписывается атомарно: прерванная запись
+    не повреждает предыдущую контрольную точку
+
+    Parameters
+    ----------
+    path: str
+        Путь к файлу контрольной точки
+    every: int, optional
+        Записывать каждые `every` шагов
+    interval: float, optional
+        Записывать не реже, чем через `interval` секунд
+    """
+    def __repr__(self):
+        return (f'{self.__class__.__name__}({self.path!r}, '
+                f'every={self.every}, interval={self.interval})')
+
+    def __init__(self, path: str, every: int = None,
+                 interval: float = None) -> None:
+        if every is None and interval is None:
+            raise ValueError('Необходимо задать every или interval')
+        if every is not None and every < 1:
+            raise ValueError('Параметр every должен быть натуральным числом')
+        self.path = path
+        self.every = every
+        self.interval = interval
+
+    def start(self) -> None:
+        self._step = 0
+        self._time = time.perf_counter()
+
+    def due(self) -> bool:
+        """
+        Нужна ли запись после очередного шага
+        """
+        self._step += 1
+        if self.every is not None and self._step % self.every == 0:
+            return True
+        if self.interval is not None \
+                and time.perf_counter() - self._time >= self.interval:
+            self._time = time.perf_counter()
+            return True
+        return False
+
+    def config(self) -> dict:
+        return {'path': self.path, 'every': self.every,
+                'interval': self.interval}
+
+
+def write_checkpoint(path: str, config: dict,
+                     arrays: typing.Dict[str, np.ndarray]) -> None:
+    """
+    Атомарная запись контрольной точки
+    """
+    config = dict(config, version=FORMAT_VERSION)
+    temporary = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(temporary, 'wb') as file_:
+            np.savez_compressed(file_, config=np.array(json.dumps(config)),
+                                **arrays)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def read_checkpoint(path: str) -> typing.Tuple[dict, typing.Dict[str, np.ndarray]]:
+    """
+    Чтение контрольной точки
+
+    Returns
+    -------
+    config: dict
+        Описание расчета
+    arrays: dict
+        Массивы состояния
+    """
+    with np.load(path, allow_pickle=False) as data:
+        config = json.loads(str(data['config']))
+        if config.get('version') != FORMAT_VERSION:
+            raise ValueError('Неподдерживаемая версия контрольной точки')
+        arrays = {name: data[name] for name in data.files if name != 'config'}
+    return config, arrays
+
+
+def scalar(value):
+    """
+    Значение, пригодное для JSON
+    """
+    return None if value is None else float(value)
+
+
+def scheme_spec(scheme: FluxScheme) -> dict:
+    params = {name: scalar(value) for name, value in vars(scheme).items()
+              if not name.startswith('_')}
+    return {'name': scheme.name, 'params': params}
+
+
+def scheme_from_spec(spec: dict) -> FluxScheme:
+    scheme = get_scheme(spec['name'])
+    for name, value in spec['params'].items():
+        setattr(scheme, name, value)
+    return scheme
+
+
+def law_spec(law: BurningLaw) -> list:
+    if type(law) is TwoStageLaw:
+        return ['TwoStageLaw', law.k_1, law.lambda_1,
+                law.k_2, law.lambda_2, law.z_end]
+    if type(law) is GeometricLaw:
+        return ['GeometricLaw', law.kappa, law.lambda_, law.mu]
+    if type(law) is TabulatedLaw:
+        return ['TabulatedLaw', law_spec(law.law), law.zet.size]
+    raise ValueError(f'Закон газообразования {law!r} не может быть '
+                     f'записан в контрольную точку')
+
+
+def law_from_spec(spec: list) -> BurningLaw:
+    kind, *params = spec
+    if kind == 'TwoStageLaw':
+        return TwoStageLaw(*params)
+    if kind == 'GeometricLaw':
+        return GeometricLaw(*params)
+    if kind == 'TabulatedLaw':
+        return TabulatedLaw(law_from_spec(params[0]), params[1])
+    raise ValueError(f'Закон газообразования {kind} не найден')
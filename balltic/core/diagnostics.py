@@ -0,0 +1,243 @@
+"""
+diagnostics.py - модуль отвечает за проверку законов сохранения
+    и качества расчета по шагам
+"""
+
+__author__ = 'Anthony Byuraev'
+
+__all__ = ['Diagnostics', 'Quality']
+
+import typing
+
+import numpy as np
+
+#: Накапливаемые величины в порядке хранения состояния
+DIAGNOSTIC_NAMES = (
+    'mass_error',
+    'energy_error',
+    'min_density',
+    'min_pressure',
+    'max_mach',
+    'max_cfl',
+)
+
+
+class Quality(typing.NamedTuple):
+    """
+    Итог проверки расчета
+
+    steps: int
+        Количество шагов расчета
+    initial_mass, mass: float
+        Масса газа (газопороховой смеси) в начале и в конце расчета
+    mass_error: float
+        Наибольшее относительное отклонение массы от начальной
+    initial_energy, energy: float
+        Полная энергия газа и кинетическая энергия снаряда в начале
+        и в конце расчета. Для ArtilleryGrid энергия газа содержит
+        энергию несгоревшего пороха
+    energy_error: float
+        Наибольшее относительное отклонение энергии от начальной
+    min_density, min_pressure: float
+        Наименьшие плотность и давление во внутренних ячейках
+    max_mach: float
+        Наибольшее число Маха во внутренних ячейках
+    max_cfl: float
+        Наибольшее число Куранта по состоянию в конце шага
+    finite: bool
+        Остались ли конечными все величины
+    flags: tuple of str
+        Названия нарушенных порогов: 'mass', 'energy', 'density',
+        'pressure', 'mach', 'cfl', 'finite'
+    """
+    steps:          int
+    initial_mass:   float
+    mass:           float
+    mass_error:     float
+    initial_energy: float
+    energy:         float
+    energy_error:   float
+    min_density:    float
+    min_pressure:   float
+    max_mach:       float
+    max_cfl:        float
+    finite:         bool
+    flags:          typing.Tuple[str, ...]
+
+    @property
+    def suspect(self) -> bool:
+        return bool(self.flags)
+
+
+class Diagnostics(object):
+    """
+    Проверка законов сохранения и качества расчета по шагам
+
+    После каждого шага обновляются наименьшие плотность и давление,
+    наибольшие числа Маха и Куранта во внутренних ячейках, поэтому
+    короткие нефизичные выбросы не пропускаются. Масса газа и полная
+    энергия газа и снаряда вычисляются после каждого `every`-го шага.
+    Накапливаются только экстремумы, поэтому проверка стоит нескольких
+    проходов по массиву ячеек без выделения памяти. Итог с нарушенными
+    порогами сохраняется в `quality` решения
+
+    Parameters
+    ----------
+    every: int, optional
+        Проверять массу и энергию каждого `every`-го шага. Последний шаг
+        проверяется всегда. Проверка замедляет расчет на 15 - 20 %
+        с каждым десятым шагом и на 25 - 30 % с каждым шагом
+    mass_tolerance, energy_tolerance: float, optional
+        Допустимое относительное отклонение массы и энергии от начальных.
+        Схема не сохраняет их точно: на сетке из 50 - 100 узлов
+        отклонение составляет несколько процентов
+    min_density, min_pressure: float, optional
+        Плотность и давление должны быть больше этих значений
+    max_mach: float, optional
+        Наибольшее допустимое число Маха
+    max_cfl: float, optional
+        Наибольшее допустимое число Куранта
+    """
+    def __repr__(self):
+        return (f'{self.__class__.__name__}(every={self.every}, '
+                f'mass_tolerance={self.mass_tolerance}, '
+                f'energy_tolerance={self.energy_tolerance})')
+
+    def __init__(self, every: int = 10,
+                 mass_tolerance: float = 0.1,
+                 energy_tolerance: float = 0.1,
+                 min_density: float = 0.0,
+                 min_pressure: float = 0.0,
+                 max_mach: float = 5.0,
+                 max_cfl: float = 1.0) -> None:
+        if every < 1:
+            raise ValueError('Параметр every должен быть натуральным числом')
+        self.every = every
+        self.mass_tolerance = mass_tolerance
+        self.energy_tolerance = energy_tolerance
+        self.min_density = min_density
+        self.min_pressure = min_pressure
+        self.max_mach = max_mach
+        self.max_cfl = max_cfl
+
+    def start(self, grid) -> None:
+        """
+        Начальные масса и энергия и сброс накопленных величин
+        """
+        self._initial = np.array(self._totals(grid))
+        self._current = self._initial.copy()
+        shape = self._initial.shape[1:]
+        self._values = np.stack([
+            np.zeros(shape), np.zeros(shape),
+            np.full(shape, np.inf), np.full(shape, np.inf),
+            np.zeros(shape), np.zeros(shape),
+        ])
+        self._steps = 0
+
+    def update(self, grid, final: bool = False) -> None:
+        """
+        Проверка состояния сетки после шага
+
+        Parameters
+        ----------
+        grid: EulerianGrid
+            Сетка после шага
+        final: bool, optional
+            Последний ли шаг расчета. Масса и энергия последнего шага
+            проверяются независимо от `every`
+        """
+        values = self._values
+        if final or grid._step_count % self.every == 0:
+            self._current[...] = self._totals(grid)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                error = np.abs(self._current / self._initial - 1)
+            np.fmax(values[:2], error, out=values[:2])
+        np.minimum(values[2:3], np.min(grid.ro_cell[..., 1:-1], axis=-1),
+                   out=values[2:3])
+        np.minimum(values[3:4], np.min(grid.press_cell[..., 1:-1], axis=-1),
+                   out=values[3:4])
+
+        speed = grid._cell_work[0][..., 1:-1]
+        mach = grid._face_work[-1][..., :-1]
+        sound = grid.c_cell[..., 1:-1]
+        np.abs(grid.v_cell[..., 1:-1], out=speed)
+        np.divide(speed, sound, out=mach)
+        np.maximum(values[4:5], np.max(mach, axis=-1), out=values[4:5])
+        speed += sound
+        cfl = np.max(speed, axis=-1) * grid.tau \
+            / (grid.x_interface[..., 1] - grid.x_interface[..., 0])
+        np.maximum(values[5:6], cfl, out=values[5:6])
+        self._steps = grid._step_count
+
+    def summary(self) -> Quality:
+        """
+        Итог проверки с нарушенными порогами
+        """
+        values = dict(zip(DIAGNOSTIC_NAMES, self._values))
+        finite = np.all(np.isfinite(self._values), axis=0) \
+            & np.all(np.isfinite(self._current), axis=0)
+        checks = (
+            ('mass', values['mass_error'] > self.mass_tolerance),
+            ('energy', values['energy_error'] > self.energy_tolerance),
+            ('density', values['min_density'] <= self.min_density),
+            ('pressure', values['min_pressure'] <= self.min_pressure),
+            ('mach', values['max_mach'] > self.max_mach),
+            ('cfl', values['max_cfl'] > self.max_cfl),
+            ('finite', ~finite),
+        )
+        scalar = self._values.ndim == 1
+        values = {name: float(value) if scalar else value.copy()
+                  for name, value in values.items()}
+        return Quality(
+            steps=self._steps,
+            initial_mass=_item(self._initial[0]),
+            mass=_item(self._current[0]),
+            initial_energy=_item(self._initial[1]),
+            energy=_item(self._current[1]),
+            finite=bool(finite) if scalar else finite,
+            flags=tuple(name for name, failed in checks if np.any(failed)),
+            **values,
+        )
+
+    def config(self) -> dict:
+        return {'every': self.every,
+                'mass_tolerance': self.mass_tolerance,
+                'energy_tolerance': self.energy_tolerance,
+                'min_density': self.min_density,
+                'min_pressure': self.min_pressure,
+                'max_mach': self.max_mach,
+                'max_cfl': self.max_cfl}
+
+    def dump(self) -> typing.Dict[str, np.ndarray]:
+        """
+        Состояние проверки в виде массивов
+        """
+        return {'initial': self._initial.copy(),
+                'current': self._current.copy(),
+                'values': self._values.copy(),
+                'steps': np.array(self._steps)}
+
+    def load(self, state: typing.Dict[str, np.ndarray]) -> None:
+        """
+        Восстановление состояния, сохраненного `dump`
+        """
+        self._initial = state['initial'].copy()
+        self._current = state['current'].copy()
+        self._values = state['values'].copy()
+        self._steps = int(state['steps'])
+
+    @staticmethod
+    def _totals(grid) -> tuple:
+        """
+        Масса и полная энергия газа и снаряда
+        """
+        volume = grid.gun.cs_area \
+            * (grid.x_interface[..., 1] - grid.x_interface[..., 0])
+        mass = volume * np.sum(grid.q_param[0][..., 1:-1], axis=-1)
+        energy = volume * np.sum(grid.q_param[2][..., 1:-1], axis=-1) \
+            + grid.gun.shell * grid.v_interface[..., -1] ** 2 / 2
+        return mass, energy
+
+
+def _item(value: np.ndarray):
+    return float(value) if np.ndim(value) == 0 else value.copy()
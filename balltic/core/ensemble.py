@@ -0,0 +1,237 @@
+"""
+ensemble.py - модуль отвечает за пакетный расчет ансамбля орудий
+    на одной сетке
+"""
+
+__author__ = 'Anthony Byuraev'
+
+__all__ = ['EulerianEnsemble', 'stack_guns']
+
+import typing
+
+import numpy as np
+
+from balltic.core.events import muzzle_exit
+from balltic.core.grid import EulerianGrid, HISTORY_NAMES
+
+
+def stack_guns(gun, kind: type, **overrides) -> typing.NamedTuple:
+    """
+    Собирает ансамбль орудий в один именованный кортеж,
+        каждое поле которого - массив формы (N,)
+
+    Parameters
+    ----------
+    gun: NamedTuple or sequence of NamedTuple
+        Орудие или последовательность орудий типа `kind`
+    kind: type
+        Тип орудия: ArtilleryGun или PneumaticGun
+    overrides: array_like, optional
+        Значения полей, заменяющие значения орудий.
+        Скаляры и массивы согласуются по правилам broadcasting
+
+    Returns
+    -------
+    gun: NamedTuple
+        Орудие типа `kind` с полями-массивами одинаковой длины
+    """
+    guns = [gun] if isinstance(gun, kind) else list(gun)
+    if not guns:
+        raise ValueError('Ансамбль должен содержать хотя бы одно орудие')
+    for item in guns:
+        if not isinstance(item, kind):
+            raise ValueError(f'Параметр gun должен быть {kind.__name__} '
+                             f'или последовательностью {kind.__name__}')
+
+    columns = {}
+    for field in kind._fields:
+        if overrides.get(field) is not None:
+            columns[field] = np.asarray(overrides[field], dtype=float)
+            continue
+        values = [getattr(item, field) for item in guns]
+        if all(value is None for value in values):
+            columns[field] = None
+        else:
+            columns[field] = np.asarray(values, dtype=float)
+
+    names = [field for field in columns if columns[field] is not None]
+    arrays = np.broadcast_arrays(*(columns[field] for field in names))
+    if arrays[0].ndim != 1:
+        raise ValueError('Параметры ансамбля должны быть одномерными')
+    for field, array in zip(names, arrays):
+        columns[field] = array.copy()
+    return kind(**columns)
+
+
+class EulerianEnsemble(EulerianGrid):
+    """
+    Класс реализует пакетный расчет ансамбля из N орудий на одной сетке
+
+    Параметры в ячейках и на границах хранятся с пакетной осью перед осью
+    ячеек: (N, nodes), векторы q, f и Ф - (переменная, N, nodes).
+    Шаг по времени вычисляется для каждого орудия отдельно.
+    Расчеты, в которых снаряд покинул ствол, замораживаются (tau = 0),
+    а когда их доля превышает `compact_ratio` - удаляются из массивов.
+
+    После решения истории хранятся в массивах формы (записи, N),
+    значения после вылета снаряда - NaN.
+
+    Ансамбль решается целиком в конструкторе: пошаговое решение
+    `iter_steps` и контрольные точки `checkpoint` не поддерживаются
+    и вызывают TypeError
+    """
+
+    #: Доля завершенных расчетов, при которой массивы уплотняются
+    compact_ratio = 0.25
+
+    #: Массивы с пакетной осью первой
+    _member_fields = (
+        'ro_cell',
+        'v_cell',
+        'energy_cell',
+        'press_cell',
+        'c_cell',
+        'mah_cell_minus',
+        'mah_cell_plus',
+        'c_interface',
+        'mah_interface',
+        'press_interface',
+        'v_interface',
+        'x_interface',
+        'tau',
+        '_previous_cell_lenght',
+        '_clock',
+        '_members',
+        '_active',
+    )
+
+    #: Векторы с пакетной осью второй
+    _vector_fields = ('q_param', 'f_param')
+
+    def _calculate_tau(self):
+        super()._calculate_tau()
+        # завершенные расчеты заморожены до уплотнения
+        self.tau = np.where(self._active, self.tau, 0.0)
+
+    def iter_steps(self, every: int = 1, fields: bool = False):
+        self._unsupported('iter_steps')
+
+    def checkpoint(self, path: str) -> None:
+        self._unsupported('checkpoint')
+
+    def _unsupported(self, name: str) -> None:
+        """
+        Отказ в методах EulerianGrid, не реализованных для ансамбля
+        """
+        raise TypeError(f'{self.__class__.__name__} не поддерживает метод '
+                        f'{name}: ансамбль решается целиком в конструкторе')
+
+    def _run(self):
+        """
+        Решение задачи для всего ансамбля
+        """
+        size = self._batch_shape()[0]
+        self._ensemble_gun = self.gun
+        self._new_x_interfaces(self.gun.chamber)
+        self._members = np.arange(size)
+        self._active = np.full(size, True)
+        self._clock = np.zeros(size)
+        self.steps = np.zeros(size, dtype=int)
+        self.failed = np.full(size, False)
+        self.muzzle_time = np.full(size, np.nan)
+        self.muzzle_velocity = np.full(size, np.nan)
+
+        self.history.start(HISTORY_NAMES, width=size)
+        if self.field_recorder is not None:
+            self.field_recorder.start(self)
+
+        while self._members.size:
+            previous = (self._clock, self.x_interface[:, -1].copy(),
+                        self.v_interface[:, -1].copy())
+            self._move_grid()
+            self._clock = self._clock + self.tau
+            self.steps[self._members[self._active]] += 1
+            self._record()
+            self._update_cells()
+            if self.field_recorder is not None and self.field_recorder.due():
+                self.field_recorder.record(self._field_values())
+            self._retire(previous)
+
+        self.gun = self._ensemble_gun
+        self._store_history()
+        last = dict(zip(HISTORY_NAMES, self.history.last))
+        maximum = dict(zip(HISTORY_NAMES, self.history.maximum))
+        # без вылета снаряда - последние записанные значения
+        unfinished = np.isnan(self.muzzle_time)
+        self.muzzle_time[unfinished] = last['time'][unfinished]
+        self.muzzle_velocity[unfinished] = \
+            last['shell_velocity'][unfinished]
+        self.max_shell_pressure = maximum['shell_pressure']
+        self.max_stem_pressure = maximum['stem_pressure']
+        self.is_solved = True
+
+    def _record(self):
+        self._record_history(*(self._scatter(value)
+                               for value in self._record_values()))
+
+    def _field_values(self) -> dict:
+        return {name: self._scatter(value)
+                for name, value in super()._field_values().items()}
+
+    def _scatter(self, value):
+        """
+        Раскладывает значения активных расчетов по полному ансамблю
+        """
+        row = np.full(self._ensemble_gun.shell.shape + np.shape(value)[1:],
+                      np.nan)
+        row[self._members[self._active]] = value[self._active]
+        return row
+
+    def _retire(self, previous: tuple):
+        """
+        Исключает расчеты, в которых снаряд покинул ствол
+            или решение перестало быть конечным
+
+        Для вылетевших снарядов время и скорость вылета уточняются
+        внутри шага по времени, начатого в состоянии `previous`
+        """
+        last_x_interface = self.x_interface[:, -1]
+        finished = last_x_interface >= self.gun.barrel
+        broken = ~np.isfinite(last_x_interface) | ~np.isfinite(self.tau)
+        self.failed[self._members[self._active & broken]] = True
+
+        exited = self._active & finished & ~broken
+        if exited.any():
+            time, velocity, _ = muzzle_exit(
+                tuple(value[exited] for value in previous),
+                (self._clock[exited], None, self.v_interface[exited, -1]),
+                self.gun.barrel[exited])
+            self.muzzle_time[self._members[exited]] = time
+            self.muzzle_velocity[self._members[exited]] = velocity
+        remaining = self._active & ~(finished | broken)
+        if self.field_recorder is not None and not remaining.any():
+            # последний шаг ансамбля записывается и при прореживании,
+            # пока значения завершенных расчетов не исключены
+            self.field_recorder.finish(self._field_values())
+        self._active = remaining
+
+        retired = self._active.size - np.count_nonzero(self._active)
+        if retired and (retired >= self.compact_ratio * self._active.size
+                        or not self._active.any()):
+            self._compact()
+
+    def _compact(self):
+        """
+        Удаляет из массивов состояния завершенные расчеты
+        """
+        keep = self._active
+        for name in self._member_fields:
+            setattr(self, name, getattr(self, name)[keep])
+        for name in self._vector_fields:
+            setattr(self, name, getattr(self, name)[:, keep])
+        self.gun = self.gun._replace(**{
+            field: value[keep]
+            for field, value in self.gun._asdict().items()
+            if value is not None
+        })
+        self._allocate_workspace()
@@ -0,0 +1,302 @@
+"""
+events.py - модуль отвечает за события выстрела: вылет снаряда,
+    начало движения, максимум давления, полное сгорание пороха
+"""
+
+__author__ = 'Anthony Byuraev'
+
+__all__ = [
+    'EventState',
+    'Event',
+    'Crossing',
+    'ShotStart',
+    'AllBurnt',
+    'PeakPressure',
+    'muzzle_exit',
+]
+
+import typing
+
+import numpy as np
+
+
+class EventState(typing.NamedTuple):
+    """
+    Величины истории выстрела в момент события
+
+    time: float
+        Время события
+    shell_position, shell_velocity: float
+        Координата и скорость снаряда
+    shell_pressure, stem_pressure: float
+        Давление на дно снаряда и на дно канала ствола
+    """
+    time:           float
+    shell_position: float
+    shell_velocity: float
+    shell_pressure: float
+    stem_pressure:  float
+
+
+def interpolate(previous: np.ndarray, current: np.ndarray,
+                time: float) -> np.ndarray:
+    """
+    Линейная интерполяция записей истории по времени внутри шага
+    """
+    span = current[0] - previous[0]
+    fraction = 0.0 if span == 0 else (time - previous[0]) / span
+    row = previous + min(max(fraction, 0.0), 1.0) * (current - previous)
+    row[0] = time
+    return row
+
+
+def muzzle_exit(previous: tuple, current: tuple, barrel) -> tuple:
+    """
+    Момент прохождения снарядом координаты `barrel` внутри шага
+
+    На шаге по времени ускорение снаряда постоянно, поэтому координата
+    снаряда - квадратичная функция времени:
+        x = x_0 + v_0 s + a s^2 / 2,  a = (v_1 - v_0) / (t_1 - t_0)
+
+    Parameters
+    ----------
+    previous, current: tuple
+        Время, координата и скорость снаряда в начале и в конце шага,
+        скаляры или массивы одной формы
+    barrel: float or np.ndarray
+        Координата дульного среза
+
+    Returns
+    -------
+    time, velocity, fraction:
+        Время и скорость вылета, доля шага до вылета
+    """
+    time_0, x_0, v_0 = previous
+    time_1, _, v_1 = current
+    tau = time_1 - time_0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        acceleration = (v_1 - v_0) / tau
+        distance = barrel - x_0
+        # устойчивая к вычитанию форма корня квадратного уравнения
+        shift = 2 * distance \
+            / (v_0 + np.sqrt(v_0 ** 2 + 2 * acceleration * distance))
+        fraction = np.clip(np.where(tau > 0, shift / tau, 1.0), 0.0, 1.0)
+    shift = fraction * tau
+    return time_0 + shift, v_0 + acceleration * shift, fraction
+
+
+class Event(object):
+    """
+    Основа для событий выстрела
+
+    После каждого шага вызывается `check` с записями истории
+    в начале и в конце шага. Найденное событие сохраняется в `result`
+    """
+    name = None
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}()'
+
+    def start(self, grid, row: np.ndarray) -> None:
+        """
+        Подготовка к расчету, `row` - запись в начальный момент времени
+        """
+        self.result = None
+
+    def check(self, grid, previous: np.ndarray, current: np.ndarray) -> None:
+        pass
+
+    def finish(self, grid, current: np.ndarray) -> None:
+        pass
+
+    def dump(self) -> typing.Dict[str, np.ndarray]:
+        """
+        Состояние поиска события в виде массивов для контрольной точки
+        """
+        result = np.full(len(EventState._fields), np.nan) \
+            if self.result is None else np.array(self.result)
+        return {'result': result}
+
+    def load(self, state: typing.Dict[str, np.ndarray]) -> None:
+        """
+        Восстановление состояния, сохраненного `dump`
+        """
+        result = state['result']
+        self.result = None if np.isnan(result).all() \
+            else EventState(*result.tolist())
+
+
+class Crossing(Event):
+    """
+    Первое пересечение нулевого уровня функцией состояния расчета
+
+    Момент события находится линейной интерполяцией функции внутри шага,
+    остальные величины - линейной интерполяцией по времени
+
+    Parameters
+    ----------
+    name: str
+        Название события
+    function: callable
+        Функция расчета (сетки), возвращающая число
+    direction: int, optional
+        1 - переход через ноль снизу вверх, -1 - сверху вниз, 0 - любой
+    """
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.name!r})'
+
+    def __init__(self, name: str, function: typing.Callable = None,
+                 direction: int = 0) -> None:
+        self.name = name
+        self.function = function
+        self.direction = direction
+
+    def value(self, grid) -> float:
+        return self.function(grid)
+
+    def start(self, grid, row: np.ndarray) -> None:
+        super().start(grid, row)
+        self._value = self.value(grid)
+
+    def check(self, grid, previous: np.ndarray, current: np.ndarray) -> None:
+        if self.result is not None:
+            return
+        value_0, value_1 = self._value, self.value(grid)
+        self._value = value_1
+        if self.direction >= 0 and value_0 < 0 <= value_1 \
+                or self.direction <= 0 and value_0 > 0 >= value_1:
+            fraction = value_0 / (value_0 - value_1)
+            time = previous[0] + fraction * (current[0] - previous[0])
+            self.result = EventState(
+                *interpolate(previous, current, time).tolist())
+
+    def dump(self) -> typing.Dict[str, np.ndarray]:
+        state = super().dump()
+        state['value'] = np.array(self._value, dtype=float)
+        return state
+
+    def load(self, state: typing.Dict[str, np.ndarray]) -> None:
+        super().load(state)
+        self._value = float(state['value'])
+
+
+class ShotStart(Crossing):
+    """
+    Начало движения снаряда: давление на дно снаряда
+        достигает давления форсирования
+
+    Без давления форсирования событие соответствует начальному моменту
+    """
+    def __repr__(self):
+        return f'{self.__class__.__name__}()'
+
+    def __init__(self) -> None:
+        super().__init__('shot_start', direction=1)
+
+    def value(self, grid) -> float:
+        boostp = getattr(grid.gun, 'boostp', None)
+        return grid.press_cell[-2] - (0.0 if boostp is None else boostp)
+
+    def start(self, grid, row: np.ndarray) -> None:
+        super().start(grid, row)
+        if self._value >= 0:
+            self.result = EventState(*row.tolist())
+
+
+class AllBurnt(Crossing):
+    """
+    Полное сгорание пороха (ψ = 1) во всех ячейках
+    """
+    def __repr__(self):
+        return f'{self.__class__.__name__}()'
+
+    def __init__(self) -> None:
+        super().__init__('all_burnt', direction=1)
+
+    def value(self, grid) -> float:
+        if not hasattr(grid, 'zet_cell'):
+            return -np.inf
+        return np.min(grid.zet_cell[1:-1]) - grid.burning.z_end
+
+
+class PeakPressure(Event):
+    """
+    Максимум давления за выстрел
+
+    Максимум уточняется по параболе, проходящей через три последние
+    записи, в окрестности каждого локального максимума
+
+    Parameters
+    ----------
+    where: str, optional
+        'stem' - давление на дно канала ствола,
+        'shell' - давление на дно снаряда
+    """
+    COLUMNS = {'shell': 3, 'stem': 4}
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.where!r})'
+
+    def __init__(self, where: str = 'stem') -> None:
+        if where not in self.COLUMNS:
+            raise ValueError('Параметр where должен быть "stem" или "shell"')
+        self.where = where
+        self.name = f'peak_{where}_pressure'
+        self._column = self.COLUMNS[where]
+
+    def start(self, grid, row: np.ndarray) -> None:
+        super().start(grid, row)
+        self._before = row.copy()
+        self.result = EventState(*row.tolist())
+
+    def check(self, grid, previous: np.ndarray, current: np.ndarray) -> None:
+        column = self._column
+        before = self._before
+        value = previous[column]
+        if value >= before[column] and value > current[column] \
+                and value > self.result[column]:
+            (time_a, time_b, time_c), (press_a, press_b, press_c) = \
+                zip(*((row[0], row[column])
+                      for row in (before, previous, current)))
+            numerator = (time_b - time_a) ** 2 * (press_b - press_c) \
+                - (time_b - time_c) ** 2 * (press_b - press_a)
+            denominator = (time_b - time_a) * (press_b - press_c) \
+                - (time_b - time_c) * (press_b - press_a)
+            time = time_b - 0.5 * numerator / denominator \
+                if denominator else time_b
+            if time <= time_b:
+                row = interpolate(before, previous, time)
+            else:
+                row = interpolate(previous, current, time)
+            row[column] = _lagrange(time, (time_a, time_b, time_c),
+                                    (press_a, press_b, press_c))
+            self.result = EventState(*row.tolist())
+        np.copyto(self._before, previous)
+
+    def finish(self, grid, current: np.ndarray) -> None:
+        # давление росло до конца расчета
+        if current[self._column] > self.result[self._column]:
+            self.result = EventState(*current.tolist())
+
+    def dump(self) -> typing.Dict[str, np.ndarray]:
+        state = super().dump()
+        state['before'] = self._before.copy()
+        return state
+
+    def load(self, state: typing.Dict[str, np.ndarray]) -> None:
+        super().load(state)
+        self._before = state['before'].copy()
+
+
+def _lagrange(x: float, nodes: tuple, values: tuple) -> float:
+    """
+    Значение интерполяционного многочлена Лагранжа
+    """
+    total = 0.0
+    for i, (node, value) in enumerate(zip(nodes, values)):
+        term = value
+        for j, other in enumerate(nodes):
+            if i != j:
+                term *= (x - other) / (node - other)
+        total += term
+    return total
@@ -0,0 +1,176 @@
+"""
+fields.py - модуль отвечает за запись истории полей параметров в ячейках
+    в отображаемые в память файлы
+"""
+
+__author__ = 'Anthony Byuraev'
+
+__all__ = ['FieldRecorder', 'open_fields']
+
+import os
+import json
+import typing
+
+import numpy as np
+
+FIELD_NAMES = ('press_cell', 'ro_cell', 'v_cell', 'zet_cell', 'psi_cell')
+META_FILE = 'meta.json'
+
+
+class FieldRecorder(object):
+    """
+    Запись полей параметров в ячейках с прореживанием
+
+    Каждая величина записывается в отдельный файл `<path>/<name>.dat`
+    блоками по `chunk` записей, отображаемыми в память, поэтому
+    потребление памяти не зависит от длительности выстрела.
+    Вместе с полями записываются время `time` и координаты границ
+    `x_interface`. Последний шаг записывается всегда.
+    Записанные поля читаются функцией `open_fields`
+
+    Для ансамбля записи имеют форму (N, ...) для всех N расчетов,
+    значения завершенных расчетов - NaN
+
+    Parameters
+    ----------
+    path: str
+        Каталог для файлов записи
+    every: int, optional
+        Записывать каждый `every`-й шаг
+    names: sequence of str, optional
+        Записываемые поля. Поля, которых нет в расчете, пропускаются
+    chunk: int, optional
+        Количество записей в одном отображаемом блоке
+    """
+    def __repr__(self):
+        return (f'{self.__class__.__name__}({self.path!r}, '
+                f'every={self.every}, names={self.names})')
+
+    def __init__(self, path: str, every: int = 10,
+                 names: typing.Sequence[str] = FIELD_NAMES,
+                 chunk: int = 256) -> None:
+        if every < 1:
+            raise ValueError('Параметр every должен быть натуральным числом')
+        self.path = path
+        self.every = every
+        self.names = tuple(names)
+        self.chunk = chunk
+
+    def start(self, grid) -> None:
+        """
+        Подготовка к записи: выбор полей расчета и создание каталога
+        """
+        self.fields = ('time', 'x_interface') + tuple(
+            name for name in self.names if hasattr(grid, name))
+        os.makedirs(self.path, exist_ok=True)
+        self._shapes = None
+        self._maps = {}
+        self._capacity = 0
+        self._count = 0
+        self._step = 0
+        self._written = False
+
+    def due(self) -> bool:
+        """
+        Нужна ли запись очередного шага
+        """
+        self._step += 1
+        self._written = self._step % self.every == 0
+        return self._written
+
+    def record(self, values: typing.Dict[str, np.ndarray]) -> None:
+        """
+        Запись величин одного шага
+        """
+        if self._shapes is None:
+            self._shapes = {name: np.shape(values[name])
+                            for name in self.fields}
+            for name in self.fields:
+                open(self._file(name), 'wb').close()
+        if self._count == self._capacity:
+            self._grow()
+        row = self._count - self._capacity + self.chunk
+        for name in self.fields:
+            self._maps[name][row] = values[name]
+        self._count += 1
+
+    def finish(self, values: typing.Dict[str, np.ndarray] = None) -> None:
+        """
+        Запись последнего шага, если он был пропущен прореживанием,
+            и закрытие файлов
+        """
+        if not self._written and values is not None:
+            self.record(values)
+        if self._shapes is None:
+            return
+        self._flush()
+        for name in self.fields:
+            os.truncate(self._file(name), self._count * self._row_size(name))
+        self._maps = {}
+        self._capacity = self._count
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, f'{name}.dat')
+
+    def _row_size(self, name: str) -> int:
+        return int(np.prod(self._shapes[name], dtype=int)) * 8
+
+    def _grow(self) -> None:
+        """
+        Отображение в память следующего блока записей
+        """
+        self._flush()
+        for name in self.fields:
+            os.truncate(self._file(name),
+                        (self._capacity + self.chunk) * self._row_size(name))
+            self._maps[name] = np.memmap(
+                self._file(name), dtype=float, mode='r+',
+                offset=self._capacity * self._row_size(name),
+                shape=(self.chunk,) + self._shapes[name])
+        self._capacity += self.chunk
+
+    def _flush(self) -> None:
+        """
+        Запись отображенных блоков и описания на диск
+        """
+        for map_ in self._maps.values():
+            map_.flush()
+        if self._shapes is None:
+            return
+        meta = {
+            'count': self._count,
+            'every': self.every,
+            'shapes': {name: list(shape)
+                       for name, shape in self._shapes.items()},
+        }
+        with open(os.path.join(self.path, META_FILE), 'w') as file_:
+            json.dump(meta, file_)
+
+
+def open_fields(path: str) -> typing.Dict[str, np.memmap]:
+    """
+    Чтение полей, записанных FieldRecorder, без загрузки в память
+
+    Parameters
+    ----------
+    path: str
+        Каталог записи
+
+    Returns
+    -------
+    fields: dict
+        Массивы формы (записи, ...) только для чтения, в том числе
+        `time` и `x_interface`
+    """
+    with open(os.path.join(path, META_FILE)) as file_:
+        meta = json.load(file_)
+    count = meta['count']
+    fields = {}
+    for name, shape in meta['shapes'].items():
+        if count:
+            fields[name] = np.memmap(os.path.join(path, f'{name}.dat'),
+                                     dtype=float, mode='r',
+                                     shape=(count,) + tuple(shape))
+        else:
+            fields[name] = np.empty((0,) + tuple(shape))
+    return fields
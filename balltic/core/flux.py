@@ -0,0 +1,303 @@
+"""
+flux.py - модуль отвечает за расщепление потоков на границах ячеек
+"""
+
+__author__ = 'Anthony Byuraev'
+
+__all__ = [
+    'ausm_split',
+    'FluxScheme',
+    'AUSM',
+    'AUSMPlus',
+    'AUSMPlusUp',
+    'HLLC',
+    'SCHEMES',
+    'get_scheme',
+]
+
+import copy
+import typing
+
+import numpy as np
+
+
+def ausm_split(mach_left: np.ndarray, mach_right: np.ndarray,
+               out: np.ndarray,
+               beta: float = 1 / 8,
+               alpha: float = 3 / 16,
+               work: np.ndarray = None,
+               mask: np.ndarray = None) -> np.ndarray:
+    """
+    Полиномиальное расщепление числа Маха и давления на границах
+
+    Все четыре функции вычисляются без ветвлений на месте: результаты
+    записываются в `out`, промежуточные величины - в `work` и `mask`.
+    Если рабочие массивы не заданы, они выделяются при каждом вызове
+
+    Parameters
+    ----------
+    mach_left: np.ndarray
+        Число Маха в ячейке слева от границы (индекс +)
+    mach_right: np.ndarray
+        Число Маха в ячейке справа от границы (индекс -)
+    out: np.ndarray
+        Массив формы (4,) + mach_left.shape:
+            out[0] - M+(mach_left), out[1] - M-(mach_right),
+            out[2] - P+(mach_left), out[3] - P-(mach_right)
+    beta, alpha: float, optional
+        Коэффициенты полиномов: 1/8 и 3/16 для AUSM+, 0 и 0 для AUSM
+    work: np.ndarray, optional
+        Рабочий массив формы (3,) + mach_left.shape
+    mask: np.ndarray, optional
+        Рабочий логический массив формы mach_left.shape
+
+    Returns
+    -------
+    out: np.ndarray
+    """
+    if work is None:
+        work = np.empty((3,) + np.shape(mach_left))
+    if mask is None:
+        mask = np.empty(np.shape(mach_left), dtype=bool)
+    square, other, buffer_ = work
+
+    for mach, sign, mach_out, press_out in ((mach_left, 1, out[0], out[2]),
+                                            (mach_right, -1, out[1], out[3])):
+        # square = (M + 1)^2, other = (M - 1)^2 слева и наоборот справа
+        np.add(mach, sign, out=square)
+        np.square(square, out=square)
+        np.subtract(mach, sign, out=other)
+        np.square(other, out=other)
+        np.multiply(other, 4 * beta, out=buffer_)
+        buffer_ += 1
+        np.multiply(square, 0.25 * sign, out=mach_out)
+        mach_out *= buffer_
+
+        if sign > 0:
+            np.subtract(2, mach, out=buffer_)
+        else:
+            np.add(2, mach, out=buffer_)
+        buffer_ /= 4
+        np.multiply(mach, sign * alpha, out=press_out)
+        press_out *= other
+        buffer_ += press_out
+        np.multiply(square, buffer_, out=press_out)
+
+        # сверхзвуковое течение
+        np.abs(mach, out=buffer_)
+        np.greater_equal(buffer_, 1, out=mask)
+        buffer_ *= sign
+        buffer_ += mach
+        buffer_ *= 0.5
+        np.copyto(mach_out, buffer_, where=mask)
+        if sign > 0:
+            np.greater(mach, 0, out=buffer_)
+        else:
+            np.less(mach, 0, out=buffer_)
+        np.copyto(press_out, buffer_, where=mask)
+    return out
+
+
+class FluxScheme(object):
+    """
+    Основа для схем расчета потоков на границах ячеек
+
+    Схема семейства AUSM определяет число Маха и давление на границах
+    в `interface`, а поток собирается в `flux` из векторов Ф слева
+    и справа от границ. Параметры газа слева и справа от границ -
+    атрибуты сетки <параметр>_left и <параметр>_right, скорость
+    границ на шаге - `w_interface`
+    """
+    name = None
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}()'
+
+    def _buffer(self, shape: tuple) -> tuple:
+        """
+        Буфер расщепленных функций и рабочие массивы `ausm_split`,
+            выделяемые при изменении формы сетки
+        """
+        buffer_ = getattr(self, '_split', None)
+        if buffer_ is None or buffer_.shape[1:] != shape:
+            buffer_ = self._split = np.empty((7,) + shape)
+            self._mask = np.empty(shape, dtype=bool)
+        return buffer_[:4], buffer_[4:], self._mask
+
+    def interface(self, grid) -> None:
+        """
+        Число Маха `mah_interface` и давление `press_interface` на границах
+        """
+        pass
+
+    def flux(self, grid) -> None:
+        """
+        Потоки `f_param` через границы ячеек
+
+        Вычисляется на месте в буферах сетки `_face_work`
+        """
+        mah = grid.mah_interface
+        spread, buffer_ = grid._face_work[:-1], grid._face_work[-1]
+        np.add(grid.F_param_p, grid.F_param_m, out=grid.f_param)
+        grid.f_param *= mah
+        np.subtract(grid.F_param_p, grid.F_param_m, out=spread)
+        spread *= np.abs(mah, out=buffer_)
+        grid.f_param -= spread
+        np.divide(grid.c_interface, 2, out=buffer_)
+        grid.f_param *= buffer_
+        grid.f_param[1] += grid.press_interface
+        np.multiply(grid.press_interface, grid.w_interface, out=buffer_)
+        grid.f_param[2] += buffer_
+
+
+class AUSM(FluxScheme):
+    """
+    Схема AUSM (Liou, Steffen, 1993)
+    """
+    name = 'ausm'
+    beta = 0.0
+    alpha = 0.0
+
+    def interface(self, grid) -> None:
+        split, work, mask = self._buffer(grid.mah_cell_minus.shape)
+        ausm_split(grid.mah_cell_minus, grid.mah_cell_plus, split,
+                   self.beta, self.alpha, work, mask)
+        np.add(split[0], split[1], out=grid.mah_interface)
+        np.multiply(split[2], grid.press_left, out=grid.press_interface)
+        buffer_ = grid._face_work[-1]
+        np.multiply(split[3], grid.press_right, out=buffer_)
+        grid.press_interface += buffer_
+        return split
+
+
+class AUSMPlus(AUSM):
+    """
+    Схема AUSM+ (Liou, 1996). Схема по умолчанию
+    """
+    name = 'ausm+'
+    beta = 1 / 8
+    alpha = 3 / 16
+
+
+class AUSMPlusUp(AUSMPlus):
+    """
+    Схема AUSM+-up (Liou, 2006) с диссипацией по давлению и скорости
+
+    Parameters
+    ----------
+    kp: float, optional
+        Коэффициент диссипации по давлению в числе Маха
+    ku: float, optional
+        Коэффициент диссипации по скорости в давлении
+    sigma: float, optional
+        Коэффициент при среднем квадрате числа Маха
+    """
+    name = 'ausm+up'
+
+    def __init__(self, kp: float = 0.25, ku: float = 0.75,
+                 sigma: float = 1.0) -> None:
+        self.kp = kp
+        self.ku = ku
+        self.sigma = sigma
+
+    def interface(self, grid) -> None:
+        split = super().interface(grid)
+        ro_left = grid.ro_left
+        ro_right = grid.ro_right
+        mah_square = (grid.mah_cell_minus ** 2 + grid.mah_cell_plus ** 2) / 2
+        grid.mah_interface -= self.kp \
+            * np.maximum(1 - self.sigma * mah_square, 0) \
+            * (grid.press_right - grid.press_left) \
+            / ((ro_left + ro_right) / 2 * grid.c_interface ** 2)
+        grid.press_interface -= self.ku * split[2] * split[3] \
+            * (ro_left + ro_right) * grid.c_interface ** 2 \
+            * (grid.mah_cell_plus - grid.mah_cell_minus)
+
+
+class HLLC(FluxScheme):
+    """
+    Схема HLLC (Toro, 1994) на подвижной границе
+
+    Решение задачи Римана выбирается по скорости границы `w_interface`,
+    поток равен F(Q) - w_interface * Q в соответствующей области
+    """
+    name = 'hllc'
+
+    def flux(self, grid) -> None:
+        press_left = grid.press_left
+        press_right = grid.press_right
+        ro_left = grid.F_param_m[0]
+        ro_right = grid.F_param_p[0]
+        v_left = grid.F_param_m[1] / ro_left
+        v_right = grid.F_param_p[1] / ro_right
+        c_left = grid.c_left
+        c_right = grid.c_right
+        frame = grid.w_interface
+
+        speed_left = np.minimum(v_left - c_left, v_right - c_right)
+        speed_right = np.maximum(v_left + c_left, v_right + c_right)
+        mass_left = ro_left * (speed_left - v_left)
+        mass_right = ro_right * (speed_right - v_right)
+        speed_star = (press_right - press_left
+                      + mass_left * v_left - mass_right * v_right) \
+            / (mass_left - mass_right)
+
+        fluxes = []
+        for vector, v, press, speed, mass in (
+                (grid.F_param_m, v_left, press_left, speed_left, mass_left),
+                (grid.F_param_p, v_right, press_right, speed_right, mass_right)):
+            # векторы Ф содержат энтальпию, в векторах q - полная энергия
+            state = vector.copy()
+            state[2] -= press
+            flux_ = vector * v
+            flux_[1] += press
+            ro = vector[0]
+            ratio = mass / (speed - speed_star) / ro
+            star = state * ratio
+            star[1] = ratio * ro * speed_star
+            star[2] = ratio * ro * (
+                state[2] / ro + (speed_star - v) * (speed_star + press / mass))
+            fluxes.append((state, flux_, star, flux_ + speed * (star - state)))
+
+        (state_l, flux_l, star_l, flux_star_l), \
+            (state_r, flux_r, star_r, flux_star_r) = fluxes
+        grid.f_param[...] = np.where(
+            frame <= speed_left, flux_l - frame * state_l,
+            np.where(
+                frame <= speed_star, flux_star_l - frame * star_l,
+                np.where(
+                    frame < speed_right, flux_star_r - frame * star_r,
+                    flux_r - frame * state_r)))
+
+        grid.press_interface[...] = press_left \
+            + mass_left * (speed_star - v_left)
+        grid.mah_interface[...] = (speed_star - frame) / grid.c_interface
+
+
+SCHEMES = {
+    AUSM.name: AUSM,
+    AUSMPlus.name: AUSMPlus,
+    AUSMPlusUp.name: AUSMPlusUp,
+    HLLC.name: HLLC,
+}
+
+
+def get_scheme(scheme: typing.Union[str, FluxScheme]) -> FluxScheme:
+    """
+    Возвращает схему расчета потоков по названию
+
+    Parameters
+    ----------
+    scheme: str or FluxScheme
+        'ausm', 'ausm+', 'ausm+up', 'hllc' или экземпляр FluxScheme
+    """
+    if isinstance(scheme, FluxScheme):
+        # у каждой сетки свои буферы
+        scheme = copy.copy(scheme)
+        scheme._split = None
+        return scheme
+    try:
+        return SCHEMES[scheme]()
+    except KeyError:
+        raise ValueError(f'Схема {scheme} не найдена. '
+                         f'Доступные схемы: {", ".join(SCHEMES)}')
@@ -1,13 +1,116 @@
 __author__ = 'Anthony Byuraev'
 
-__all__ = ['EulerianGrid']
+__all__ = ['EulerianGrid', 'StepState']
 
 import os
+import copy
+import typing
 
 import numpy as np
 
+from balltic.core import jit
+from balltic.core import checkpoint as checkpoint_
+from balltic.core.diagnostics import Diagnostics
+from balltic.core.cache import SolutionCache
+from balltic.core.events import Event, EventState, muzzle_exit
+from balltic.core.fields import FieldRecorder
+from balltic.core.flux import AUSM, AUSMPlus, get_scheme
+from balltic.core.history import History
+from balltic.core.reconstruction import get_reconstruction
+from balltic.core.profile import PhaseProfile, Profiler
+from balltic.core.step import StepController
+
+HISTORY_NAMES = (
+    'time',
+    'shell_position',
+    'shell_velocity',
+    'shell_pressure',
+    'stem_pressure',
+)
+
+
+class StepState(typing.NamedTuple):
+    """
+    Состояние расчета на шаге по времени
+
+    step: int
+        Номер шага
+    time: float
+        Время от начала расчета
+    shell_position, shell_velocity: float
+        Координата и скорость снаряда
+    shell_pressure, stem_pressure: float
+        Давление на дно снаряда и на дно канала ствола
+    fields: dict
+        Срезы массивов параметров в ячейках или None
+    """
+    step:           int
+    time:           float
+    shell_position: float
+    shell_velocity: float
+    shell_pressure: float
+    stem_pressure:  float
+    fields:         typing.Dict[str, np.ndarray] = None
+
 
 class EulerianGrid(object):
+    #: Бэкенд шага по времени
+    backend = 'numpy'
+
+    #: Адаптивный выбор числа Куранта, None - постоянное число Куранта
+    controller = None
+
+    #: Периодическая запись контрольных точек
+    autosave = None
+
+    #: Проверка законов сохранения и качества расчета
+    diagnostics = None
+
+    #: Восстановление параметров на границах, None - первый порядок
+    reconstruction = None
+
+    #: Параметры ячеек, восстанавливаемые на границах
+    _face_fields = ('ro', 'v', 'press')
+
+    #: Кэш решений на диске
+    cache = None
+
+    #: Запись полей параметров в ячейках
+    field_recorder = None
+
+    #: События выстрела, кроме вылета снаряда
+    _event_detectors = ()
+
+    #: Подготовлено ли интегрирование
+    _started = False
+
+    #: Измерение времени этапов шага, None - без профилирования
+    _profiler = None
+
+    #: Массивы, возвращаемые `iter_steps` с `fields=True`
+    _field_names = (
+        'x_interface',
+        'ro_cell',
+        'v_cell',
+        'press_cell',
+        'energy_cell',
+        'c_cell',
+    )
+
+    #: Количество буферов формы массива ячеек
+    _cell_buffers = 1
+
+    #: Массивы состояния, восстанавливаемые при отклонении шага
+    _state_fields = (
+        'x_interface',
+        'v_interface',
+        'q_param',
+        'v_cell',
+        'energy_cell',
+        'press_cell',
+        'c_cell',
+    )
+
     def __repr__(self):
         return f'{self.__class__.__name__}()'
 
@@ -18,143 +121,712 @@ class EulerianGrid(object):
         """
 
         self.tau = 0
+        self.history = History()
+        self.scheme = get_scheme('ausm+')
         #  Длина ячейки на пред. шаге. 3необходимо для расчета веторов q
         self._previous_cell_lenght = 0
 
-    def _velocity_parameters(self):
-        self.c_interface = (self.c_cell[1:] + self.c_cell[:-1]) / 2
-        self.mah_cell_minus = \
-            (self.v_cell[:-1] - self.v_interface) / self.c_interface
-        self.mah_cell_plus = \
-            (self.v_cell[1:] - self.v_interface) / self.c_interface
+    def _batch_shape(self) -> tuple:
+        """
+        Форма пакетной оси: () для одиночного расчета,
+            (N,) для ансамбля из N орудий
+        """
+        return np.shape(self.gun.shell)
 
-    def _get_mah_press_interface(self):
-        self.mah_interface = self._fetta_plus() + self._fetta_mines()
-        self.press_interface = \
-            self._getta_plus() * self.press_cell[:-1] \
-            + self._getta_mines() * self.press_cell[1:]
+    def _cell_array(self, value=0.0):
+        """
+        Массив по ячейкам сетки, заполненный значением `value`
+        """
+        return np.full(self._batch_shape() + (self.nodes,),
+                       np.expand_dims(value, -1), dtype=float)
 
-    def _calculate_tau(self):
-        buffer_ = \
-            (self.x_interface[1:] - self.x_interface[:-1]) \
-            / (abs(self.v_cell[1:-1]) + self.c_cell[1:-1])
-        self.tau = self.gun.kurant * min(buffer_)
+    def _interface_array(self, value=0.0):
+        """
+        Массив по границам (интерфейсам) сетки, заполненный значением `value`
+        """
+        return np.full(self._batch_shape() + (self.nodes - 1,),
+                       np.expand_dims(value, -1), dtype=float)
 
-    def _new_x_interfaces(self, last_x_interface):
-        self.x_interface = np.linspace(0, last_x_interface, self.nodes - 1)
+    def _allocate_workspace(self):
+        """
+        Выделение буферов шага по времени
 
-    def _fetta_plus(self):
+        Все массивы шага выделяются один раз и обновляются на месте.
+        Плотность `ro_cell` - срез вектора q, векторы Ф на границах
+        `F_param_m` и `F_param_p` - срезы векторов Ф в ячейках.
+        Повторяется при изменении формы массивов (уплотнении ансамбля)
         """
-        Параметр в пересчете давления на границе для индекса +
+        cells = self.q_param.shape[1:]
+        faces = cells[:-1] + (cells[-1] - 1,)
+        self.ro_cell = self.q_param[0]
+        self._F_cell = np.zeros(self.q_param.shape)
+        self.F_param_m = self._F_cell[..., :-1]
+        self.F_param_p = self._F_cell[..., 1:]
+        self._cell_work = np.empty((self._cell_buffers,) + cells)
+        self._face_work = np.empty((self.q_param.shape[0] + 1,) + faces)
+        self._index = np.arange(self.nodes - 1)
+        self._allocate_faces()
+
+    def _allocate_faces(self):
         """
-        answer = np.zeros_like(self.mah_cell_minus)
-        if_cond = np.abs(self.mah_cell_minus) >= 1
-        else_cond = np.abs(self.mah_cell_minus) < 1
+        Параметры газа слева и справа от границ: <параметр>_left
+            и <параметр>_right
 
-        answer[if_cond] = 0.5 * (self.mah_cell_minus[if_cond]
-                                 + np.abs(self.mah_cell_minus[if_cond]))
+        В расчете первого порядка это срезы массивов ячеек, при
+        восстановлении MUSCL - отдельные буферы. Скорость границ в потоках
+        `w_interface` в расчете первого порядка совпадает с `v_interface`
+        """
+        if self.reconstruction is not None:
+            self.reconstruction.allocate(self)
+            return
+        self.w_interface = self.v_interface
+        for name in self._face_fields + ('c',):
+            cell = getattr(self, f'{name}_cell')
+            setattr(self, f'{name}_left', cell[..., :-1])
+            setattr(self, f'{name}_right', cell[..., 1:])
+
+    def _shell_pressure(self) -> np.ndarray:
+        """
+        Давление газа на дно снаряда на шаге по времени
+        """
+        if self.reconstruction is None:
+            return self.press_cell[..., -2]
+        return self.reconstruction.shell_pressure(self)
+
+    def _face_state(self, side: str) -> None:
+        """
+        Энергия `energy_<side>` и скорость звука `c_<side>` на границах
+            по восстановленным параметрам
+        """
+        raise NotImplementedError
 
-        answer[else_cond] = 0.25 * (self.mah_cell_minus[else_cond] + 1) ** 2 \
-                                 * (1 + 4 * 1 / 8 * (self.mah_cell_minus[else_cond] - 1) ** 2)
-        return answer
+    @property
+    def profile(self) -> typing.Optional[typing.Dict[str, PhaseProfile]]:
+        """
+        Суммарное время и количество вызовов этапов шага по времени
+            и записи истории или None без профилирования
+        """
+        if self._profiler is None:
+            return None
+        return self._profiler.report()
 
-    def _fetta_mines(self):
+    def _set_profile(self, profile: bool) -> None:
         """
-        Параметр в пересчете давления на границе для индекса -
+        Включение профилирования этапов шага по времени
         """
-        answer = np.zeros_like(self.mah_cell_plus)
-        if_cond = np.abs(self.mah_cell_plus) >= 1
-        else_cond = np.abs(self.mah_cell_plus) < 1
+        if profile:
+            self._profiler = Profiler()
+            self._profiler.install(self)
+
+    def _velocity_parameters(self):
+        np.add(self.c_right, self.c_left, out=self.c_interface)
+        self.c_interface /= 2
+        np.subtract(self.v_left, self.w_interface, out=self.mah_cell_minus)
+        self.mah_cell_minus /= self.c_interface
+        np.subtract(self.v_right, self.w_interface, out=self.mah_cell_plus)
+        self.mah_cell_plus /= self.c_interface
 
-        answer[if_cond] = 0.5 * (self.mah_cell_plus[if_cond]
-                                 - np.abs(self.mah_cell_plus[if_cond]))
+    def _get_mah_press_interface(self):
+        self.scheme.interface(self)
 
-        answer[else_cond] = -0.25 * (self.mah_cell_plus[else_cond] - 1) ** 2 \
-                                  * (1 + 4 * 1 / 8 * (self.mah_cell_plus[else_cond] + 1) ** 2)
-        return answer
+    def _kurant(self):
+        """
+        Число Куранта текущего шага
+        """
+        if self.controller is None:
+            return self.gun.kurant
+        return self.controller.kurant
 
-    def _getta_plus(self):
+    def _cfl_ratio(self):
         """
-        Параметр в пересчете давления на границе для индекса +
+        Отношение длины ячейки к сумме модуля скорости газа и скорости звука
+            во внутренних ячейках
         """
-        answer = np.zeros_like(self.mah_cell_minus)
-        if_cond = np.abs(self.mah_cell_minus) >= 1
-        else_cond = np.abs(self.mah_cell_minus) < 1
+        buffer_ = self._face_work[-1][..., :-1]
+        speed = self._cell_work[0][..., 1:-1]
+        np.subtract(self.x_interface[..., 1:], self.x_interface[..., :-1],
+                    out=buffer_)
+        np.abs(self.v_cell[..., 1:-1], out=speed)
+        speed += self.c_cell[..., 1:-1]
+        buffer_ /= speed
+        return buffer_
 
-        answer[if_cond] = (
-            self.mah_cell_minus[if_cond] + np.abs(self.mah_cell_minus[if_cond])
-        ) / 2 / self.mah_cell_minus[if_cond]
+    def _calculate_tau(self):
+        self.tau = self._kurant() * np.min(self._cfl_ratio(), axis=-1)
+
+    def _new_x_interfaces(self, last_x_interface):
+        """
+        Равномерная сетка от 0 до `last_x_interface`, значения
+            совпадают с np.linspace
+        """
+        step = np.divide(last_x_interface, self.nodes - 2)
+        np.multiply(self._index, np.expand_dims(step, -1),
+                    out=self.x_interface)
+        self.x_interface[..., -1] = last_x_interface
 
-        answer[else_cond] = (self.mah_cell_minus[else_cond] + 1) ** 2 \
-            * ((2 - self.mah_cell_minus[else_cond]) / 4
-                + 3 / 16 * self.mah_cell_minus[else_cond]
-                * (self.mah_cell_minus[else_cond] - 1) ** 2)
-        return answer
+    def _get_F(self):
+        """
+        Векторы Ф во всех ячейках
+        """
+        F_cell = self._F_cell
+        buffer_ = self._cell_work[0]
+        np.copyto(F_cell[0], self.ro_cell)
+        np.multiply(self.ro_cell, self.v_cell, out=F_cell[1])
+        np.square(self.v_cell, out=buffer_)
+        buffer_ /= 2
+        np.add(self.energy_cell, buffer_, out=F_cell[2])
+        np.divide(self.press_cell, self.ro_cell, out=buffer_)
+        F_cell[2] += buffer_
+        F_cell[2] *= self.ro_cell
+
+    def _get_f(self):
+        self.scheme.flux(self)
+        if self.reconstruction is not None:
+            self.reconstruction.wall_flux(self)
+
+    def _update_q(self, source=None):
+        """
+        Обновление векторов q во внутренних ячейках
+            одной операцией по всем переменным
 
-    def _getta_mines(self):
+        Parameters
+        ----------
+        source: np.ndarray, optional
+            Источник в уравнении последней переменной в ячейках
         """
-        Параметр в пересчете давления на границе для индекса -
+        # шаг и длины ячеек в виде столбцов, чтобы расчет ансамбля
+        # выполнялся теми же операциями, что и одиночный расчет
+        tau = np.expand_dims(self.tau, -1)
+        previous_cell_lenght = np.expand_dims(self._previous_cell_lenght, -1)
+        cell_lenght = self.x_interface[..., 1:2]
+        coef_stretch = previous_cell_lenght / cell_lenght
+
+        delta = self._face_work[:-1, ..., :-1]
+        np.subtract(self.f_param[..., 1:], self.f_param[..., :-1], out=delta)
+        if source is not None:
+            buffer_ = self._face_work[-1][..., :-1]
+            np.multiply(source[..., 1:-1], cell_lenght, out=buffer_)
+            delta[-1] -= buffer_
+        delta *= tau / previous_cell_lenght
+        inner = self.q_param[..., 1:-1]
+        np.subtract(inner, delta, out=delta)
+        np.multiply(coef_stretch, delta, out=inner)
+
+    def solve(self) -> 'EulerianGrid':
         """
-        answer = np.zeros_like(self.mah_cell_plus)
-        if_cond = np.abs(self.mah_cell_plus) >= 1
-        else_cond = np.abs(self.mah_cell_plus) < 1
+        Решение задачи до вылета снаряда. Используется с `solve=False`
+            или после остановки `iter_steps`
+        """
+        if self.is_solved:
+            return self
+        if not self._started:
+            self._run()
+        else:
+            self._integrate()
+        return self
 
-        answer[if_cond] = (
-            self.mah_cell_plus[if_cond] - np.abs(self.mah_cell_plus[if_cond])
-        ) / 2 / self.mah_cell_plus[if_cond]
+    def iter_steps(self, every: int = 1,
+                   fields: bool = False) -> typing.Iterator[StepState]:
+        """
+        Пошаговое решение задачи
 
-        answer[else_cond] = (self.mah_cell_plus[else_cond] - 1) ** 2 \
-            * ((2 + self.mah_cell_plus[else_cond]) / 4
-                - 3 / 16 * self.mah_cell_plus[else_cond]
-                * (self.mah_cell_plus[else_cond] + 1) ** 2)
-        return answer
+        Генератор выполняет шаги по времени и возвращает состояние
+        каждого `every`-го шага и последнего шага. Расчет можно остановить
+        в любой момент и продолжить повторным вызовом `iter_steps`
+        или методом `solve`. После последнего шага решение завершается
+        так же, как при расчете в конструкторе
+
+        Parameters
+        ----------
+        every: int, optional
+            Возвращать каждый `every`-й шаг
+        fields: bool, optional
+            Добавлять в состояние срезы массивов параметров в ячейках.
+            Срезы изменяются на следующем шаге
+
+        Yields
+        ------
+        state: StepState
+        """
+        if every < 1:
+            raise ValueError('Параметр every должен быть натуральным числом')
+        if not self._started:
+            self._start()
+        for _ in self._advance():
+            if self._step_count % every == 0 or self.is_solved:
+                yield self._snapshot(fields)
+
+    def _snapshot(self, fields: bool = False) -> StepState:
+        """
+        Состояние текущего шага: записанные в историю величины
+        """
+        values = self.history.last
+        return StepState(
+            self._step_count, *values.tolist(),
+            fields={name: getattr(self, name) for name in self._field_names}
+            if fields else None
+        )
 
     def _run(self):
         """
         Решение задачи. Последовательное интегрирование параметров системы
         """
+        key = self._cache_key()
+        if key is not None:
+            arrays = self.cache.get(key)
+            if arrays is not None:
+                self._load_solution(arrays)
+                return
+        self._start()
+        self._integrate()
+        if key is not None:
+            self.cache.put(key, self._dump_solution())
+
+    def _cache_key(self) -> typing.Optional[str]:
+        """
+        Ключ решения в кэше или None, если кэш не используется
+
+        Расчеты с записью полей, контрольными точками или событиями
+        выполняются всегда, так как их результаты не хранятся в кэше
+        """
+        if self.cache is None or self.field_recorder is not None \
+                or self.autosave is not None or self._event_detectors:
+            return None
+        return self.cache.key(self._spec())
 
+    def _dump_solution(self) -> dict:
+        """
+        Массивы решения для записи в кэш: полное состояние расчета,
+            как в контрольной точке
+        """
+        return self._state_arrays()
+
+    def _load_solution(self, arrays: dict) -> None:
+        """
+        Восстановление решения из массивов `_dump_solution`
+        """
+        self._load_state(arrays)
+        self._finish()
+
+    def _start(self):
+        """
+        Подготовка к интегрированию
+        """
         # Вычисление координат границ в начальный момент времени
         self._new_x_interfaces(self.gun.chamber)
 
         # Формирование массивов результатов
-        self.shell_position = []
-        self.shell_velocity = []
-        self.shell_pressure = []
-        self.stem_pressure = []
-        self.time = []
+        self._clock = 0.0
+        self._step_count = 0
+        self.history.start(HISTORY_NAMES)
+        if self.controller is not None:
+            self.controller.start(self)
+        if self.diagnostics is not None:
+            self.diagnostics.start(self)
+        if self.field_recorder is not None:
+            self.field_recorder.start(self)
+        # записи истории в начале и в конце последнего шага
+        self._current_row = np.array(self._record_values(), dtype=float)
+        self._previous_row = self._current_row.copy()
+        for event in self._event_detectors:
+            event.start(self, self._current_row)
+        self._started = True
+
+    def _integrate(self):
+        """
+        Последовательное вычисления с шагом по времени до вылета снаряда
+        """
+        for _ in self._advance():
+            pass
 
-        # Последовательное вычисления с шагом по времени
-        while True:
-            self._calculate_tau()
-            self._previous_cell_lenght = self.x_interface[1]
-            self._new_x_interfaces(self._end_vel_x()[1])
-            self.v_interface[-1] = self._end_vel_x()[0]
-            # линейное распределение скорости
-            self.v_interface = (self.v_interface[-1] / self.x_interface[-1]) \
-                * self.x_interface
-
-            # заполнение массивов для графиков
-            if len(self.time) == 0:
-                self.time.append(self.tau)
+    def _advance(self) -> typing.Iterator[None]:
+        """
+        Генератор шагов по времени до вылета снаряда
+        """
+        if self.autosave is not None:
+            self.autosave.start()
+        while not self.is_solved:
+            if self.controller is None:
+                self._move_grid()
+                self._clock += self.tau
+                self._record()
+                self._update_cells()
             else:
-                self.time.append(self.tau + self.time[-1])
-            self.shell_position.append(self.x_interface[-1])
-            self.shell_velocity.append(self.v_interface[-1])
-            self.shell_pressure.append(self.press_cell[-2])
-            self.stem_pressure.append(self.press_cell[1])
-
-            # последовательные вычисления
-            self._velocity_parameters()
-            self._get_mah_press_interface()
-            self._get_F_mines()
-            self._get_F_plus()
-            self._get_f()
-            self._get_q()
-            if self.x_interface[-1] >= self.gun.barrel:
-                break
+                self._controlled_step()
+            self._step_count += 1
+            self._previous_row, self._current_row = \
+                self._current_row, self._previous_row
+            np.copyto(self._current_row, self.history.last)
+            for event in self._event_detectors:
+                event.check(self, self._previous_row, self._current_row)
+            if self.field_recorder is not None and self.field_recorder.due():
+                self.field_recorder.record(self._field_values())
+            finished = self.x_interface[-1] >= self.gun.barrel
+            if self.diagnostics is not None:
+                self.diagnostics.update(self, finished)
+            if finished:
+                self._finish()
+            elif self.autosave is not None and self.autosave.due():
+                self.checkpoint(self.autosave.path)
+            yield
+
+    def _finish(self):
+        """
+        Завершение решения после вылета снаряда
+        """
+        self._store_history()
+        self._store_events()
+        if self.controller is not None:
+            self.step_stats = self.controller.stats()
+        if self.diagnostics is not None:
+            self.quality = self.diagnostics.summary()
+        if self.field_recorder is not None:
+            self.field_recorder.finish(self._field_values())
         self.is_solved = True
 
+    def _store_events(self):
+        """
+        Уточнение момента вылета снаряда внутри последнего шага
+            и перенос найденных событий в атрибут `events`
+        """
+        previous, current = self._previous_row, self._current_row
+        time, velocity, fraction = muzzle_exit(
+            previous[:3], current[:3], self.gun.barrel)
+        row = previous + fraction * (current - previous)
+        row[:3] = time, self.gun.barrel, velocity
+        self.muzzle_time = float(time)
+        self.muzzle_velocity = float(velocity)
+        self.events = {'muzzle': EventState(*row.tolist())}
+        for event in self._event_detectors:
+            event.finish(self, current)
+            if event.result is not None:
+                self.events[event.name] = event.result
+
+    def _controlled_step(self):
+        """
+        Шаг по времени с адаптивным числом Куранта
+
+        Отклоненный контроллером шаг повторяется из сохраненного состояния
+        """
+        controller = self.controller
+        controller.save(self)
+        limiting_cell = np.argmin(self._cfl_ratio()) + 1
+        while True:
+            kurant = controller.kurant
+            self._move_grid()
+            self._clock += self.tau
+            row = np.array(self._record_values(), dtype=float)
+            self._update_cells()
+            if controller.accept(self):
+                break
+            controller.restore(self)
+        self._record_history(*row)
+        controller.step(self, kurant, limiting_cell)
+
+    def _field_values(self) -> dict:
+        """
+        Поля, записываемые `field_recorder`, на текущем шаге
+        """
+        values = {name: getattr(self, name)
+                  for name in self.field_recorder.fields[1:]}
+        values['time'] = self._clock
+        return values
+
+    def _record_values(self) -> tuple:
+        """
+        Величины истории выстрела на текущем шаге в порядке HISTORY_NAMES
+        """
+        return (
+            self._clock,
+            self.x_interface[..., -1],
+            self.v_interface[..., -1],
+            self.press_cell[..., -2],
+            self.press_cell[..., 1],
+        )
+
+    def _record(self):
+        """
+        Заполнение массивов для графиков
+        """
+        self._record_history(*self._record_values())
+
+    def _record_history(self, *values) -> None:
+        """
+        Запись величин шага в историю выстрела
+        """
+        self.history.record(*values)
+
+    def _store_history(self):
+        """
+        Перенос записанной истории в атрибуты решения
+        """
+        self.history.finish()
+        for name, values in self.history.arrays().items():
+            setattr(self, name, values)
+
+    def _set_backend(self, backend: str) -> None:
+        """
+        Выбор бэкенда шага по времени: 'numpy' или 'numba'
+        """
+        self.backend = jit.get_backend(backend)
+        if self.backend == 'numba':
+            if self.reconstruction is not None:
+                raise ValueError('Бэкенд numba не поддерживает '
+                                 'восстановление MUSCL')
+            if type(self.scheme) not in (AUSM, AUSMPlus):
+                raise ValueError('Бэкенд numba поддерживает только '
+                                 'схемы ausm и ausm+')
+            self._jit = self._jit_parameters()
+
+    def _jit_parameters(self) -> dict:
+        """
+        Параметры компилируемых ядер: давление форсирования `boostp`,
+            уравнение состояния `eos`, граница для скорости газа
+            в последней ячейке `border_face`, массивы `zet` и `psi`
+        """
+        raise NotImplementedError
+
+    def _move_grid(self):
+        """
+        Шаг по времени и перемещение сетки вслед за снарядом
+        """
+        if self.backend == 'numba':
+            self.tau, self._previous_cell_lenght = jit.move_grid(
+                self.x_interface, self.v_interface,
+                self.v_cell, self.c_cell, self.press_cell,
+                self._kurant(), self._jit['boostp'],
+                self.gun.cs_area, self.gun.shell)
+            return
+        self._calculate_tau()
+        # сетка обновляется на месте, поэтому длина копируется
+        self._previous_cell_lenght = self.x_interface[..., 1].copy()
+        velocity, last_x_interface = self._end_vel_x()
+        self._new_x_interfaces(last_x_interface)
+        # линейное распределение скорости
+        np.multiply(np.expand_dims(velocity / self.x_interface[..., -1], -1),
+                    self.x_interface, out=self.v_interface)
+
+    def _update_cells(self):
+        """
+        Последовательные вычисления параметров в ячейках на новом шаге
+        """
+        if self.backend == 'numba':
+            jit.update_cells(
+                self.q_param, self.f_param, self.F_param_p, self.F_param_m,
+                self.ro_cell, self.v_cell, self.energy_cell,
+                self.press_cell, self.c_cell,
+                self._jit['zet'], self._jit['psi'],
+                self.x_interface, self.v_interface, self.c_interface,
+                self.mah_cell_minus, self.mah_cell_plus,
+                self.mah_interface, self.press_interface,
+                self.tau, self._previous_cell_lenght,
+                self.scheme.beta, self.scheme.alpha,
+                self._jit['eos'], self._jit['border_face'])
+            return
+        if self.reconstruction is not None:
+            self.reconstruction.reconstruct(self)
+        self._velocity_parameters()
+        self._get_mah_press_interface()
+        if self.reconstruction is None:
+            self._get_F()
+        self._get_f()
+        self._get_q()
+
+    def checkpoint(self, path: str) -> None:
+        """
+        Запись полного состояния расчета в контрольную точку
+
+        Сохраняются массивы состояния, шаг по времени, записанные истории,
+        параметры орудия, пороха или газа и настройки расчета.
+        Расчет продолжается методом `resume`
+
+        Parameters
+        ----------
+        path: str
+            Путь к файлу контрольной точки
+        """
+        if not self._started:
+            self._start()
+        config = self._spec()
+        config.update(
+            is_solved=bool(self.is_solved),
+            backend=self.backend,
+            autosave=None if self.autosave is None
+            else self.autosave.config(),
+            events=[event.name for event in self._event_detectors],
+        )
+        checkpoint_.write_checkpoint(path, config, self._state_arrays())
+
+    def _state_arrays(self) -> dict:
+        """
+        Массивы полного состояния расчета для контрольной точки и кэша
+        """
+        arrays = {name: getattr(self, name) for name in self._state_fields}
+        arrays.update(
+            tau=np.asarray(self.tau),
+            previous_cell_lenght=np.asarray(self._previous_cell_lenght),
+            clock=np.asarray(self._clock),
+            step=np.asarray(self._step_count),
+            previous_row=self._previous_row,
+            current_row=self._current_row,
+        )
+        arrays.update((f'history_{name}', value)
+                      for name, value in self.history.dump().items())
+        if self.controller is not None:
+            arrays.update((f'controller_{name}', value)
+                          for name, value in self.controller.dump().items())
+        if self.diagnostics is not None:
+            arrays.update((f'diagnostics_{name}', value)
+                          for name, value in self.diagnostics.dump().items())
+        for i, event in enumerate(self._event_detectors):
+            arrays.update((f'event_{i}_{name}', value)
+                          for name, value in event.dump().items())
+        return arrays
+
+    def _load_state(self, arrays: dict) -> None:
+        """
+        Восстановление состояния расчета из массивов `_state_arrays`
+        """
+        for name in self._state_fields:
+            np.copyto(getattr(self, name), arrays[name])
+        self.tau = arrays['tau'][()]
+        self._previous_cell_lenght = arrays['previous_cell_lenght'][()]
+        self._clock = float(arrays['clock'])
+        self._step_count = int(arrays['step'])
+        self._previous_row = arrays['previous_row']
+        self._current_row = arrays['current_row']
+        self._started = True
+        self.history.load(HISTORY_NAMES, _prefixed(arrays, 'history_'))
+        if self.controller is not None:
+            self.controller.load(self, _prefixed(arrays, 'controller_'))
+        if self.diagnostics is not None:
+            self.diagnostics.load(_prefixed(arrays, 'diagnostics_'))
+        for i, event in enumerate(self._event_detectors):
+            event.load(_prefixed(arrays, f'event_{i}_'))
+
+    def _spec(self) -> dict:
+        """
+        Описание исходных данных расчета, пригодное для JSON
+        """
+        history = self.history
+        spec = {
+            'class': self.__class__.__name__,
+            'nodes': int(self.nodes),
+            'scheme': checkpoint_.scheme_spec(self.scheme),
+            'history': {'every': history.every, 'interval': history.interval,
+                        'rtol': history.rtol,
+                        'scalars_only': history.scalars_only,
+                        'chunk': history.chunk},
+            'controller': None if self.controller is None
+            else self.controller.config(),
+            'diagnostics': None if self.diagnostics is None
+            else self.diagnostics.config(),
+            'reconstruction': None if self.reconstruction is None
+            else self.reconstruction.config(),
+        }
+        spec.update(self._config())
+        return spec
+
+    @classmethod
+    def resume(cls, path: str,
+               autosave: checkpoint_.Checkpoint = None,
+               solve: bool = True,
+               events: typing.Sequence[Event] = (),
+               field_recorder: FieldRecorder = None,
+               cache: SolutionCache = None,
+               profile: bool = False) -> 'EulerianGrid':
+        """
+        Продолжение расчета из контрольной точки
+
+        Функции событий, каталоги записи полей и кэша не сохраняются
+        в контрольной точке, поэтому передаются заново. Без них
+        продолженный расчет выполняется без событий, записи полей,
+        кэша и профилирования
+
+        Parameters
+        ----------
+        path: str
+            Путь к файлу контрольной точки
+        autosave: Checkpoint, optional
+            Политика записи контрольных точек. По умолчанию - политика
+            прерванного расчета
+        solve: bool, optional
+            Продолжить ли расчет сразу. Иначе расчет продолжается
+            методами `solve` или `iter_steps`
+        events: sequence of Event, optional
+            События прерванного расчета в том же порядке. Состояние
+            их поиска восстанавливается из контрольной точки
+        field_recorder: FieldRecorder, optional
+            Запись полей с шага контрольной точки в новые файлы
+        cache: SolutionCache, optional
+            Кэш решений, в который записывается завершенный расчет,
+            если он выполнялся без контрольных точек, событий
+            и записи полей (см. `_cache_key`)
+        profile: bool, optional
+            Измерять ли время этапов шага
+
+        Returns
+        -------
+        solution:
+            Решение того же класса, что и прерванный расчет
+        """
+        config, arrays = checkpoint_.read_checkpoint(path)
+        kind = _find_subclass(cls, config['class'])
+        names = [event.name for event in events]
+        if events and names != config.get('events', []):
+            raise ValueError('События должны совпадать с событиями '
+                             'прерванного расчета: '
+                             f'{", ".join(config.get("events", []))}')
+        self = kind.__new__(kind)
+        self.nodes = config['nodes']
+        self.history = History(**config['history'])
+        self.scheme = checkpoint_.scheme_from_spec(config['scheme'])
+        self.controller = None if config['controller'] is None \
+            else StepController(**config['controller'])
+        if config.get('reconstruction') is not None:
+            self.reconstruction = get_reconstruction(
+                config['reconstruction']['limiter'])
+        if config.get('diagnostics') is not None:
+            self.diagnostics = Diagnostics(**config['diagnostics'])
+        if autosave is not None:
+            self.autosave = autosave
+        elif config['autosave'] is not None:
+            self.autosave = checkpoint_.Checkpoint(**config['autosave'])
+        self.cache = cache
+        self.field_recorder = None if field_recorder is None \
+            else copy.copy(field_recorder)
+        self._event_detectors = tuple(copy.copy(event) for event in events)
+        self._restore_config(config)
+
+        self._initial_state()
+        self._set_backend(config['backend'])
+        self._set_profile(profile)
+        self._load_state(arrays)
+        if self.field_recorder is not None:
+            self.field_recorder.start(self)
+
+        self.is_solved = False
+        if config['is_solved']:
+            self._finish()
+        elif solve:
+            self._integrate()
+            key = self._cache_key()
+            if key is not None:
+                self.cache.put(key, self._dump_solution())
+        return self
+
+    def _config(self) -> dict:
+        """
+        Параметры орудия и метаемой среды для контрольной точки
+        """
+        raise NotImplementedError
+
+    def _restore_config(self, config: dict) -> None:
+        """
+        Восстановление параметров, записанных `_config`
+        """
+        raise NotImplementedError
+
     def save(self, path='\\balltic\\results\\results.npz'):
         """
         Save solution arrays into a single file in uncompressed ``.npz`` format
@@ -201,6 +873,25 @@ class EulerianGrid(object):
         return True
 
 
+def _find_subclass(cls, name: str) -> type:
+    """
+    Поиск класса расчета по названию среди `cls` и его наследников
+    """
+    kinds = [cls]
+    while kinds:
+        kind = kinds.pop()
+        if kind.__name__ == name:
+            return kind
+        kinds.extend(kind.__subclasses__())
+    raise ValueError(f'Контрольная точка записана классом {name}, '
+                     f'а не {cls.__name__}')
+
+
+def _prefixed(arrays: dict, prefix: str) -> dict:
+    return {name[len(prefix):]: value for name, value in arrays.items()
+            if name.startswith(prefix)}
+
+
 class NotSolvedError(Exception):
     def __init__(self):
         super(NotSolvedError, self).__init__('Решение задачи отсутствует')
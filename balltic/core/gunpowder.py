@@ -1,17 +1,26 @@
 __author__ = 'Anthony Byuraev'
 
-__all__ = ['GunPowder']
+__all__ = ['GunPowder', 'PowderRegistry', 'registry']
 
 import os
 import json
+import types
 import typing
+import threading
 from abc import ABCMeta
 from abc import abstractmethod
 from abc import abstractclassmethod
 from abc import abstractstaticmethod
 
+import numpy as np
 
-BASE_PATH = os.getcwd()
+from balltic.core.burning import TabulatedLaw, TwoStageLaw
+
+
+DATABASE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'powders', 'gpowders.json')
+SNAPSHOT_VARIABLE = 'BALLTIC_POWDER_SNAPSHOT'
 GUNPOWDER_KEYS = (
     'f',
     'ro',
@@ -25,6 +34,18 @@ GUNPOWDER_KEYS = (
     'lambda_1',
     'lambda_2',
 )
+#: Параметры пороха в единицах СИ: название атрибута, поле базы, множитель
+SI_UNITS = (
+    ('f', 'f', 1e6),
+    ('ro', 'ro', 1e3),
+    ('k_1', 'k_1', 1.0),
+    ('k_2', 'k_2', 1.0),
+    ('I_k', 'I_k', 1e6),
+    ('z_k', 'Z_k', 1.0),
+    ('alpha_k', 'alpha_k', 1e-3),
+    ('lambda_1', 'lambda_1', 1.0),
+    ('lambda_2', 'lambda_2', 1.0),
+)
 
 
 class BasePowder(metaclass=ABCMeta):
@@ -61,28 +82,65 @@ class BasePowder(metaclass=ABCMeta):
 class GunPowder(BasePowder):
     """
     Реализация артиллерийского пороха
+
+    Порох по названию берется из общего реестра `registry`: база данных
+    читается один раз, а для каждого названия существует единственный
+    объект. Параметры пороха только для чтения
     """
+    def __new__(cls, name: str) -> 'GunPowder':
+        return registry.get(name)
+
     def __init__(self, name: str) -> None:
-        self.name = name
-        self._gunpowder = self.load_gunpowder(self.name)
-
-        self.k = self._gunpowder['etta'] + 1
-        self.f = self._gunpowder['f'] * 1e6
-        self.ro = self._gunpowder['ro'] * 1e3
-        self.k_1 = self._gunpowder['k_1']
-        self.k_2 = self._gunpowder['k_2']
-        self.I_k = self._gunpowder['I_k'] * 1e6
-        self.z_k = self._gunpowder['Z_k']
-        # self.T_1 = self._gunpowder['T_1']
-        self.alpha_k = self._gunpowder['alpha_k'] * 1e-3
-        self.lambda_1 = self._gunpowder['lambda_1']
-        self.lambda_2 = self._gunpowder['lambda_2']
+        # параметры заданы реестром в __new__
+        pass
+
+    @classmethod
+    def from_record(cls, name: str, record: dict) -> 'GunPowder':
+        """
+        Порох по записи базы данных, например сохраненной
+            в контрольной точке
+        """
+        gunpowder = object.__new__(cls)
+        object.__setattr__(gunpowder, 'name', name)
+        gunpowder._set_parameters(gunpowder._check_gunpowder(dict(record)))
+        return gunpowder
+
+    def _set_parameters(self, gunpowder: dict) -> None:
+        values = {
+            '_gunpowder': types.MappingProxyType(gunpowder),
+            'k': gunpowder['etta'] + 1,
+            # 'T_1': gunpowder['T_1'],
+        }
+        for attribute, key, scale in SI_UNITS:
+            values[attribute] = gunpowder[key] * scale
+        for attribute, value in values.items():
+            object.__setattr__(self, attribute, value)
+        self._burning_table = None
+
+    def __setattr__(self, name: str, value) -> None:
+        if not name.startswith('_'):
+            raise AttributeError('Параметры пороха только для чтения')
+        object.__setattr__(self, name, value)
+
+    def __reduce__(self):
+        return (_restore_gunpowder, (self.name, dict(self._gunpowder)))
 
     def __str__(self):
-        return str(self._gunpowder)
+        return str(dict(self._gunpowder))
 
     def __repr__(self):
-        return 'GunPowder("gunpowder_name")'
+        return f'GunPowder({self.name!r})'
+
+    def burning_table(self, points: int = 4097) -> TabulatedLaw:
+        """
+        Таблица двухстадийного закона газообразования пороха.
+            Вычисляется один раз и используется всеми расчетами
+        """
+        if self._burning_table is None \
+                or self._burning_table.zet.size != points:
+            self._burning_table = \
+                TwoStageLaw.from_gunpowder(self).tabulate(points)
+        return self._burning_table
 
     def _check_gunpowder(self, gunpowder: dict) -> dict:
         for key in GUNPOWDER_KEYS:
@@ -96,19 +154,17 @@ class GunPowder(BasePowder):
     def load_database(file_path: typing.IO[str] = None) -> typing.Dict[str, dict]:
         """
         Загружает все пороха из базы данных, расположенной в
-            balltic\\powders\\gpowders.json
+            balltic/powders/gpowders.json
 
         Parameters
         ----------
         file_path: TextIO or BinaryIO, optional
             Путь к файлу базы данных
         """
-        if file_path is not None:
-            file_path = file_path
-        else:
-            file_path = '\\balltic\\powders\\gpowders.json'
+        if file_path is None:
+            file_path = DATABASE_PATH
         try:
-            with open(BASE_PATH + file_path) as file_:
+            with open(file_path, encoding='utf-8') as file_:
                 return json.load(file_)
         except FileNotFoundError:
             raise FileNotFoundError('Файл не найден или не существует')
@@ -117,7 +173,7 @@ class GunPowder(BasePowder):
     def load_gunpowder(self, name: str) -> dict:
         """
         Загружает по названию порох из базы данных, расположенной в
-            "balltic\\powders\\gpowders.json"
+            "balltic/powders/gpowders.json"
 
         Parameters
         ----------
@@ -125,21 +181,310 @@ class GunPowder(BasePowder):
             Название пороха. Следует писать дробь через двойной обратный слэш
             Пример:
                 '16/1 тр' -> '16\\1 тр'
-        file_path: TextIO or BinaryIO, optional
-            Путь к файлу базы данных
 
         Returns
         -------
         gunpowder: dict
             Словарь с параметрами пороха
         """
-        if isinstance(name, str):
-            pass
-        else:
+        return registry.record(name)
+
+
+def _restore_gunpowder(name: str, record: dict) -> GunPowder:
+    """
+    Восстановление пороха при распаковке: порох из базы данных
+        заменяется объектом реестра
+    """
+    if registry.record(name, default=None) == record:
+        return registry.get(name)
+    return GunPowder.from_record(name, record)
+
+
+class PowderRegistry(object):
+    """
+    Общий для процесса реестр порохов базы данных
+
+    База данных читается при первом обращении и хранится в столбцах:
+    `names` - названия порохов, `raw` - поля базы данных,
+    `columns` - параметры в единицах СИ под названиями атрибутов
+    GunPowder (k, f, ro, k_1, k_2, I_k, z_k, alpha_k, lambda_1, lambda_2).
+    Пустые поля базы данных - NaN. Объекты GunPowder создаются
+    по требованию, один на название
+
+    Если задан `snapshot`, столбцы читаются из двоичного файла ``.npz``
+    без разбора JSON. Снимок создается при первом чтении базы данных
+    и пересоздается, если база данных новее снимка. Путь к снимку общего
+    реестра задается переменной окружения BALLTIC_POWDER_SNAPSHOT
+
+    Parameters
+    ----------
+    path: str, optional
+        Путь к базе данных JSON
+    snapshot: str, optional
+        Путь к двоичному снимку базы данных
+    """
+    def __repr__(self):
+        return (f'{self.__class__.__name__}({self.path!r}, '
+                f'snapshot={self.snapshot!r})')
+
+    def __init__(self, path: str = DATABASE_PATH,
+                 snapshot: str = None) -> None:
+        self.path = path
+        self.snapshot = snapshot
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._powders = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        self._load()
+        return name in self._index
+
+    @property
+    def names(self) -> typing.Tuple[str, ...]:
+        self._load()
+        return self._names
+
+    @property
+    def raw(self) -> typing.Dict[str, np.ndarray]:
+        self._load()
+        return self._raw
+
+    @property
+    def columns(self) -> typing.Dict[str, np.ndarray]:
+        self._load()
+        return self._columns
+
+    def index(self, name: str) -> int:
+        """
+        Номер пороха в столбцах реестра
+        """
+        if not isinstance(name, str):
             raise ValueError('Название пороха должно быть строкой')
-        gunpowders = self.load_database()
+        self._load()
         try:
-            gunpowder = gunpowders[name]
+            return self._index[name]
         except KeyError:
             raise KeyError('Марка пороха не найдена или не существует')
-        return self._check_gunpowder(self, gunpowder)
+
+    def record(self, name: str, default=KeyError) -> dict:
+        """
+        Запись базы данных о порохе в исходных единицах
+        """
+        if default is not KeyError and name not in self:
+            return default
+        i = self.index(name)
+        record = {key: float(column[i]) for key, column in self._raw.items()}
+        record['name'] = name
+        return record
+
+    def get(self, name: str) -> GunPowder:
+        """
+        Единственный объект GunPowder для названия пороха
+        """
+        try:
+            return self._powders[name]
+        except (KeyError, TypeError):
+            pass
+        i = self.index(name)
+        if not self._complete[i]:
+            missing = [key for key in GUNPOWDER_KEYS
+                       if key != 'name' and np.isnan(self._raw[key][i])]
+            raise ValueError(f'Параметры пороха {name} не заданы: '
+                             f'{", ".join(missing)}')
+        with self._lock:
+            if name not in self._powders:
+                self._powders[name] = GunPowder.from_record(
+                    name, self.record(name))
+        return self._powders[name]
+
+    def query(self, sort_by: str = None, descending: bool = False,
+              limit: int = None, complete: bool = True,
+              **ranges) -> typing.List[str]:
+        """
+        Поиск порохов по диапазонам параметров
+
+        Диапазоны задаются в единицах базы данных для полей GUNPOWDER_KEYS:
+        кортеж (low, high) - включительно, None - без ограничения,
+        число - точное значение. Порох с пустым полем не удовлетворяет
+        условию на это поле. Поиск выполняется по отсортированным
+        индексам полей: сначала выбирается самый узкий диапазон, затем
+        кандидаты проверяются по остальным условиям
+
+        Пример:
+            registry.query(I_k=(0.5, 1.5), f=(1.0, None), sort_by='alpha_k')
+
+        Parameters
+        ----------
+        sort_by: str, optional
+            Поле для сортировки результата, по умолчанию - порядок базы
+        descending: bool, optional
+            Сортировать ли по убыванию
+        limit: int, optional
+            Наибольшее количество результатов
+        complete: bool, optional
+            Только пороха со всеми полями GUNPOWDER_KEYS, пригодные
+            для расчета
+        ranges: tuple or float
+            Диапазоны полей
+
+        Returns
+        -------
+        names: list of str
+            Названия порохов, которые можно передать в `sweep`
+        """
+        self._load()
+        for key in (*ranges, *(() if sort_by is None else (sort_by,))):
+            if key not in GUNPOWDER_KEYS or key == 'name':
+                raise ValueError(f'Поле {key} не поддерживается')
+        bounds = {}
+        for key, value in ranges.items():
+            low, high = value if isinstance(value, tuple) else (value, value)
+            bounds[key] = (-np.inf if low is None else low,
+                           np.inf if high is None else high)
+
+        if bounds:
+            spans = {}
+            for key, (low, high) in bounds.items():
+                order, values = self._sorted_index(key)
+                spans[key] = (np.searchsorted(values, low, side='left'),
+                              np.searchsorted(values, high, side='right'))
+            narrow = min(spans, key=lambda key: spans[key][1] - spans[key][0])
+            start, stop = spans[narrow]
+            found = self._sorted_index(narrow)[0][start:stop]
+            for key, (low, high) in bounds.items():
+                if key != narrow:
+                    column = self._raw[key][found]
+                    found = found[(column >= low) & (column <= high)]
+        else:
+            found = np.arange(len(self._names))
+        if complete:
+            found = found[self._complete[found]]
+
+        # равные значения - в порядке базы данных
+        found = np.sort(found)
+        if sort_by is not None:
+            values = self._raw[sort_by][found]
+            order = np.argsort(-values if descending else values,
+                               kind='stable')
+            found = found[order]
+        return [self._names[i] for i in found[:limit].tolist()]
+
+    def reload(self) -> None:
+        """
+        Повторное чтение базы данных после ее изменения
+
+        Снимок базы данных пересоздается, объекты GunPowder
+        создаются заново при следующем обращении
+        """
+        with self._lock:
+            self._loaded = False
+            self._powders = {}
+            if self.snapshot is not None:
+                try:
+                    os.remove(self.snapshot)
+                except OSError:
+                    pass
+        self._load()
+
+    def _sorted_index(self, key: str) -> typing.Tuple[np.ndarray, np.ndarray]:
+        """
+        Номера порохов, упорядоченные по полю, и упорядоченные значения
+            поля без пустых значений
+        """
+        try:
+            return self._indexes[key]
+        except KeyError:
+            pass
+        column = self._raw[key]
+        order = np.argsort(column, kind='stable')
+        order = order[~np.isnan(column[order])]
+        self._indexes[key] = (order, column[order])
+        return self._indexes[key]
+
+    def save_snapshot(self, path: str) -> None:
+        """
+        Запись столбцов базы данных в двоичный снимок
+        """
+        self._load()
+        temporary = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(temporary, 'wb') as file_:
+                np.savez(file_, names=np.array(self._names),
+                         keys=np.array(list(self._raw)),
+                         values=np.array(list(self._raw.values())))
+            os.replace(temporary, path)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    def _load(self) -> None:
+        """
+        Чтение базы данных или снимка при первом обращении
+        """
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if self._snapshot_valid():
+                with np.load(self.snapshot, allow_pickle=False) as data:
+                    names = data['names'].tolist()
+                    raw = dict(zip(data['keys'].tolist(), data['values']))
+            else:
+                names, raw = self._parse()
+            self._names = tuple(names)
+            self._index = {name: i for i, name in enumerate(self._names)}
+            self._raw = raw
+            self._columns = {'k': raw['etta'] + 1}
+            for attribute, key, scale in SI_UNITS:
+                self._columns[attribute] = raw[key] * scale
+            for column in (*self._raw.values(), *self._columns.values()):
+                column.flags.writeable = False
+            self._complete = np.all([~np.isnan(raw[key])
+                                     for key in GUNPOWDER_KEYS
+                                     if key != 'name'], axis=0)
+            self._indexes = {}
+            self._loaded = True
+        if self.snapshot is not None and not self._snapshot_valid():
+            try:
+                self.save_snapshot(self.snapshot)
+            except OSError:
+                pass
+
+    def _parse(self) -> typing.Tuple[list, typing.Dict[str, np.ndarray]]:
+        """
+        Разбор базы данных JSON в столбцы
+        """
+        database = GunPowder.load_database(self.path)
+        names = list(database)
+        keys = sorted({key for record in database.values()
+                       for key in record if key != 'name'})
+        raw = {key: np.array([_number(database[name].get(key))
+                              for name in names])
+               for key in keys}
+        return names, raw
+
+    def _snapshot_valid(self) -> bool:
+        if self.snapshot is None:
+            return False
+        try:
+            return os.path.getmtime(self.snapshot) \
+                >= os.path.getmtime(self.path)
+        except OSError:
+            return False
+
+
+def _number(value) -> float:
+    """
+    Числовое значение поля базы данных, пустое поле - NaN
+    """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+registry = PowderRegistry(snapshot=os.environ.get(SNAPSHOT_VARIABLE))
@@ -0,0 +1,177 @@
+"""
+history.py - модуль отвечает за запись истории выстрела
+    с прореживанием
+"""
+
+__author__ = 'Anthony Byuraev'
+
+__all__ = ['History']
+
+import typing
+
+import numpy as np
+
+
+class History(object):
+    """
+    Запись истории выстрела в растущие блоки массивов float64
+
+    Записывается шаг, удовлетворяющий всем заданным условиям прореживания.
+    Последний шаг записывается всегда, поэтому `[-1]` в историях
+    соответствует моменту окончания расчета
+
+    Parameters
+    ----------
+    every: int, optional
+        Записывать каждый `every`-й шаг
+    interval: float, optional
+        Записывать не чаще, чем через `interval` секунд
+    rtol: float, optional
+        Записывать, если хотя бы одна величина изменилась относительно
+        последней записи больше, чем на `rtol` (относительно)
+    scalars_only: bool, optional
+        Не хранить историю по шагам. Сохраняются только последние
+        и максимальные значения величин
+    chunk: int, optional
+        Количество записей в одном блоке
+    """
+    def __repr__(self):
+        return (f'{self.__class__.__name__}(every={self.every}, '
+                f'interval={self.interval}, rtol={self.rtol}, '
+                f'scalars_only={self.scalars_only})')
+
+    def __init__(self, every: int = 1,
+                 interval: float = None,
+                 rtol: float = None,
+                 scalars_only: bool = False,
+                 chunk: int = 1024) -> None:
+        if every < 1:
+            raise ValueError('Параметр every должен быть натуральным числом')
+        self.every = every
+        self.interval = interval
+        self.rtol = rtol
+        self.scalars_only = scalars_only
+        self.chunk = chunk
+        self.names = ()
+
+    def start(self, names: typing.Sequence[str], width: int = None) -> None:
+        """
+        Подготовка к записи
+
+        Parameters
+        ----------
+        names: sequence of str
+            Названия величин, первая величина - время
+        width: int, optional
+            Количество расчетов ансамбля, None для одиночного расчета
+        """
+        self.names = tuple(names)
+        self._shape = (len(self.names),) + (() if width is None else (width,))
+        self._chunks = []
+        self._size = 0
+        self._step = 0
+        self._recorded = None
+        self._pending = None
+        self.last = np.full(self._shape, np.nan)
+        self.maximum = np.full(self._shape, np.nan)
+
+    def record(self, *values) -> None:
+        """
+        Запись величин одного шага в порядке `names`
+        """
+        row = np.array(values, dtype=float)
+        finite = ~np.isnan(row)
+        self.last[finite] = row[finite]
+        np.fmax(self.maximum, row, out=self.maximum)
+        self._step += 1
+        if self.scalars_only:
+            return
+        if self._accept(row):
+            self._append(row)
+            self._pending = None
+        else:
+            self._pending = row
+
+    def finish(self) -> None:
+        """
+        Запись последнего шага, если он был пропущен прореживанием
+        """
+        if self._pending is not None:
+            self._append(self._pending)
+            self._pending = None
+
+    def arrays(self) -> typing.Dict[str, np.ndarray]:
+        """
+        Истории величин в виде массивов формы (записи,) или (записи, N)
+
+        При `scalars_only` каждая история содержит одно последнее значение
+        """
+        if self.scalars_only:
+            rows = self.last[np.newaxis]
+        elif self._chunks:
+            rows = np.concatenate(self._chunks[:-1]
+                                  + [self._chunks[-1][:self._size]])
+        else:
+            rows = np.empty((0,) + self._shape)
+        return {name: rows[:, i] for i, name in enumerate(self.names)}
+
+    def dump(self) -> typing.Dict[str, np.ndarray]:
+        """
+        Состояние записи в виде массивов, например для контрольной точки
+        """
+        if self._chunks:
+            rows = np.concatenate(self._chunks[:-1]
+                                  + [self._chunks[-1][:self._size]])
+        else:
+            rows = np.empty((0,) + self._shape)
+        pending = np.empty((0,) + self._shape) if self._pending is None \
+            else self._pending[np.newaxis]
+        return {
+            'rows': rows,
+            'pending': pending,
+            'last': self.last.copy(),
+            'maximum': self.maximum.copy(),
+            'step': np.array(self._step),
+        }
+
+    def load(self, names: typing.Sequence[str],
+             state: typing.Dict[str, np.ndarray]) -> None:
+        """
+        Восстановление состояния записи, сохраненного `dump`
+        """
+        rows = state['rows']
+        self.start(names, width=None if rows.ndim == 2 else rows.shape[2])
+        for start in range(0, rows.shape[0], self.chunk):
+            part = rows[start:start + self.chunk]
+            self._chunks.append(np.empty((self.chunk,) + self._shape))
+            self._chunks[-1][:part.shape[0]] = part
+            self._size = part.shape[0]
+        if rows.shape[0]:
+            self._recorded = self._chunks[-1][self._size - 1]
+        if state['pending'].shape[0]:
+            self._pending = state['pending'][0].copy()
+        self.last[...] = state['last']
+        self.maximum[...] = state['maximum']
+        self._step = int(state['step'])
+
+    def _accept(self, row) -> bool:
+        if self._recorded is None:
+            return True
+        if (self._step - 1) % self.every:
+            return False
+        if self.interval is not None \
+                and not np.any(row[0] - self._recorded[0] >= self.interval):
+            return False
+        if self.rtol is not None \
+                and not np.any(np.abs(row[1:] - self._recorded[1:])
+                               > self.rtol * np.abs(self._recorded[1:])):
+            return False
+        return True
+
+    def _append(self, row) -> None:
+        if not self._chunks or self._size == self.chunk:
+            self._chunks.append(np.empty((self.chunk,) + self._shape))
+            self._size = 0
+        self._chunks[-1][self._size] = row
+        self._size += 1
+        self._recorded = row
@@ -0,0 +1,205 @@
+"""
+jit.py - модуль отвечает за компилируемый бэкенд шага по времени
+
+Бэкенд использует numba, если она установлена. Ядра повторяют порядок
+операций NumPy-реализации, поэтому результаты совпадают с точностью
+до округления
+"""
+
+__author__ = 'Anthony Byuraev'
+
+__all__ = ['BACKENDS', 'get_backend', 'move_grid', 'update_cells']
+
+import math
+import warnings
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+BACKENDS = ('numpy', 'numba')
+
+
+def get_backend(backend: str) -> str:
+    """
+    Проверяет название бэкенда
+
+    Если numba не установлена, вместо 'numba' возвращается 'numpy'
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f'Бэкенд {backend} не найден. '
+                         f'Доступные бэкенды: {", ".join(BACKENDS)}')
+    if backend == 'numba' and numba is None:
+        warnings.warn('Пакет numba не установлен, используется бэкенд numpy',
+                      RuntimeWarning, stacklevel=3)
+        return 'numpy'
+    return backend
+
+
+def _move_grid(x_interface, v_interface, v_cell, c_cell, press_cell,
+               kurant, boostp, cs_area, shell):
+    """
+    Шаг по времени и перемещение сетки вслед за снарядом
+
+    Returns
+    -------
+    tau, previous_cell_lenght: float
+    """
+    faces = x_interface.shape[0]
+    buffer_ = math.inf
+    for i in range(faces - 1):
+        value = (x_interface[i + 1] - x_interface[i]) \
+            / (abs(v_cell[i + 1]) + c_cell[i + 1])
+        if value < buffer_ or math.isnan(value):
+            buffer_ = value
+    tau = kurant * buffer_
+    previous_cell_lenght = x_interface[1]
+
+    acceleration = press_cell[-2] * cs_area / shell
+    if press_cell[-2] < boostp:
+        velocity = 0.0
+        last_x_interface = x_interface[-1]
+    else:
+        velocity = v_interface[-1] + acceleration * tau
+        last_x_interface = x_interface[-1] + v_interface[-1] * tau \
+            + acceleration * tau ** 2 / 2
+
+    step = last_x_interface / (faces - 1)
+    for i in range(faces - 1):
+        x_interface[i] = i * step + 0.0
+    x_interface[-1] = last_x_interface
+    ratio = velocity / x_interface[-1]
+    for i in range(faces):
+        v_interface[i] = ratio * x_interface[i]
+    return tau, previous_cell_lenght
+
+
+def _update_cells(q_param, f_param, F_param_p, F_param_m,
+                  ro_cell, v_cell, energy_cell, press_cell, c_cell,
+                  zet_cell, psi_cell, x_interface, v_interface,
+                  c_interface, mah_cell_minus, mah_cell_plus,
+                  mah_interface, press_interface,
+                  tau, previous_cell_lenght, beta, alpha, eos, border_face):
+    """
+    Потоки через границы, обновление векторов q и граничные условия
+
+    eos: np.ndarray
+        [k] для легкого газа или
+        [k, f, ro, alpha_k, I_k, k_1, lambda_1, k_2, lambda_2, z_k, psi_s]
+        для пороховых газов
+    """
+    variables = q_param.shape[0]
+    nodes = q_param.shape[1]
+    powder = variables == 4
+    k = eos[0]
+
+    for j in range(nodes - 1):
+        c_int = (c_cell[j + 1] + c_cell[j]) / 2
+        mach_left = (v_cell[j] - v_interface[j]) / c_int
+        mach_right = (v_cell[j + 1] - v_interface[j]) / c_int
+        c_interface[j] = c_int
+        mah_cell_minus[j] = mach_left
+        mah_cell_plus[j] = mach_right
+
+        if abs(mach_left) >= 1:
+            fetta_plus = 0.5 * (mach_left + abs(mach_left))
+            getta_plus = 1.0 if mach_left > 0 else 0.0
+        else:
+            fetta_plus = 0.25 * (mach_left + 1) ** 2 \
+                * (1 + 4 * beta * (mach_left - 1) ** 2)
+            getta_plus = (mach_left + 1) ** 2 \
+                * ((2 - mach_left) / 4
+                   + alpha * mach_left * (mach_left - 1) ** 2)
+        if abs(mach_right) >= 1:
+            fetta_mines = 0.5 * (mach_right - abs(mach_right))
+            getta_mines = 1.0 if mach_right < 0 else 0.0
+        else:
+            fetta_mines = -0.25 * (mach_right - 1) ** 2 \
+                * (1 + 4 * beta * (mach_right + 1) ** 2)
+            getta_mines = (mach_right - 1) ** 2 \
+                * ((2 + mach_right) / 4
+                   - alpha * mach_right * (mach_right + 1) ** 2)
+        mah = fetta_plus + fetta_mines
+        press = getta_plus * press_cell[j] + getta_mines * press_cell[j + 1]
+        mah_interface[j] = mah
+        press_interface[j] = press
+
+        for side in range(2):
+            i = j + side
+            ro = ro_cell[i]
+            vector = F_param_p if side else F_param_m
+            vector[0, j] = ro
+            vector[1, j] = ro * v_cell[i]
+            vector[2, j] = ro * (energy_cell[i] + v_cell[i] ** 2 / 2
+                                 + press_cell[i] / ro)
+            if powder:
+                vector[3, j] = ro * zet_cell[i]
+
+        for n in range(variables):
+            f_param[n, j] = c_int / 2 * (
+                mah * (F_param_p[n, j] + F_param_m[n, j])
+                - abs(mah) * (F_param_p[n, j] - F_param_m[n, j])
+            )
+        f_param[1, j] += press
+        f_param[2, j] += press * v_interface[j]
+
+    cell_lenght = x_interface[1]
+    coef_stretch = previous_cell_lenght / cell_lenght
+    step = tau / previous_cell_lenght
+    for i in range(1, nodes - 1):
+        # ro_cell может быть срезом q_param[0], поэтому источник
+        # вычисляется до обновления ячейки
+        source = ro_cell[i] * press_cell[i] / eos[4] if powder else 0.0
+        for n in range(variables):
+            flux = f_param[n, i] - f_param[n, i - 1]
+            if n == 3:
+                flux = flux - source * cell_lenght
+            q_param[n, i] = coef_stretch * (q_param[n, i] - step * flux)
+
+    for i in range(nodes):
+        ro = q_param[0, i]
+        v = q_param[1, i] / ro
+        energy = q_param[2, i] / ro - v ** 2 / 2
+        ro_cell[i] = ro
+        v_cell[i] = v
+        energy_cell[i] = energy
+        if powder:
+            zet = q_param[3, i] / ro
+            if zet <= 1:
+                psi = eos[5] * zet * (1 + eos[6] * zet)
+            elif zet <= eos[9]:
+                psi = eos[10] + eos[7] * (zet - 1) * (1 + eos[8] * (zet - 1))
+            else:
+                psi = 1.0
+            zet_cell[i] = zet
+            psi_cell[i] = psi
+            press = (energy - (1 - psi) * eos[1] / (k - 1)) * (k - 1) \
+                / (1 / ro - ((1 - psi) / eos[2] + eos[3] * psi))
+            press_cell[i] = press
+            c_cell[i] = 1 / ro * math.sqrt(
+                k * press / (1 / ro - (1 - psi) / eos[2] - eos[3] * psi))
+        else:
+            press = ro * energy * (k - 1)
+            press_cell[i] = press
+            c_cell[i] = math.sqrt(k * press / ro)
+
+    q_param[0, 0] = q_param[0, 1]
+    q_param[0, -1] = q_param[0, -2]
+    ro_cell[0] = q_param[0, 0]
+    ro_cell[-1] = q_param[0, -1]
+    v_cell[0] = -v_cell[1]
+    q_param[1, 0] = ro_cell[0] * v_cell[0]
+    q_param[1, -1] = q_param[0, -1] \
+        * (2 * v_interface[border_face] - v_cell[-2])
+    for n in range(2, variables):
+        q_param[n, 0] = q_param[n, 1]
+        q_param[n, -1] = q_param[n, -2]
+
+
+if numba is not None:
+    move_grid = numba.njit(cache=True)(_move_grid)
+    update_cells = numba.njit(cache=True)(_update_cells)
+else:
+    move_grid = _move_grid
+    update_cells = _update_cells
@@ -0,0 +1,94 @@
+"""
+profile.py - модуль отвечает за измерение времени этапов
+    шага по времени
+"""
+
+__author__ = 'Anthony Byuraev'
+
+__all__ = ['PhaseProfile', 'Profiler', 'PHASES']
+
+import time
+import typing
+import functools
+
+#: Этапы шага по времени в порядке выполнения. Время этапов включающее:
+#: _move_grid содержит _calculate_tau, _end_vel_x и _new_x_interfaces,
+#: _update_cells - этапы от _velocity_parameters до _get_q,
+#: _get_q - _psi. С бэкендом numba выполняются только
+#: _move_grid и _update_cells
+PHASES = (
+    '_move_grid',
+    '_calculate_tau',
+    '_end_vel_x',
+    '_new_x_interfaces',
+    '_update_cells',
+    '_velocity_parameters',
+    '_get_mah_press_interface',
+    '_get_F',
+    '_get_f',
+    '_get_q',
+    '_psi',
+)
+
+
+class PhaseProfile(typing.NamedTuple):
+    """
+    Суммарное время и количество вызовов этапа шага
+
+    calls: int
+        Количество вызовов
+    time: float
+        Суммарное время вызовов, с
+    """
+    calls: int
+    time:  float
+
+
+class Profiler(object):
+    """
+    Измерение времени этапов шага по времени
+
+    `install` заменяет методы этапов расчета и записи истории
+    обертками с таймером на уровне экземпляра сетки, поэтому код шага
+    не изменяется, а расчеты без профилирования не замедляются.
+    Объект History не изменяется и может использоваться несколькими
+    сетками
+    """
+    def __repr__(self):
+        return f'{self.__class__.__name__}()'
+
+    def __init__(self) -> None:
+        self._calls = {}
+        self._times = {}
+
+    def install(self, grid) -> None:
+        """
+        Установка оберток на этапы расчета `grid` и на запись истории
+        """
+        for name in PHASES:
+            if hasattr(grid, name):
+                setattr(grid, name, self._wrap(name, getattr(grid, name)))
+        grid._record_history = self._wrap('history', grid._record_history)
+
+    def report(self) -> typing.Dict[str, PhaseProfile]:
+        """
+        Время этапов, выполнявшихся хотя бы один раз, в порядке `PHASES`
+        """
+        return {name: PhaseProfile(self._calls[name], self._times[name])
+                for name in PHASES + ('history',) if self._calls.get(name)}
+
+    def _wrap(self, name: str, method: typing.Callable) -> typing.Callable:
+        self._calls.setdefault(name, 0)
+        self._times.setdefault(name, 0.0)
+        calls, times = self._calls, self._times
+        clock = time.perf_counter
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                times[name] += clock() - start
+                calls[name] += 1
+        return timed
@@ -0,0 +1,288 @@
+"""
+reconstruction.py - модуль отвечает за восстановление параметров газа
+    на границах ячеек по схеме MUSCL
+"""
+
+__author__ = 'Anthony Byuraev'
+
+__all__ = [
+    'minmod',
+    'van_leer',
+    'monotonized_central',
+    'LIMITERS',
+    'MUSCL',
+    'get_reconstruction',
+]
+
+import copy
+import typing
+
+import numpy as np
+
+
+def minmod(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Ограничитель minmod: наименьшая по модулю из разностей одного знака
+    """
+    return np.where(a * b > 0, np.sign(a) * np.minimum(np.abs(a), np.abs(b)),
+                    0.0)
+
+
+def van_leer(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Ограничитель van Leer: среднее гармоническое разностей одного знака
+    """
+    product = a * b
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(product > 0, 2 * product / (a + b), 0.0)
+
+
+def monotonized_central(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Ограничитель MC (monotonized central, van Leer, 1977)
+    """
+    return np.where(a * b > 0, np.sign(a) * np.minimum(
+        np.minimum(2 * np.abs(a), 2 * np.abs(b)), np.abs(a + b) / 2), 0.0)
+
+
+LIMITERS = {
+    'minmod': minmod,
+    'vanleer': van_leer,
+    'mc': monotonized_central,
+}
+
+
+class MUSCL(object):
+    """
+    Кусочно-линейное восстановление параметров газа на границах ячеек
+        по схеме MUSCL-Hancock (van Leer, 1979)
+
+    Наклоны плотности, скорости, давления (и относительной толщины
+    сгоревшего слоя пороха для ArtilleryGrid) в ячейках ограничиваются
+    по разностям с соседними ячейками. Сетка в каждый момент времени
+    равномерна, поэтому наклоны не зависят от ее растяжения.
+    Параметры в центрах ячеек переносятся на половину шага
+    по уравнениям Эйлера в системе координат, движущейся со скоростью
+    сетки, без источников от горения пороха. Энергия и скорость звука
+    на границах вычисляются по уравнению состояния сетки, векторы Ф -
+    по восстановленным параметрам
+
+    Для второго порядка на подвижной сетке:
+    - у дна канала и у снаряда соседняя ячейка - зеркальное отражение
+      крайней ячейки относительно стенки, движущейся со скоростью
+      стенки, и в наклонах, и в параметрах за границей;
+    - скорость границ в потоках `w_interface` - средняя на шаге,
+      (x_{n+1} - x_n) / tau, что сохраняет однородное течение
+      на растягивающейся сетке;
+    - потоки через стенки и давление на дно снаряда - решение
+      акустической задачи о поршне для восстановленных параметров
+      крайних ячеек на середине шага
+
+    Источник от горения пороха в ArtilleryGrid вычисляется
+    по параметрам в начале шага, поэтому порядок сходимости
+    артиллерийского расчета по времени остается первым
+
+    Схемы AUSM и AUSM+ не содержат диссипации по давлению в потоке
+    массы, поэтому при малых числах Маха (ArtilleryGrid) давление
+    с восстановлением осциллирует; с ними следует использовать схемы
+    'ausm+up' или 'hllc'
+
+    Parameters
+    ----------
+    limiter: str, optional
+        Ограничитель наклона: 'minmod', 'vanleer' или 'mc'
+    """
+    name = 'muscl'
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.limiter!r})'
+
+    def __init__(self, limiter: str = 'minmod') -> None:
+        if limiter not in LIMITERS:
+            raise ValueError(f'Ограничитель {limiter} не найден. '
+                             f'Доступные ограничители: {", ".join(LIMITERS)}')
+        self.limiter = limiter
+        self._limit = LIMITERS[limiter]
+
+    def allocate(self, grid) -> None:
+        """
+        Буферы параметров на границах: grid.<параметр>_left и _right,
+            скорость границ на шаге grid.w_interface
+        """
+        faces = grid.mah_interface.shape
+        for name in grid._face_fields:
+            setattr(grid, f'{name}_left', np.empty(faces))
+            setattr(grid, f'{name}_right', np.empty(faces))
+        for name in ('c', 'energy'):
+            setattr(grid, f'{name}_left', np.empty(faces))
+            setattr(grid, f'{name}_right', np.empty(faces))
+        grid.w_interface = np.zeros(faces)
+        grid.F_param_m = np.empty((grid.q_param.shape[0],) + faces)
+        grid.F_param_p = np.empty((grid.q_param.shape[0],) + faces)
+
+    def reconstruct(self, grid) -> None:
+        """
+        Параметры газа и векторы Ф слева и справа от каждой границы
+        """
+        tau = np.expand_dims(grid.tau, -1)
+        # средняя скорость границ равномерной сетки на шаге
+        np.multiply(grid._index, (np.expand_dims(grid.x_interface[..., 1]
+                                                 - grid._previous_cell_lenght,
+                                                 -1) / tau),
+                    out=grid.w_interface)
+        wall = grid.w_interface[..., -1]
+        # скорость снаряда в начале шага при постоянном ускорении
+        start_wall = 2 * wall - grid.v_interface[..., -1]
+
+        slopes = {}
+        for name in grid._face_fields:
+            cell = getattr(grid, f'{name}_cell')
+            difference = np.diff(cell, axis=-1)
+            # зеркальные ячейки за стенками
+            if name == 'v':
+                difference[..., 0] = 2 * cell[..., 1]
+                difference[..., -1] = 2 * (start_wall - cell[..., -2])
+            else:
+                difference[..., 0] = 0.0
+                difference[..., -1] = 0.0
+            slopes[name] = self._limit(difference[..., :-1],
+                                       difference[..., 1:])
+
+        centers = self._predict(
+            grid, slopes, tau / (2 * np.expand_dims(
+                grid._previous_cell_lenght, -1)),
+            (grid.w_interface[..., :-1] + grid.w_interface[..., 1:]) / 2,
+            (Ellipsis, slice(1, -1)))
+
+        for name in grid._face_fields:
+            left = getattr(grid, f'{name}_left')
+            right = getattr(grid, f'{name}_right')
+            half_slope = slopes[name] / 2
+            np.add(centers[name], half_slope, out=left[..., 1:])
+            np.subtract(centers[name], half_slope, out=right[..., :-1])
+            # за стенками - зеркальные параметры
+            if name == 'v':
+                np.negative(right[..., 0], out=left[..., 0])
+                np.subtract(2 * wall, left[..., -1], out=right[..., -1])
+            else:
+                left[..., 0] = right[..., 0]
+                right[..., -1] = left[..., -1]
+
+        for side, vector in (('left', grid.F_param_m),
+                             ('right', grid.F_param_p)):
+            grid._face_state(side)
+            ro = getattr(grid, f'ro_{side}')
+            v = getattr(grid, f'v_{side}')
+            press = getattr(grid, f'press_{side}')
+            energy = getattr(grid, f'energy_{side}')
+            np.copyto(vector[0], ro)
+            np.multiply(ro, v, out=vector[1])
+            np.square(v, out=vector[2])
+            vector[2] /= 2
+            vector[2] += energy
+            vector[2] *= ro
+            vector[2] += press
+            if vector.shape[0] > 3:
+                np.multiply(ro, getattr(grid, f'zet_{side}'), out=vector[3])
+
+    def wall_flux(self, grid) -> None:
+        """
+        Потоки через дно канала и дно снаряда
+
+        Через стенку газ не протекает, поток импульса равен давлению
+        на стенке p = p_R + ro c (w - v_R) (у дна канала)
+        или p = p_L + ro c (v_L - w) (у снаряда), поток энергии - p w.
+        Полиномиальное расщепление давления схем AUSM дает на стенке
+        погрешность первого порядка, поэтому потоки заменяются
+        """
+        for face, side, sign in ((0, 'right', -1), (-1, 'left', 1)):
+            wall = grid.w_interface[..., face]
+            press = getattr(grid, f'press_{side}')[..., face] \
+                + sign * getattr(grid, f'ro_{side}')[..., face] \
+                * getattr(grid, f'c_{side}')[..., face] \
+                * (getattr(grid, f'v_{side}')[..., face] - wall)
+            grid.f_param[..., face] = 0.0
+            grid.f_param[1][..., face] = press
+            grid.f_param[2][..., face] = press * wall
+
+    def shell_pressure(self, grid) -> np.ndarray:
+        """
+        Давление на дно снаряда на середине шага
+
+        Параметры крайней ячейки переносятся на половину шага
+        и восстанавливаются на границе со снарядом. Давление находится
+        из акустического соотношения p = p_L + ro c (v_L - v),
+        где скорость снаряда на середине шага v = v_n + p S tau / 2 q
+        """
+        wall = grid.v_interface[..., -1]
+        last = (Ellipsis, slice(-2, -1))
+        previous = (Ellipsis, slice(-3, -2))
+        slopes = {}
+        for name in grid._face_fields:
+            cell = getattr(grid, f'{name}_cell')
+            if name == 'v':
+                slopes[name] = self._limit(
+                    cell[last] - cell[previous],
+                    2 * (np.expand_dims(wall, -1) - cell[last]))
+            else:
+                # разность с зеркальной ячейкой равна нулю
+                slopes[name] = np.zeros(cell[last].shape)
+        centers = self._predict(
+            grid, slopes,
+            np.expand_dims(grid.tau / (2 * grid.x_interface[..., 1]), -1),
+            (grid.v_interface[..., -2:-1] + grid.v_interface[..., -1:]) / 2,
+            last)
+        ro = centers['ro'][..., 0]
+        v = centers['v'][..., 0] + slopes['v'][..., 0] / 2
+        impedance = ro * grid.c_cell[..., -2]
+        return (centers['press'][..., 0] + impedance * (v - wall)) \
+            / (1 + impedance * grid.gun.cs_area * grid.tau
+               / (2 * grid.gun.shell))
+
+    @staticmethod
+    def _predict(grid, slopes: dict, ratio: np.ndarray,
+                 frame: np.ndarray, cells: tuple) -> dict:
+        """
+        Параметры в центрах ячеек `cells` через половину шага
+
+        `ratio` - tau / 2 dx, `frame` - скорость сетки в центрах ячеек
+        """
+        ro, v, press = (getattr(grid, f'{name}_cell')[cells]
+                        for name in ('ro', 'v', 'press'))
+        relative = v - frame
+        centers = {
+            'ro': ro - ratio * (relative * slopes['ro'] + ro * slopes['v']),
+            'v': v - ratio * (relative * slopes['v'] + slopes['press'] / ro),
+            'press': press - ratio * (
+                relative * slopes['press']
+                + ro * grid.c_cell[cells] ** 2 * slopes['v']),
+        }
+        for name in grid._face_fields[3:]:
+            centers[name] = getattr(grid, f'{name}_cell')[cells] \
+                - ratio * relative * slopes[name]
+        return centers
+
+    def config(self) -> dict:
+        return {'name': self.name, 'limiter': self.limiter}
+
+
+def get_reconstruction(reconstruction: typing.Union[None, str, MUSCL]
+                       ) -> typing.Optional[MUSCL]:
+    """
+    Возвращает восстановление параметров на границах
+
+    Parameters
+    ----------
+    reconstruction: None, str or MUSCL
+        None - параметры ячеек постоянны (первый порядок),
+        'minmod', 'vanleer', 'mc' - MUSCL с этим ограничителем
+        или экземпляр MUSCL
+    """
+    if reconstruction is None:
+        return None
+    if isinstance(reconstruction, MUSCL):
+        return copy.copy(reconstruction)
+    if isinstance(reconstruction, str) and reconstruction in LIMITERS:
+        return MUSCL(reconstruction)
+    raise ValueError('Параметр reconstruction должен быть None, '
+                     f'{", ".join(repr(name) for name in LIMITERS)} или MUSCL')
@@ -0,0 +1,185 @@
+"""
+step.py - модуль отвечает за адаптивный выбор числа Куранта
+    и статистику шагов по времени
+"""
+
+__author__ = 'Anthony Byuraev'
+
+__all__ = ['StepController', 'StepStats']
+
+import typing
+
+import numpy as np
+
+from balltic.core.history import History
+
+STEP_NAMES = ('time', 'tau', 'kurant', 'limiting_cell')
+
+
+class StepStats(typing.NamedTuple):
+    """
+    Статистика шагов по времени
+
+    time, tau, kurant: np.ndarray
+        Время, шаг и число Куранта принятых шагов
+    limiting_cell: np.ndarray
+        Номер ячейки, ограничившей шаг
+    rejected_time, rejected_kurant: np.ndarray
+        Время начала и число Куранта отклоненных шагов
+    """
+    time:            np.ndarray
+    tau:             np.ndarray
+    kurant:          np.ndarray
+    limiting_cell:   np.ndarray
+    rejected_time:   np.ndarray
+    rejected_kurant: np.ndarray
+
+    @property
+    def rejected(self) -> int:
+        return self.rejected_time.size
+
+
+class StepController(object):
+    """
+    Адаптивный выбор числа Куранта
+
+    Расчет начинается с числа Куранта орудия `kurant`. Если за шаг
+    давление в ячейках изменилось меньше, чем на половину `tolerance`
+    (относительно максимального давления), число Куранта увеличивается
+    в `growth` раз, но не выше `kurant_max`. Если изменение больше
+    `tolerance`, шаг отклоняется, состояние восстанавливается, и шаг
+    повторяется с числом Куранта, уменьшенным в `shrink` раз, но не ниже
+    числа Куранта орудия. В момент начала движения снаряда число Куранта
+    возвращается к числу Куранта орудия
+
+    Parameters
+    ----------
+    kurant_max: float, optional
+        Наибольшее число Куранта, не больше 1
+    growth: float, optional
+        Множитель увеличения числа Куранта
+    shrink: float, optional
+        Множитель уменьшения числа Куранта при отклонении шага
+    tolerance: float, optional
+        Допустимое относительное изменение давления за шаг
+    record: bool, optional
+        Записывать ли статистику шагов
+    """
+    def __repr__(self):
+        return (f'{self.__class__.__name__}(kurant_max={self.kurant_max}, '
+                f'growth={self.growth}, shrink={self.shrink}, '
+                f'tolerance={self.tolerance})')
+
+    def __init__(self, kurant_max: float = 0.9,
+                 growth: float = 1.05,
+                 shrink: float = 0.5,
+                 tolerance: float = 0.003,
+                 record: bool = True) -> None:
+        if not 0 < kurant_max <= 1:
+            raise ValueError('Параметр kurant_max должен быть в (0, 1]')
+        if growth < 1 or not 0 < shrink < 1:
+            raise ValueError('Параметры growth и shrink должны '
+                             'удовлетворять growth >= 1, 0 < shrink < 1')
+        self.kurant_max = kurant_max
+        self.growth = growth
+        self.shrink = shrink
+        self.tolerance = tolerance
+        self.record = record
+
+    def start(self, grid) -> None:
+        """
+        Подготовка к расчету: буферы состояния сетки и записи статистики
+        """
+        self.kurant_min = grid.gun.kurant
+        self.kurant = grid.gun.kurant
+        self._saved = {name: np.empty_like(getattr(grid, name))
+                       for name in grid._state_fields}
+        self._history = History(scalars_only=not self.record)
+        self._history.start(STEP_NAMES)
+        self._rejected = []
+
+    def save(self, grid) -> None:
+        """
+        Сохранение состояния сетки перед шагом
+        """
+        for name, buffer_ in self._saved.items():
+            np.copyto(buffer_, getattr(grid, name))
+        self._clock = grid._clock
+
+    def restore(self, grid) -> None:
+        """
+        Восстановление состояния сетки после отклоненного шага
+        """
+        for name, buffer_ in self._saved.items():
+            np.copyto(getattr(grid, name), buffer_)
+        grid._clock = self._clock
+
+    def accept(self, grid) -> bool:
+        """
+        Решение о принятии шага и новое число Куранта
+
+        Returns
+        -------
+        accepted: bool
+        """
+        previous = self._saved['press_cell']
+        scale = max(np.max(np.abs(previous)), np.max(np.abs(grid.press_cell)))
+        change = np.max(np.abs(grid.press_cell - previous)) / scale
+        if not np.isfinite(change) or change > self.tolerance:
+            if self.kurant > self.kurant_min:
+                if self.record:
+                    self._rejected.append((self._clock, self.kurant))
+                self.kurant = max(self.kurant * self.shrink, self.kurant_min)
+                return False
+        elif change < self.tolerance / 2:
+            self.kurant = min(self.kurant * self.growth,
+                              max(self.kurant_max, self.kurant_min))
+        return True
+
+    def step(self, grid, kurant: float, limiting_cell: int) -> None:
+        """
+        Запись принятого шага
+        """
+        # начало движения снаряда
+        if self._saved['v_interface'][-1] == 0 and grid.v_interface[-1] != 0:
+            self.kurant = self.kurant_min
+        self._history.record(grid._clock, grid.tau, kurant, limiting_cell)
+
+    def config(self) -> dict:
+        return {'kurant_max': self.kurant_max, 'growth': self.growth,
+                'shrink': self.shrink, 'tolerance': self.tolerance,
+                'record': self.record}
+
+    def dump(self) -> typing.Dict[str, np.ndarray]:
+        """
+        Состояние контроллера в виде массивов
+        """
+        state = {f'history_{name}': value
+                 for name, value in self._history.dump().items()}
+        state['kurant'] = np.array([self.kurant, self.kurant_min])
+        state['rejected'] = np.array(self._rejected,
+                                     dtype=float).reshape(-1, 2)
+        return state
+
+    def load(self, grid, state: typing.Dict[str, np.ndarray]) -> None:
+        """
+        Восстановление состояния, сохраненного `dump`
+        """
+        self.start(grid)
+        self.kurant, self.kurant_min = state['kurant'].tolist()
+        self._rejected = [tuple(row) for row in state['rejected'].tolist()]
+        self._history.load(STEP_NAMES, {
+            name[len('history_'):]: value for name, value in state.items()
+            if name.startswith('history_')})
+
+    def stats(self) -> StepStats:
+        """
+        Статистика шагов расчета
+        """
+        self._history.finish()
+        columns = self._history.arrays()
+        columns['limiting_cell'] = columns['limiting_cell'].astype(int)
+        rejected = np.array(self._rejected, dtype=float).reshape(-1, 2)
+        return StepStats(rejected_time=rejected[:, 0],
+                         rejected_kurant=rejected[:, 1],
+                         **columns)
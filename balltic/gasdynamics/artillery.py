@@ -2,11 +2,23 @@ __author__ = 'Anthony Byuraev'
 
 __all__ = ['ArtilleryGrid']
 
+import copy
 import typing
 
 import numpy as np
 
+from balltic.core import checkpoint as checkpoint_
 from balltic.core.grid import EulerianGrid
+from balltic.core.burning import BurningLaw, TwoStageLaw, get_law
+from balltic.core.flux import FluxScheme, get_scheme
+from balltic.core.cache import SolutionCache
+from balltic.core.checkpoint import Checkpoint
+from balltic.core.diagnostics import Diagnostics
+from balltic.core.events import Event
+from balltic.core.fields import FieldRecorder
+from balltic.core.history import History
+from balltic.core.reconstruction import MUSCL, get_reconstruction
+from balltic.core.step import StepController
 from balltic.core.guns import ArtilleryGun
 from balltic.core.gunpowder import GunPowder
 
@@ -42,10 +54,73 @@ class ArtilleryGrid(EulerianGrid):
     boostp: int or float, optional
         Значение давления форсирования
 
+    history: History, optional
+        Политика записи истории выстрела. По умолчанию записывается каждый шаг
+
+    scheme: str or FluxScheme, optional
+        Схема расчета потоков: 'ausm', 'ausm+', 'ausm+up' или 'hllc'
+
+    burning: str or BurningLaw, optional
+        Закон газообразования: 'formula', 'table' или BurningLaw
+
+    backend: str, optional
+        Бэкенд шага по времени: 'numpy' или 'numba'.
+        Без установленной numba используется 'numpy'
+
+    controller: StepController, optional
+        Адаптивный выбор числа Куранта. По умолчанию число Куранта
+        постоянно. Статистика шагов сохраняется в `step_stats`
+
+    autosave: Checkpoint, optional
+        Периодическая запись контрольных точек во время расчета.
+        Расчет продолжается методом `resume`
+
+    solve: bool, optional
+        Решать ли задачу в конструкторе. Иначе решение выполняется
+        методами `solve` или `iter_steps`
+
+    field_recorder: FieldRecorder, optional
+        Запись полей параметров в ячейках в файлы на диске
+
+    events: sequence of Event, optional
+        События выстрела: ShotStart, PeakPressure, AllBurnt, Crossing.
+        Найденные события и уточненный внутри шага вылет снаряда
+        'muzzle' сохраняются в словаре `events`, время и скорость
+        вылета - в `muzzle_time` и `muzzle_velocity`
+
+    cache: SolutionCache, optional
+        Кэш решений на диске. При наличии решения с теми же исходными
+        данными расчет не выполняется
+
+    profile: bool, optional
+        Измерять ли время этапов шага по времени. Суммарное время
+        и количество вызовов этапов сохраняются в `profile`
+
+    diagnostics: Diagnostics, optional
+        Проверка законов сохранения массы и энергии, положительности
+        плотности и давления, чисел Маха и Куранта на каждом шаге.
+        Итог с нарушенными порогами сохраняется в `quality`
+
+    reconstruction: str or MUSCL, optional
+        Восстановление параметров газа на границах ячеек второго порядка:
+        'minmod', 'vanleer', 'mc' - ограничитель наклона MUSCL.
+        По умолчанию параметры в ячейках постоянны (первый порядок).
+        Используется только со схемами 'ausm+up' и 'hllc', со схемами
+        'ausm' и 'ausm+' давление осциллирует
+
     Returns
     -------
     solution:
     """
+
+    _cell_buffers = 6
+
+    _state_fields = EulerianGrid._state_fields + ('zet_cell', 'psi_cell')
+
+    _face_fields = EulerianGrid._face_fields + ('zet',)
+
+    _field_names = EulerianGrid._field_names + ('zet_cell', 'psi_cell')
+
     def __str__(self):
         return 'ArtilleryGrid Class'
 
@@ -57,7 +132,20 @@ class ArtilleryGrid(EulerianGrid):
                  denload: typing.Union[int, float] = None,
                  barrel: typing.Union[int, float] = None,
                  kurant: typing.Union[int, float] = None,
-                 boostp: typing.Union[int, float] = None) -> None:
+                 boostp: typing.Union[int, float] = None,
+                 history: History = None,
+                 scheme: typing.Union[str, FluxScheme] = 'ausm+',
+                 burning: typing.Union[str, BurningLaw] = 'formula',
+                 backend: str = 'numpy',
+                 controller: StepController = None,
+                 autosave: Checkpoint = None,
+                 solve: bool = True,
+                 field_recorder: FieldRecorder = None,
+                 events: typing.Sequence[Event] = (),
+                 cache: SolutionCache = None,
+                 profile: bool = False,
+                 diagnostics: Diagnostics = None,
+                 reconstruction: typing.Union[str, MUSCL] = None) -> None:
 
         if isinstance(gun, ArtilleryGun):
             self.gun = gun
@@ -77,74 +165,78 @@ class ArtilleryGrid(EulerianGrid):
         if denload is not None:
             self.gun = self.gun._replace(denload=denload)
 
+        self.history = History() if history is None else copy.copy(history)
+        self.scheme = get_scheme(scheme)
+        self.controller = None if controller is None \
+            else copy.copy(controller)
+        self.autosave = autosave
+        self.cache = cache
+        self.diagnostics = None if diagnostics is None \
+            else copy.copy(diagnostics)
+        self.reconstruction = get_reconstruction(reconstruction)
+        if self.reconstruction is not None \
+                and self.scheme.name in ('ausm', 'ausm+'):
+            raise ValueError(f'Со схемой {self.scheme.name} восстановление '
+                             'второго порядка дает осцилляции давления, '
+                             "используйте схему 'ausm+up' или 'hllc'")
+        self.field_recorder = None if field_recorder is None \
+            else copy.copy(field_recorder)
+        self._event_detectors = tuple(copy.copy(event) for event in events)
+        self.burning = get_law(self.gunpowder, burning)
+
+        self._initial_state()
+        self._set_backend(backend)
+        self._set_profile(profile)
+        self.is_solved = False
+        if solve:
+            self._run()
+
+    def _initial_state(self):
+        """
+        Заполнение массивов параметров в начальный момент времени
+        """
         self.omega = self.gun.omega_q * self.gun.shell
         self.gun = self.gun._replace(cs_area=np.pi * self.gun.caliber ** 2 / 4)
         self.gun = self.gun._replace(
             chamber=self.omega / self.gun.denload / self.gun.cs_area)
 
-        self.ro_cell = np.full(self.nodes, self.gun.denload)
-        self.v_cell = np.full(self.nodes, 0.0)
-        self.zet_cell = np.full(self.nodes, 0.0)
-        self.press_cell = np.full(self.nodes, self.gun.press_vsp)
+        self.ro_cell = self._cell_array(self.gun.denload)
+        self.v_cell = self._cell_array(0.0)
+        self.zet_cell = self._cell_array(0.0)
+        self.press_cell = self._cell_array(self.gun.press_vsp)
         self.psi_cell = self._psi()
-        self.energy_cell = np.full(
-            self.nodes,
-            self.press_cell / (self.gunpowder.k - 1)
+        self.energy_cell = \
+            self.press_cell / (self.gunpowder.k - 1) \
             * (1 / self.ro_cell - (
-                (1 - self.psi_cell) / self.gunpowder.ro + self.gunpowder.alpha_k * self.psi_cell))
+                (1 - self.psi_cell) / self.gunpowder.ro + self.gunpowder.alpha_k * self.psi_cell)) \
             + (1 - self.psi_cell) * self.gunpowder.f / (self.gunpowder.k - 1)
-        )
-        self.c_cell = np.full(
-            self.nodes,
-            1 / self.ro_cell
+        self.c_cell = \
+            1 / self.ro_cell \
             * np.sqrt(self.gunpowder.k * self.press_cell
                       / (1 / self.ro_cell - (1 - self.psi_cell) / self.gunpowder.ro - self.gunpowder.alpha_k * self.psi_cell)
                       )
-        )
 
         # для расчета Маха на интерфейсе
-        self.mah_cell_minus = np.full(self.nodes - 1, 0.0)
-        self.mah_cell_plus = np.full(self.nodes - 1, 0.0)
+        self.mah_cell_minus = self._interface_array(0.0)
+        self.mah_cell_plus = self._interface_array(0.0)
 
         # для расчета потока q (Векторы H)
-        self.h_param = np.full(
-            self.nodes,
-            self.ro_cell * self.press_cell / self.gunpowder.I_k
-        )
-
-        # для расчета потока f (Векторы Ф )
-        self.F_param_p = np.array(
-            [
-                np.full(self.nodes - 1, 0.0),
-                np.full(self.nodes - 1, 0.0),
-                np.full(self.nodes - 1, 0.0),
-                np.full(self.nodes - 1, 0.0)
-            ]
-        )
-
-        self.F_param_m = np.array(
-            [
-                np.full(self.nodes - 1, 0.0),
-                np.full(self.nodes - 1, 0.0),
-                np.full(self.nodes - 1, 0.0),
-                np.full(self.nodes - 1, 0.0)
-            ]
-        )
+        self.h_param = self.ro_cell * self.press_cell / self.gunpowder.I_k
 
         # для параметров на границах
-        self.c_interface = np.full(self.nodes - 1, 0.0)
-        self.mah_interface = np.full(self.nodes - 1, 0.0)
-        self.press_interface = np.full(self.nodes - 1, 0.0)
-        self.v_interface = np.full(self.nodes - 1, 0.0)
-        self.x_interface = np.full(self.nodes - 1, 0.0)
+        self.c_interface = self._interface_array(0.0)
+        self.mah_interface = self._interface_array(0.0)
+        self.press_interface = self._interface_array(0.0)
+        self.v_interface = self._interface_array(0.0)
+        self.x_interface = self._interface_array(0.0)
 
         # векторы состояний и потоков
         self.f_param = np.array(
             [
-                np.full(self.nodes - 1, 0.0),
-                self.press_cell[1:],
-                np.full(self.nodes - 1, 0.0),
-                np.full(self.nodes - 1, 0.0)
+                self._interface_array(0.0),
+                self.press_cell[..., 1:],
+                self._interface_array(0.0),
+                self._interface_array(0.0)
             ]
         )
         self.q_param = np.array(
@@ -155,128 +247,108 @@ class ArtilleryGrid(EulerianGrid):
                 self.ro_cell * self.zet_cell
             ]
         )
-        self.is_solved = False
-        return self._run()
-
-    # TODO: Необходимо разобраться с функцией газоприхода
-    # def _psi(self):
-    #     """
-    #     Функция газоприхода
-    #     """
-    #     if_cond = self.zet_cell <= 1
-    #     elif_cond = self.zet_cell <= self.powder.z_k
-    #     else_cond = self.zet_cell > self.powder.z_k
-
-    #     answer = np.zeros_like(self.zet_cell)
-    #     answer[if_cond] = self.powder.k_1 \
-    #         * self.zet_cell[if_cond] \
-    #         * (1 + self.powder.lambda_1 * self.zet_cell[if_cond])
-    #     answer[elif_cond] = self.powder.k_2 \
-    #         * (self.zet_cell[elif_cond] - 1) \
-    #         * (1 + self.powder.lambda_2 * (self.zet_cell[elif_cond] - 1))
-    #     answer[else_cond] = np.ones_like(self.zet_cell[else_cond])
-    #     return answer
+        self._allocate_workspace()
+
+    def _config(self) -> dict:
+        return {
+            'gun': {name: checkpoint_.scalar(value)
+                    for name, value in self.gun._asdict().items()},
+            'gunpowder': {'name': self.gunpowder.name,
+                          'record': dict(self.gunpowder._gunpowder)},
+            'burning': checkpoint_.law_spec(self.burning),
+        }
+
+    def _restore_config(self, config: dict) -> None:
+        self.gun = ArtilleryGun(**config['gun'])
+        self.gunpowder = GunPowder.from_record(**config['gunpowder'])
+        self.burning = checkpoint_.law_from_spec(config['burning'])
 
     def _psi(self):
         """
         Функция газоприхода
         """
-        buf = []
-        for zet in self.zet_cell:
-            if (zet <= 1):
-                buf.append(self.gunpowder.k_1 * zet * (1 + self.gunpowder.lambda_1 * zet))
-            elif (zet <= self.gunpowder.z_k):
-                buf.append(self.gunpowder.k_2 * (zet - 1) * (1 + self.gunpowder.lambda_2 * (zet - 1)))
-            else:
-                buf.append(1.0)
-            # else: buf.append(self.k_2 * (self.z_k - 1) * (1 + self.lambda_2 * (self.z_k - 1)))
-        return np.asarray(buf)
+        return self.burning(self.zet_cell)
+
+    def _jit_parameters(self) -> dict:
+        if type(self.burning) is not TwoStageLaw:
+            raise ValueError('Бэкенд numba поддерживает только '
+                             'двухстадийный закон газообразования')
+        return {
+            'boostp': self.gun.boostp,
+            'eos': np.array([
+                self.gunpowder.k,
+                self.gunpowder.f,
+                self.gunpowder.ro,
+                self.gunpowder.alpha_k,
+                self.gunpowder.I_k,
+                self.burning.k_1,
+                self.burning.lambda_1,
+                self.burning.k_2,
+                self.burning.lambda_2,
+                self.burning.z_end,
+                self.burning.psi_s,
+            ], dtype=float),
+            'border_face': -2,
+            'zet': self.zet_cell,
+            'psi': self.psi_cell,
+        }
 
     def _get_q(self):
-        self.h_param = self.ro_cell * self.press_cell / self.gunpowder.I_k
-        coef_stretch = self._previous_cell_lenght / self.x_interface[1]
-        self.q_param[0][1:-1] = coef_stretch * (
-            self.q_param[0][1:-1]
-            - self.tau / self._previous_cell_lenght
-            * (self.f_param[0][1:] - self.f_param[0][:-1])
-        )
-        self.q_param[1][1:-1] = coef_stretch * (
-            self.q_param[1][1:-1]
-            - self.tau / self._previous_cell_lenght
-            * (self.f_param[1][1:] - self.f_param[1][:-1])
-        )
-        self.q_param[2][1:-1] = coef_stretch * (
-            self.q_param[2][1:-1]
-            - self.tau / self._previous_cell_lenght
-            * (self.f_param[2][1:] - self.f_param[2][:-1])
-        )
-        self.q_param[3][1:-1] = coef_stretch * (
-            self.q_param[3][1:-1]
-            - self.tau / self._previous_cell_lenght
-            * (
-                self.f_param[3][1:] - self.f_param[3][:-1]
-                - self.h_param[1:-1] * self.x_interface[1]
-            )
-        )
-
-        self.ro_cell = self.q_param[0]
-        self.v_cell = self.q_param[1] / self.q_param[0]
-        self.energy_cell = self.q_param[2] / self.q_param[0] - self.v_cell ** 2 / 2
-        self.zet_cell = self.q_param[3] / self.q_param[0]
-        self.psi_cell = self._psi()
-        self.press_cell = \
-            (self.energy_cell - (1 - self.psi_cell) * self.gunpowder.f / (self.gunpowder.k - 1)) \
-            * (self.gunpowder.k - 1) \
-            / (1 / self.ro_cell - ((1 - self.psi_cell) / self.gunpowder.ro + self.gunpowder.alpha_k * self.psi_cell))
-        self.c_cell = 1 / self.ro_cell \
-            * np.sqrt(self.gunpowder.k * self.press_cell / (1 / self.ro_cell - (1 - self.psi_cell) / self.gunpowder.ro - self.gunpowder.alpha_k * self.psi_cell))
+        np.multiply(self.ro_cell, self.press_cell, out=self.h_param)
+        self.h_param /= self.gunpowder.I_k
+        self._update_q(self.h_param)
+
+        # ro_cell - срез q_param[0], остальные параметры обновляются на месте
+        buffer_ = self._cell_work
+        np.divide(self.q_param[1], self.q_param[0], out=self.v_cell)
+        np.square(self.v_cell, out=buffer_[0])
+        buffer_[0] /= 2
+        np.divide(self.q_param[2], self.q_param[0], out=self.energy_cell)
+        self.energy_cell -= buffer_[0]
+        np.divide(self.q_param[3], self.q_param[0], out=self.zet_cell)
+        self.psi_cell[...] = self._psi()
+
+        k = self.gunpowder.k
+        np.subtract(1, self.psi_cell, out=buffer_[0])
+        np.divide(buffer_[0], self.gunpowder.ro, out=buffer_[1])
+        np.multiply(self.gunpowder.alpha_k, self.psi_cell, out=buffer_[2])
+        np.divide(1, self.ro_cell, out=buffer_[3])
+
+        np.multiply(buffer_[0], self.gunpowder.f, out=buffer_[4])
+        buffer_[4] /= k - 1
+        np.subtract(self.energy_cell, buffer_[4], out=buffer_[4])
+        buffer_[4] *= k - 1
+        np.add(buffer_[1], buffer_[2], out=buffer_[5])
+        np.subtract(buffer_[3], buffer_[5], out=buffer_[5])
+        np.divide(buffer_[4], buffer_[5], out=self.press_cell)
+
+        np.subtract(buffer_[3], buffer_[1], out=buffer_[5])
+        buffer_[5] -= buffer_[2]
+        np.multiply(k, self.press_cell, out=buffer_[4])
+        buffer_[4] /= buffer_[5]
+        np.sqrt(buffer_[4], out=buffer_[4])
+        np.multiply(buffer_[3], buffer_[4], out=self.c_cell)
         self._border()
 
-    def _get_f(self):
-        self.f_param[0] = self.c_interface / 2 * (
-            self.mah_interface
-            * (self.F_param_p[0] + self.F_param_m[0])
-            - abs(self.mah_interface)
-            * (self.F_param_p[0] - self.F_param_m[0])
-        )
-        self.f_param[1] = self.c_interface / 2 * (
-            self.mah_interface
-            * (self.F_param_p[1] + self.F_param_m[1])
-            - abs(self.mah_interface)
-            * (self.F_param_p[1] - self.F_param_m[1])
-        ) + self.press_interface
-        self.f_param[2] = self.c_interface / 2 * (
-            self.mah_interface
-            * (self.F_param_p[2] + self.F_param_m[2])
-            - abs(self.mah_interface)
-            * (self.F_param_p[2] - self.F_param_m[2])
-        ) + self.press_interface * self.v_interface
-        self.f_param[3] = self.c_interface / 2 * (
-            self.mah_interface
-            * (self.F_param_p[3] + self.F_param_m[3])
-            - abs(self.mah_interface)
-            * (self.F_param_p[3] - self.F_param_m[3])
-        )
-
-    def _get_F_mines(self):
-        self.F_param_m[0] = self.ro_cell[:-1]
-        self.F_param_m[1] = self.ro_cell[:-1] * self.v_cell[:-1]
-        self.F_param_m[2] = self.ro_cell[:-1] * (
-            self.energy_cell[:-1]
-            + self.v_cell[:-1] ** 2 / 2
-            + self.press_cell[:-1] / self.ro_cell[:-1]
-        )
-        self.F_param_m[3] = self.ro_cell[:-1] * self.zet_cell[:-1]
-
-    def _get_F_plus(self):
-        self.F_param_p[0] = self.ro_cell[1:]
-        self.F_param_p[1] = self.ro_cell[1:] * self.v_cell[1:]
-        self.F_param_p[2] = self.ro_cell[1:] * (
-            self.energy_cell[1:]
-            + self.v_cell[1:] ** 2 / 2
-            + self.press_cell[1:] / self.ro_cell[1:]
-        )
-        self.F_param_p[3] = self.ro_cell[1:] * self.zet_cell[1:]
+    def _face_state(self, side: str) -> None:
+        ro = getattr(self, f'ro_{side}')
+        press = getattr(self, f'press_{side}')
+        psi = self.burning(getattr(self, f'zet_{side}'))
+        k = self.gunpowder.k
+        covolume = 1 / ro - (1 - psi) / self.gunpowder.ro \
+            - self.gunpowder.alpha_k * psi
+        energy = getattr(self, f'energy_{side}')
+        np.multiply(press, covolume, out=energy)
+        energy += (1 - psi) * self.gunpowder.f
+        energy /= k - 1
+        sound = getattr(self, f'c_{side}')
+        np.divide(k * press, covolume, out=sound)
+        np.sqrt(sound, out=sound)
+        sound /= ro
+
+    def _get_F(self):
+        super()._get_F()
+        np.multiply(self.ro_cell, self.zet_cell, out=self._F_cell[3])
 
     def _border(self):
         """
@@ -286,19 +358,19 @@ class ArtilleryGrid(EulerianGrid):
         а также скорость газа в первой ячейке, чтобы выполнялись граничные условия
         """
 
-        self.q_param[0][0] = self.q_param[0][1]
-        self.q_param[0][-1] = self.q_param[0][-2]
+        self.q_param[0][..., 0] = self.q_param[0][..., 1]
+        self.q_param[0][..., -1] = self.q_param[0][..., -2]
 
-        self.v_cell[0] = -self.v_cell[1]
-        self.q_param[1][0] = self.ro_cell[0] * self.v_cell[0]
-        self.q_param[1][-1] = self.q_param[0][-1] \
-            * (2 * self.v_interface[-2] - self.v_cell[-2])
+        self.v_cell[..., 0] = -self.v_cell[..., 1]
+        self.q_param[1][..., 0] = self.ro_cell[..., 0] * self.v_cell[..., 0]
+        self.q_param[1][..., -1] = self.q_param[0][..., -1] \
+            * (2 * self.v_interface[..., -2] - self.v_cell[..., -2])
 
-        self.q_param[2][0] = self.q_param[2][1]
-        self.q_param[2][-1] = self.q_param[2][-2]
+        self.q_param[2][..., 0] = self.q_param[2][..., 1]
+        self.q_param[2][..., -1] = self.q_param[2][..., -2]
 
-        self.q_param[3][0] = self.q_param[3][1]
-        self.q_param[3][-1] = self.q_param[3][-2]
+        self.q_param[3][..., 0] = self.q_param[3][..., 1]
+        self.q_param[3][..., -1] = self.q_param[3][..., -2]
 
     def _end_vel_x(self):
         """
@@ -307,11 +379,11 @@ class ArtilleryGrid(EulerianGrid):
             то [0] = 0, [1] = const
         """
 
-        if self.press_cell[-2] < self.gun.boostp:
-            return 0, self.x_interface[-1]
-        else:
-            acceleration = self.press_cell[-2] * self.gun.cs_area / self.gun.shell
-            velocity = self.v_interface[-1] + acceleration * self.tau
-            x = self.x_interface[-1] + self.v_interface[-1] * self.tau \
-                                     + acceleration * self.tau ** 2 / 2
-            return velocity, x
+        press = self._shell_pressure()
+        acceleration = press * self.gun.cs_area / self.gun.shell
+        velocity = self.v_interface[..., -1] + acceleration * self.tau
+        x = self.x_interface[..., -1] + self.v_interface[..., -1] * self.tau \
+                                      + acceleration * self.tau ** 2 / 2
+        not_boosted = press < self.gun.boostp
+        return (np.where(not_boosted, 0.0, velocity),
+                np.where(not_boosted, self.x_interface[..., -1], x))
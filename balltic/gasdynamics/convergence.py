@@ -0,0 +1,190 @@
+"""
+convergence.py - модуль отвечает за исследование сходимости
+    газодинамических решений по сетке
+"""
+
+__author__ = 'Anthony Byuraev'
+
+__all__ = ['convergence', 'ConvergenceResult']
+
+import math
+import typing
+
+import numpy as np
+
+from balltic.core.gas import Gas
+from balltic.core.guns import ArtilleryGun, PneumaticGun
+from balltic.gasdynamics.sweep import sweep
+
+QUANTITIES = (
+    'muzzle_velocity',
+    'muzzle_time',
+    'max_shell_pressure',
+    'max_stem_pressure',
+)
+
+
+class ConvergenceResult(typing.NamedTuple):
+    """
+    Результаты исследования сходимости
+
+    nodes: np.ndarray
+        Количество узлов сеток по возрастанию
+    steps: np.ndarray
+        Количество шагов по времени на каждой сетке
+    values: dict
+        Значения величин на каждой сетке
+    order: dict
+        Наблюдаемый порядок сходимости по трем самым подробным сеткам
+    extrapolated: dict
+        Значения, экстраполированные по Ричардсону
+    error: dict
+        Оценка относительной погрешности величин на каждой сетке
+    recommended: int
+        Наименьшее количество узлов, при котором погрешность всех величин
+        не превышает `tolerance`. Если ни одна сетка не удовлетворяет
+        условию, количество узлов оценивается по наблюдаемому порядку.
+        None без `tolerance`
+    """
+    nodes:        np.ndarray
+    steps:        np.ndarray
+    values:       typing.Dict[str, np.ndarray]
+    order:        typing.Dict[str, float]
+    extrapolated: typing.Dict[str, float]
+    error:        typing.Dict[str, np.ndarray]
+    recommended:  int = None
+
+
+def convergence(gun: typing.Union[ArtilleryGun, PneumaticGun],
+                medium: typing.Union[str, Gas],
+                nodes: typing.Sequence[int] = (50, 100, 200, 400),
+                tolerance: float = None,
+                quantities: typing.Sequence[str] = ('muzzle_velocity',
+                                                    'max_stem_pressure'),
+                executor: str = 'process',
+                workers: int = None,
+                **params) -> ConvergenceResult:
+    """
+    Решает задачу на последовательности сеток и оценивает погрешность
+
+    Сетки решаются параллельно через `sweep`, каждая сетка - отдельная
+    задача. Наблюдаемый порядок и экстраполированные значения вычисляются
+    по трем самым подробным сеткам (Celik et al., 2008), размер ячейки
+    считается обратно пропорциональным количеству внутренних ячеек
+
+    Parameters
+    ----------
+    gun: ArtilleryGun or PneumaticGun
+        Орудие
+    medium: str or Gas
+        Название пороха для ArtilleryGun или легкий газ для PneumaticGun
+    nodes: sequence of int, optional
+        Количество узлов сеток, не меньше трех сеток
+    tolerance: float, optional
+        Допустимая относительная погрешность
+    quantities: sequence of str, optional
+        Величины: muzzle_velocity, muzzle_time, max_shell_pressure,
+        max_stem_pressure
+    executor, workers: optional
+        Параметры `sweep`
+    params: scalar, optional
+        Параметры орудия, общие для всех сеток (omega_q, barrel и др.)
+
+    Returns
+    -------
+    result: ConvergenceResult
+    """
+    nodes = np.unique(np.asarray(nodes, dtype=int))
+    if nodes.size < 3:
+        raise ValueError('Для оценки сходимости нужно не меньше трех сеток')
+    for name in quantities:
+        if name not in QUANTITIES:
+            raise ValueError(f'Величина {name} не поддерживается')
+    for name, value in params.items():
+        if np.ndim(value) != 0:
+            raise ValueError(f'Параметр {name} должен быть скаляром')
+
+    result = sweep(gun, medium, executor=executor, workers=workers,
+                   chunksize=1, history=False, nodes=nodes, **params)
+    order = np.argsort(result.parameters['nodes'])
+    values = {name: getattr(result, name)[order] for name in quantities}
+
+    # размер ячейки от самой подробной сетки к самой грубой
+    cells = (nodes - 2)[::-1][:3]
+    ratio_21, ratio_32 = cells[0] / cells[1], cells[1] / cells[2]
+    orders, extrapolated, error = {}, {}, {}
+    for name, value in values.items():
+        fine, middle, coarse = value[::-1][:3]
+        order_ = _observed_order(fine, middle, coarse, ratio_21, ratio_32)
+        orders[name] = order_
+        if math.isfinite(order_) and order_ > 0:
+            extrapolated[name] = float((ratio_21 ** order_ * fine - middle)
+                                       / (ratio_21 ** order_ - 1))
+        else:
+            extrapolated[name] = float(fine)
+        error[name] = np.abs(value - extrapolated[name]) \
+            / abs(extrapolated[name])
+
+    recommended = None
+    if tolerance is not None:
+        worst = np.max([error[name] for name in quantities], axis=0)
+        passed = np.flatnonzero(worst <= tolerance)
+        if passed.size:
+            recommended = int(nodes[passed[0]])
+        else:
+            recommended = _estimate_nodes(nodes[-1], tolerance, [
+                (error[name][-1], orders[name]) for name in quantities])
+
+    return ConvergenceResult(
+        nodes=nodes,
+        steps=result.steps[order],
+        values=values,
+        order=orders,
+        extrapolated=extrapolated,
+        error=error,
+        recommended=recommended,
+    )
+
+
+def _observed_order(fine: float, medium: float, coarse: float,
+                    ratio_21: float, ratio_32: float) -> float:
+    """
+    Наблюдаемый порядок сходимости для неравномерного сгущения сеток
+
+    Решение уравнения p = |ln|e32 / e21| + q(p)| / ln r21,
+        q(p) = ln((r21^p - s) / (r32^p - s)) методом простой итерации
+    """
+    eps_21 = medium - fine
+    eps_32 = coarse - medium
+    if eps_21 == 0 or eps_32 == 0 or not math.isfinite(eps_32 / eps_21):
+        return math.nan
+    sign = math.copysign(1.0, eps_32 / eps_21)
+    log_ratio = math.log(abs(eps_32 / eps_21))
+    order = abs(log_ratio) / math.log(ratio_21)
+    for _ in range(100):
+        try:
+            shift = math.log((ratio_21 ** order - sign)
+                             / (ratio_32 ** order - sign))
+        except (ValueError, ZeroDivisionError):
+            return math.nan
+        new_order = abs(log_ratio + shift) / math.log(ratio_21)
+        if abs(new_order - order) < 1e-10:
+            return new_order
+        order = new_order
+    return order
+
+
+def _estimate_nodes(finest: int, tolerance: float,
+                    errors: typing.Sequence[typing.Tuple[float, float]]) -> int:
+    """
+    Оценка количества узлов по погрешности на самой подробной сетке
+        и наблюдаемому порядку: e(h) = e_1 (h / h_1)^p
+    """
+    cells = finest - 2
+    for error, order in errors:
+        if error <= tolerance:
+            continue
+        if not math.isfinite(order) or order <= 0:
+            return None
+        cells = max(cells, (finest - 2) * (error / tolerance) ** (1 / order))
+    return int(math.ceil(cells)) + 2
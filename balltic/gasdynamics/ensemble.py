@@ -0,0 +1,171 @@
+"""
+ensemble.py - модуль отвечает за пакетные решения основной задачи
+    внутренней баллистики для ансамблей орудий
+"""
+
+__author__ = 'Anthony Byuraev'
+
+__all__ = ['ArtilleryEnsemble', 'PneumaticEnsemble']
+
+import copy
+import typing
+
+from balltic.core.gas import Gas
+from balltic.core.burning import BurningLaw, get_law
+from balltic.core.flux import FluxScheme, get_scheme
+from balltic.core.fields import FieldRecorder
+from balltic.core.history import History
+from balltic.core.ensemble import EulerianEnsemble, stack_guns
+from balltic.core.guns import ArtilleryGun, PneumaticGun
+from balltic.core.gunpowder import GunPowder
+from balltic.gasdynamics.artillery import ArtilleryGrid
+from balltic.gasdynamics.pneumatic import PneumaticGrid
+
+ArrayLike = typing.Union[int, float, typing.Sequence[float]]
+
+
+class ArtilleryEnsemble(EulerianEnsemble, ArtilleryGrid):
+    """
+    Класс - пакетное решение основной задачи внутренней баллистики
+        в газодинамической постановке для ансамбля артиллерийских орудий
+
+    Parameters
+    ----------
+    gun: ArtilleryGun or sequence of ArtilleryGun
+        Орудие или последовательность орудий ансамбля
+
+    gunpowder: str
+        Название пороха, общего для всего ансамбля
+
+    nodes: int
+        Количество узлов (интерфейсов) сетки, общее для всего ансамбля
+
+    omega_q, denload, barrel, kurant, boostp: array_like, optional
+        Значения параметров для каждого орудия ансамбля
+
+    history: History, optional
+        Политика записи истории выстрела
+
+    scheme: str or FluxScheme, optional
+        Схема расчета потоков: 'ausm', 'ausm+', 'ausm+up' или 'hllc'
+
+    burning: str or BurningLaw, optional
+        Закон газообразования: 'formula', 'table' или BurningLaw
+
+    field_recorder: FieldRecorder, optional
+        Запись полей параметров в ячейках в файлы на диске,
+        записи формы (N, ...)
+
+    Returns
+    -------
+    solution:
+        Истории в массивах формы (записи, N), а также
+        `muzzle_velocity`, `muzzle_time`, `max_shell_pressure`,
+        `max_stem_pressure`, `steps`, `failed` формы (N,).
+        Методы `iter_steps` и `checkpoint` не поддерживаются
+        и вызывают TypeError
+    """
+
+    _member_fields = EulerianEnsemble._member_fields + (
+        'zet_cell',
+        'psi_cell',
+        'h_param',
+    )
+
+    def __str__(self):
+        return 'ArtilleryEnsemble Class'
+
+    def __init__(self, gun, gunpowder: str, nodes: int = 100,
+                 omega_q: ArrayLike = None,
+                 denload: ArrayLike = None,
+                 barrel: ArrayLike = None,
+                 kurant: ArrayLike = None,
+                 boostp: ArrayLike = None,
+                 history: History = None,
+                 scheme: typing.Union[str, FluxScheme] = 'ausm+',
+                 burning: typing.Union[str, BurningLaw] = 'formula',
+                 field_recorder: FieldRecorder = None) -> None:
+
+        self.gun = stack_guns(gun, ArtilleryGun,
+                              omega_q=omega_q, denload=denload,
+                              barrel=barrel, kurant=kurant, boostp=boostp)
+        self.gunpowder = GunPowder(gunpowder)
+        self.nodes = nodes
+        self.history = History() if history is None else copy.copy(history)
+        self.scheme = get_scheme(scheme)
+        self.field_recorder = None if field_recorder is None \
+            else copy.copy(field_recorder)
+        self.burning = get_law(self.gunpowder, burning)
+
+        self._initial_state()
+        self.is_solved = False
+        return self._run()
+
+
+class PneumaticEnsemble(EulerianEnsemble, PneumaticGrid):
+    """
+    Класс - пакетное решение основной задачи внутренней баллистики
+        в газодинамической постановке для ансамбля пневматических орудий
+
+    Parameters
+    ----------
+    gun: PneumaticGun or sequence of PneumaticGun
+        Орудие или последовательность орудий ансамбля
+
+    gas: Gas
+        Именованный кортеж параметров легкого газа, общего для ансамбля
+
+    nodes: int
+        Количество узлов (интерфейсов) сетки, общее для всего ансамбля
+
+    initialp, chamber, barrel, kurant: array_like, optional
+        Значения параметров для каждого орудия ансамбля
+
+    history: History, optional
+        Политика записи истории выстрела
+
+    scheme: str or FluxScheme, optional
+        Схема расчета потоков: 'ausm', 'ausm+', 'ausm+up' или 'hllc'
+
+    field_recorder: FieldRecorder, optional
+        Запись полей параметров в ячейках в файлы на диске,
+        записи формы (N, ...)
+
+    Returns
+    -------
+    solution:
+        Истории в массивах формы (записи, N), а также
+        `muzzle_velocity`, `muzzle_time`, `max_shell_pressure`,
+        `max_stem_pressure`, `steps`, `failed` формы (N,).
+        Методы `iter_steps` и `checkpoint` не поддерживаются
+        и вызывают TypeError
+    """
+
+    def __str__(self):
+        return 'Обьект класса PneumaticEnsemble'
+
+    def __init__(self, gun, gas: Gas, nodes: int = 100,
+                 initialp: ArrayLike = None,
+                 chamber: ArrayLike = None,
+                 barrel: ArrayLike = None,
+                 kurant: ArrayLike = None,
+                 history: History = None,
+                 scheme: typing.Union[str, FluxScheme] = 'ausm+',
+                 field_recorder: FieldRecorder = None) -> None:
+
+        if isinstance(gas, Gas):
+            self.gas = gas
+        else:
+            raise ValueError('Параметр gas должен быть Gas')
+        self.gun = stack_guns(gun, PneumaticGun,
+                              initialp=initialp, chamber=chamber,
+                              barrel=barrel, kurant=kurant)
+        self.nodes = nodes
+        self.history = History() if history is None else copy.copy(history)
+        self.scheme = get_scheme(scheme)
+        self.field_recorder = None if field_recorder is None \
+            else copy.copy(field_recorder)
+
+        self._initial_state()
+        self.is_solved = False
+        return self._run()
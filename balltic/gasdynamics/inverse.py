@@ -0,0 +1,312 @@
+"""
+inverse.py - модуль отвечает за обратную задачу: подбор параметра заряжания
+    по заданной дульной скорости
+"""
+
+__author__ = 'Anthony Byuraev'
+
+__all__ = ['inverse', 'InverseResult']
+
+import math
+import typing
+
+import numpy as np
+
+from balltic.core.gas import Gas
+from balltic.core.guns import ArtilleryGun, PneumaticGun
+from balltic.gasdynamics.sweep import SWEEP_KEYS, sweep
+
+INVERSE_KEYS = {
+    ArtilleryGun: ('omega_q', 'denload', 'barrel', 'boostp'),
+    PneumaticGun: ('initialp', 'chamber', 'barrel'),
+}
+
+
+class InverseResult(typing.NamedTuple):
+    """
+    Результаты решения обратной задачи
+
+    value: float
+        Найденное значение параметра
+    muzzle_velocity: float
+        Дульная скорость прямого расчета со значением `value`
+    converged: bool
+        Достигнута ли заданная точность по скорости
+    solves: int
+        Количество прямых расчетов в этом вызове
+    rounds: int
+        Количество раундов параллельных расчетов
+    bracket: tuple
+        Наименьший найденный интервал, содержащий решение, или None
+    slope: float
+        Оценка производной дульной скорости по параметру
+    parameters, velocities: np.ndarray
+        Все вычисленные значения параметра и дульной скорости
+    problem: tuple
+        Описание задачи для повторного использования вычислений
+    """
+    value:           float
+    muzzle_velocity: float
+    converged:       bool
+    solves:          int
+    rounds:          int
+    bracket:         typing.Tuple[float, float]
+    slope:           float
+    parameters:      np.ndarray
+    velocities:      np.ndarray
+    problem:         tuple = None
+
+
+def inverse(gun: typing.Union[ArtilleryGun, PneumaticGun],
+            medium: typing.Union[str, Gas],
+            target: float,
+            parameter: str = 'omega_q',
+            guess: typing.Union[float, InverseResult] = None,
+            bracket: typing.Tuple[float, float] = None,
+            tolerance: float = 1e-3,
+            probes: int = 4,
+            max_solves: int = 40,
+            executor: str = 'process',
+            workers: int = None,
+            nodes: int = 100,
+            **params) -> InverseResult:
+    """
+    Подбирает значение параметра, при котором дульная скорость
+        равна `target` с относительной точностью `tolerance`
+
+    В каждом раунде `probes` прямых расчетов решаются параллельно
+    через `sweep`. Пока решение не заключено в интервал, расчеты
+    выполняются вокруг оценки по секущей с расширением шага. После
+    этого оценка уточняется обратной интерполяцией по ближайшим
+    к решению расчетам, а остальные расчеты раунда окружают оценку
+    внутри интервала, поэтому интервал сужается в каждом раунде.
+    Все вычисленные значения используются в следующих раундах
+
+    Parameters
+    ----------
+    gun: ArtilleryGun or PneumaticGun
+        Орудие
+    medium: str or Gas
+        Название пороха для ArtilleryGun или легкий газ для PneumaticGun
+    target: float
+        Требуемая дульная скорость
+    parameter: str, optional
+        Подбираемый параметр: omega_q, denload, barrel, boostp -
+        для ArtilleryGun, initialp, chamber, barrel - для PneumaticGun
+    guess: float or InverseResult, optional
+        Начальное приближение, по умолчанию - значение параметра орудия.
+        Решение соседней задачи задает начальное приближение и наклон;
+        решение той же задачи для другой скорости передает также
+        все вычисленные расчеты
+    bracket: tuple of float, optional
+        Интервал, в котором ищется решение
+    tolerance: float, optional
+        Допустимая относительная погрешность дульной скорости
+    probes: int, optional
+        Количество параллельных расчетов в раунде
+    max_solves: int, optional
+        Наибольшее количество прямых расчетов
+    executor, workers: optional
+        Параметры `sweep`
+    nodes: int, optional
+        Количество узлов сетки
+    params: scalar, optional
+        Остальные параметры орудия (kurant, boostp и др.)
+
+    Returns
+    -------
+    result: InverseResult
+    """
+    kind = type(gun)
+    if kind not in INVERSE_KEYS:
+        raise ValueError('Параметр gun должен быть ArtilleryGun или PneumaticGun')
+    if parameter not in INVERSE_KEYS[kind]:
+        raise ValueError(f'Параметр {parameter} не поддерживается')
+    for name, value in params.items():
+        if name not in SWEEP_KEYS[kind] or name in (parameter, 'nodes'):
+            raise ValueError(f'Параметр {name} не поддерживается')
+        if np.ndim(value) != 0:
+            raise ValueError(f'Параметр {name} должен быть скаляром')
+    if probes < 1:
+        raise ValueError('Параметр probes должен быть натуральным числом')
+
+    problem = (gun, medium, parameter, int(nodes),
+               tuple(sorted(params.items())))
+    xs, vs = np.empty(0), np.empty(0)
+    slope = None
+    if isinstance(guess, InverseResult):
+        if guess.problem == problem:
+            xs, vs = guess.parameters, guess.velocities
+        slope = guess.slope
+        guess = guess.value
+    if guess is None:
+        guess = getattr(gun, parameter)
+    if guess is None and bracket is None:
+        raise ValueError('Необходимо задать guess или bracket')
+
+    solves = rounds = 0
+    while True:
+        best = _best(xs, vs, target)
+        if best is not None and abs(vs[best] - target) <= tolerance * target:
+            break
+        if solves >= max_solves:
+            break
+        if not xs.size and bracket is not None:
+            candidates = np.linspace(bracket[0], bracket[1], max(probes, 2))
+        else:
+            candidates = _candidates(xs, vs, target, guess, slope, probes)
+        candidates = candidates[~np.isclose(
+            candidates[:, np.newaxis], xs, rtol=1e-12, atol=0).any(axis=1)]
+        candidates = candidates[:max_solves - solves]
+        if not candidates.size:
+            break
+
+        result = sweep(gun, medium, executor=executor, workers=workers,
+                       chunksize=1, history=False, nodes=nodes,
+                       **{parameter: candidates}, **params)
+        velocities = np.where(result.failed, np.nan, result.muzzle_velocity)
+        order = np.argsort(np.concatenate([xs, candidates]))
+        xs = np.concatenate([xs, candidates])[order]
+        vs = np.concatenate([vs, velocities])[order]
+        solves += candidates.size
+        rounds += 1
+
+    best = _best(xs, vs, target)
+    if best is None:
+        raise ValueError('Ни один прямой расчет не завершился успешно')
+    pair = _bracket(xs, vs, target)
+    return InverseResult(
+        value=float(xs[best]),
+        muzzle_velocity=float(vs[best]),
+        converged=bool(abs(vs[best] - target) <= tolerance * target),
+        solves=solves,
+        rounds=rounds,
+        bracket=None if pair is None else tuple(xs[list(pair)].tolist()),
+        slope=_slope(xs, vs, target, slope),
+        parameters=xs,
+        velocities=vs,
+        problem=problem,
+    )
+
+
+def _best(xs: np.ndarray, vs: np.ndarray, target: float) -> int:
+    """
+    Номер расчета с наименьшей невязкой скорости
+    """
+    residual = np.abs(vs - target)
+    if not np.isfinite(residual).any():
+        return None
+    return int(np.nanargmin(residual))
+
+
+def _bracket(xs: np.ndarray, vs: np.ndarray, target: float) -> tuple:
+    """
+    Соседние расчеты, между которыми невязка меняет знак,
+        ближайшие к расчету с наименьшей невязкой
+    """
+    finite = np.flatnonzero(np.isfinite(vs))
+    sign = np.sign(vs[finite] - target)
+    changes = np.flatnonzero(sign[:-1] * sign[1:] < 0)
+    if not changes.size:
+        return None
+    best = _best(xs, vs, target)
+    nearest = changes[np.argmin(np.abs(xs[finite[changes]] - xs[best]))]
+    return finite[nearest], finite[nearest + 1]
+
+
+def _slope(xs: np.ndarray, vs: np.ndarray, target: float,
+           default: float = None) -> float:
+    """
+    Оценка производной скорости по параметру по двум расчетам,
+        ближайшим к решению
+    """
+    finite = np.flatnonzero(np.isfinite(vs))
+    if finite.size < 2:
+        return default
+    pair = _bracket(xs, vs, target)
+    if pair is None:
+        pair = finite[np.argsort(np.abs(vs[finite] - target))[:2]]
+    i, j = pair
+    if xs[i] == xs[j]:
+        return default
+    return float((vs[j] - vs[i]) / (xs[j] - xs[i]))
+
+
+def _offsets(probes: int) -> np.ndarray:
+    """
+    Смещения расчетов раунда относительно оценки в долях радиуса:
+        0, -1, 1, -2, 2, ...
+    """
+    steps = np.arange(1, probes) // 2 + 1
+    signs = np.where(np.arange(1, probes) % 2, -1.0, 1.0)
+    offsets = np.concatenate([[0.0], signs * steps])
+    return offsets / max(1, steps.max(initial=1))
+
+
+def _candidates(xs: np.ndarray, vs: np.ndarray, target: float,
+                guess: float, slope: float, probes: int) -> np.ndarray:
+    """
+    Значения параметра для следующего раунда расчетов
+    """
+    finite = np.flatnonzero(np.isfinite(vs))
+    if not finite.size:
+        radius = (0.05 if slope is not None else 0.2) * abs(guess)
+        return _positive(guess + radius * _offsets(probes))
+
+    pair = _bracket(xs, vs, target)
+    best = _best(xs, vs, target)
+    if pair is not None:
+        low, high = xs[list(pair)]
+        estimate = _interpolate(xs[finite], vs[finite], target, pair, finite)
+        radius = min((high - low) / 2,
+                     max(abs(xs[best] - estimate), (high - low) * 1e-3))
+        candidates = estimate + radius * _offsets(probes)
+        return candidates[(candidates > low) & (candidates < high)]
+
+    # решение не заключено в интервал: шаг по секущей
+    slope = _slope(xs, vs, target, slope)
+    x_best, residual = xs[best], vs[best] - target
+    if slope is None or slope == 0 or not math.isfinite(slope):
+        direction = -1.0 if residual > 0 else 1.0
+        estimate = x_best * (1 + 0.2 * direction)
+    else:
+        estimate = x_best - residual / slope
+    # шаг ограничен двукратным изменением параметра
+    estimate = min(max(estimate, x_best / 2), x_best * 2)
+    radius = abs(estimate - x_best)
+    return _positive(estimate + radius * _offsets(probes))
+
+
+def _interpolate(xs: np.ndarray, vs: np.ndarray, target: float,
+                 pair: tuple, finite: np.ndarray) -> float:
+    """
+    Оценка решения внутри интервала обратной квадратичной интерполяцией,
+        если она монотонна, иначе - по секущей
+    """
+    i, j = (int(np.flatnonzero(finite == index)[0]) for index in pair)
+    low, high = xs[i], xs[j]
+    secant = low + (target - vs[i]) * (high - low) / (vs[j] - vs[i])
+    neighbours = [k for k in (i - 1, j + 1) if 0 <= k < xs.size]
+    if not neighbours:
+        return secant
+    k = min(neighbours, key=lambda index: abs(vs[index] - target))
+    nodes = vs[[i, j, k]]
+    if np.unique(nodes).size < 3 or not (
+            np.all(np.diff(vs[sorted((i, j, k))]) > 0)
+            or np.all(np.diff(vs[sorted((i, j, k))]) < 0)):
+        return secant
+    values = xs[[i, j, k]]
+    estimate = 0.0
+    for m in range(3):
+        term = values[m]
+        for n in range(3):
+            if m != n:
+                term *= (target - nodes[n]) / (nodes[m] - nodes[n])
+        estimate += term
+    if low < estimate < high:
+        return estimate
+    return secant
+
+
+def _positive(candidates: np.ndarray) -> np.ndarray:
+    return candidates[candidates > 0]
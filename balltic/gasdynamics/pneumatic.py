@@ -2,13 +2,24 @@ __author__ = 'Anthony Byuraev'
 
 __all__ = ['PneumaticGrid']
 
+import copy
 import typing
 
 import numpy as np
 
+from balltic.core import checkpoint as checkpoint_
 from balltic.core.grid import EulerianGrid
 from balltic.core.guns import PneumaticGun
 from balltic.core.gas import Gas
+from balltic.core.flux import FluxScheme, get_scheme
+from balltic.core.cache import SolutionCache
+from balltic.core.checkpoint import Checkpoint
+from balltic.core.diagnostics import Diagnostics
+from balltic.core.events import Event
+from balltic.core.fields import FieldRecorder
+from balltic.core.history import History
+from balltic.core.reconstruction import MUSCL, get_reconstruction
+from balltic.core.step import StepController
 
 
 class PneumaticGrid(EulerianGrid):
@@ -39,6 +50,55 @@ class PneumaticGrid(EulerianGrid):
     kurant: int or float, optional
         Число Куранта
 
+    history: History, optional
+        Политика записи истории выстрела. По умолчанию записывается каждый шаг
+
+    scheme: str or FluxScheme, optional
+        Схема расчета потоков: 'ausm', 'ausm+', 'ausm+up' или 'hllc'
+
+    backend: str, optional
+        Бэкенд шага по времени: 'numpy' или 'numba'.
+        Без установленной numba используется 'numpy'
+
+    controller: StepController, optional
+        Адаптивный выбор числа Куранта. По умолчанию число Куранта
+        постоянно. Статистика шагов сохраняется в `step_stats`
+
+    autosave: Checkpoint, optional
+        Периодическая запись контрольных точек во время расчета.
+        Расчет продолжается методом `resume`
+
+    solve: bool, optional
+        Решать ли задачу в конструкторе. Иначе решение выполняется
+        методами `solve` или `iter_steps`
+
+    field_recorder: FieldRecorder, optional
+        Запись полей параметров в ячейках в файлы на диске
+
+    events: sequence of Event, optional
+        События выстрела: ShotStart, PeakPressure, AllBurnt, Crossing.
+        Найденные события и уточненный внутри шага вылет снаряда
+        'muzzle' сохраняются в словаре `events`, время и скорость
+        вылета - в `muzzle_time` и `muzzle_velocity`
+
+    cache: SolutionCache, optional
+        Кэш решений на диске. При наличии решения с теми же исходными
+        данными расчет не выполняется
+
+    profile: bool, optional
+        Измерять ли время этапов шага по времени. Суммарное время
+        и количество вызовов этапов сохраняются в `profile`
+
+    diagnostics: Diagnostics, optional
+        Проверка законов сохранения массы и энергии, положительности
+        плотности и давления, чисел Маха и Куранта на каждом шаге.
+        Итог с нарушенными порогами сохраняется в `quality`
+
+    reconstruction: str or MUSCL, optional
+        Восстановление параметров газа на границах ячеек второго порядка:
+        'minmod', 'vanleer', 'mc' - ограничитель наклона MUSCL.
+        По умолчанию параметры в ячейках постоянны (первый порядок)
+
     Returns
     -------
     solution:
@@ -54,7 +114,19 @@ class PneumaticGrid(EulerianGrid):
                  initialp: typing.Union[int, float] = None,
                  chamber: typing.Union[int, float] = None,
                  barrel: typing.Union[int, float] = None,
-                 kurant: typing.Union[int, float] = None) -> None:
+                 kurant: typing.Union[int, float] = None,
+                 history: History = None,
+                 scheme: typing.Union[str, FluxScheme] = 'ausm+',
+                 backend: str = 'numpy',
+                 controller: StepController = None,
+                 autosave: Checkpoint = None,
+                 solve: bool = True,
+                 field_recorder: FieldRecorder = None,
+                 events: typing.Sequence[Event] = (),
+                 cache: SolutionCache = None,
+                 profile: bool = False,
+                 diagnostics: Diagnostics = None,
+                 reconstruction: typing.Union[str, MUSCL] = None) -> None:
 
         if isinstance(gun, PneumaticGun):
             self.gun = gun
@@ -75,51 +147,60 @@ class PneumaticGrid(EulerianGrid):
         if barrel is not None:
             self.gun = self.gun._replace(barrel=barrel)
 
+        self.history = History() if history is None else copy.copy(history)
+        self.scheme = get_scheme(scheme)
+        self.controller = None if controller is None \
+            else copy.copy(controller)
+        self.autosave = autosave
+        self.cache = cache
+        self.diagnostics = None if diagnostics is None \
+            else copy.copy(diagnostics)
+        self.reconstruction = get_reconstruction(reconstruction)
+        self.field_recorder = None if field_recorder is None \
+            else copy.copy(field_recorder)
+        self._event_detectors = tuple(copy.copy(event) for event in events)
+
+        self._initial_state()
+        self._set_backend(backend)
+        self._set_profile(profile)
+        self.is_solved = False
+        if solve:
+            self._run()
+
+    def _initial_state(self):
+        """
+        Заполнение массивов параметров в начальный момент времени
+        """
         self.gun = self.gun._replace(cs_area=np.pi * self.gun.caliber ** 2 / 4)
 
-        self.energy_cell = np.full(
-            self.nodes,
+        self.energy_cell = self._cell_array(
             self.gun.initialp / (self.gas.k - 1) / self.gas.ro
         )
-        self.c_cell = np.full(
-            self.nodes,
+        self.c_cell = self._cell_array(
             np.sqrt(self.gas.k * self.gun.initialp / self.gas.ro)
         )
-        self.ro_cell = np.full(self.nodes, self.gas.ro)
-        self.v_cell = np.zeros(self.nodes)
-        self.press_cell = np.zeros(self.nodes)
+        self.ro_cell = self._cell_array(self.gas.ro)
+        self.v_cell = self._cell_array(0.0)
+        # давление ячеек вычисляется на первом шаге, восстановлению
+        # на границах нужно давление, согласованное с энергией
+        self.press_cell = self._cell_array(
+            0.0 if self.reconstruction is None else self.gun.initialp)
 
         # Для расчета Маха на интерфейсе
-        self.mah_cell_minus = np.zeros(self.nodes - 1)
-        self.mah_cell_plus = np.zeros(self.nodes - 1)
+        self.mah_cell_minus = self._interface_array(0.0)
+        self.mah_cell_plus = self._interface_array(0.0)
 
-        # Для расчета потока f (Векторы Ф)
-        self.F_param_p = np.array(
-            [
-                np.zeros(self.nodes - 1),
-                np.zeros(self.nodes - 1),
-                np.zeros(self.nodes - 1)
-            ]
-        )
-        self.F_param_m = np.array(
-            [
-                np.zeros(self.nodes - 1),
-                np.zeros(self.nodes - 1),
-                np.zeros(self.nodes - 1)
-            ]
-        )
-
-        self.c_interface = np.zeros(self.nodes - 1)
-        self.mah_interface = np.zeros(self.nodes - 1)
-        self.press_interface = np.zeros(self.nodes - 1)
-        self.v_interface = np.zeros(self.nodes - 1)
-        self.x_interface = np.zeros(self.nodes - 1)
+        self.c_interface = self._interface_array(0.0)
+        self.mah_interface = self._interface_array(0.0)
+        self.press_interface = self._interface_array(0.0)
+        self.v_interface = self._interface_array(0.0)
+        self.x_interface = self._interface_array(0.0)
 
         self.f_param = np.array(
             [
-                np.zeros(self.nodes - 1),
-                self.press_cell[1:],
-                np.zeros(self.nodes - 1)
+                self._interface_array(0.0),
+                self.press_cell[..., 1:],
+                self._interface_array(0.0)
             ]
         )
         self.q_param = np.array(
@@ -129,94 +210,77 @@ class PneumaticGrid(EulerianGrid):
                 self.ro_cell * (self.energy_cell + self.v_cell ** 2 / 2)
             ]
         )
-        self.is_solved = False
-        return self._run()
+        self._allocate_workspace()
+
+    def _config(self) -> dict:
+        return {
+            'gun': {name: checkpoint_.scalar(value)
+                    for name, value in self.gun._asdict().items()},
+            'gas': {name: checkpoint_.scalar(value)
+                    for name, value in self.gas._asdict().items()},
+        }
+
+    def _restore_config(self, config: dict) -> None:
+        self.gun = PneumaticGun(**config['gun'])
+        self.gas = Gas(**config['gas'])
+
+    def _jit_parameters(self) -> dict:
+        return {
+            'boostp': -np.inf,
+            'eos': np.array([self.gas.k], dtype=float),
+            'border_face': -1,
+            'zet': np.empty(0),
+            'psi': np.empty(0),
+        }
 
     def _get_q(self):
-        coef_stretch = self._previous_cell_lenght / self.x_interface[1]
-
-        self.q_param[0][1:-1] = coef_stretch \
-            * (self.q_param[0][1:-1]
-               - self.tau / self._previous_cell_lenght
-               * (self.f_param[0][1:] - self.f_param[0][:-1]))
-
-        self.q_param[1][1:-1] = coef_stretch \
-            * (self.q_param[1][1:-1]
-               - self.tau / self._previous_cell_lenght
-               * (self.f_param[1][1:] - self.f_param[1][:-1]))
-
-        self.q_param[2][1:-1] = coef_stretch \
-            * (self.q_param[2][1:-1]
-               - self.tau / self._previous_cell_lenght
-               * (self.f_param[2][1:] - self.f_param[2][:-1]))
-
-        self.ro_cell = self.q_param[0]
-        self.v_cell = self.q_param[1] / self.q_param[0]
-        self.energy_cell = self.q_param[2] \
-            / self.q_param[0] - self.v_cell ** 2 / 2
-        self.press_cell = self.ro_cell * self.energy_cell * (self.gas.k - 1)
-        self.c_cell = np.sqrt(self.gas.k * self.press_cell / self.ro_cell)
+        self._update_q()
+
+        # ro_cell - срез q_param[0], остальные параметры обновляются на месте
+        buffer_ = self._cell_work[0]
+        np.divide(self.q_param[1], self.q_param[0], out=self.v_cell)
+        np.square(self.v_cell, out=buffer_)
+        buffer_ /= 2
+        np.divide(self.q_param[2], self.q_param[0], out=self.energy_cell)
+        self.energy_cell -= buffer_
+        np.multiply(self.ro_cell, self.energy_cell, out=self.press_cell)
+        self.press_cell *= self.gas.k - 1
+        np.multiply(self.gas.k, self.press_cell, out=self.c_cell)
+        self.c_cell /= self.ro_cell
+        np.sqrt(self.c_cell, out=self.c_cell)
         self._border()
 
-    def _get_f(self):
-        self.f_param[0] = self.c_interface / 2 \
-            * (self.mah_interface
-               * (self.F_param_p[0] + self.F_param_m[0])
-               - abs(self.mah_interface)
-               * (self.F_param_p[0] - self.F_param_m[0]))
-
-        self.f_param[1] = self.c_interface / 2 \
-            * (self.mah_interface
-               * (self.F_param_p[1] + self.F_param_m[1])
-               - abs(self.mah_interface)
-               * (self.F_param_p[1] - self.F_param_m[1])) \
-            + self.press_interface
-
-        self.f_param[2] = self.c_interface / 2 \
-            * (self.mah_interface
-               * (self.F_param_p[2] + self.F_param_m[2])
-               - abs(self.mah_interface)
-               * (self.F_param_p[2] - self.F_param_m[2])) \
-            + self.press_interface * self.v_interface
-
-    def _get_F_mines(self):
-        self.F_param_m[0] = self.ro_cell[:-1]
-        self.F_param_m[1] = self.ro_cell[:-1] * self.v_cell[:-1]
-        self.F_param_m[2] = self.ro_cell[:-1] * (
-            self.energy_cell[:-1]
-            + self.v_cell[:-1] ** 2 / 2
-            + self.press_cell[:-1] / self.ro_cell[:-1]
-        )
-
-    def _get_F_plus(self):
-        self.F_param_p[0] = self.ro_cell[1:]
-        self.F_param_p[1] = self.ro_cell[1:] * self.v_cell[1:]
-        self.F_param_p[2] = self.ro_cell[1:] * (
-            self.energy_cell[1:]
-            + self.v_cell[1:] ** 2 / 2
-            + self.press_cell[1:] / self.ro_cell[1:]
-        )
+    def _face_state(self, side: str) -> None:
+        ro = getattr(self, f'ro_{side}')
+        press = getattr(self, f'press_{side}')
+        energy = getattr(self, f'energy_{side}')
+        np.divide(press, ro, out=energy)
+        energy /= self.gas.k - 1
+        sound = getattr(self, f'c_{side}')
+        np.multiply(self.gas.k * (self.gas.k - 1), energy, out=sound)
+        np.sqrt(sound, out=sound)
 
     def _border(self):
-        self.q_param[0][0] = self.q_param[0][1]
-        self.q_param[0][self.nodes - 1] = self.q_param[0][self.nodes - 2]
+        self.q_param[0][..., 0] = self.q_param[0][..., 1]
+        self.q_param[0][..., -1] = self.q_param[0][..., -2]
 
-        self.v_cell[0] = -self.v_cell[1]
-        self.q_param[1][0] = self.ro_cell[0] * self.v_cell[0]
-        self.q_param[1][self.nodes - 1] = \
-            self.q_param[0][self.nodes - 1] \
-            * (2 * self.v_interface[self.nodes - 2]
-               - self.v_cell[self.nodes - 2])
+        self.v_cell[..., 0] = -self.v_cell[..., 1]
+        self.q_param[1][..., 0] = self.ro_cell[..., 0] * self.v_cell[..., 0]
+        self.q_param[1][..., -1] = \
+            self.q_param[0][..., -1] \
+            * (2 * self.v_interface[..., -1]
+               - self.v_cell[..., -2])
 
-        self.q_param[2][0] = self.q_param[2][1]
-        self.q_param[2][self.nodes - 1] = self.q_param[2][self.nodes - 2]
+        self.q_param[2][..., 0] = self.q_param[2][..., 1]
+        self.q_param[2][..., -1] = self.q_param[2][..., -2]
 
     def _end_vel_x(self) -> tuple:
         """
         Возвращает скорость и координату последней границы
         """
-        acceleration = self.press_cell[-2] * self.gun.cs_area / self.gun.shell
-        velocity = self.v_interface[-1] + acceleration * self.tau
-        x = self.x_interface[-1] + self.v_interface[-1] * self.tau \
-                                 + acceleration * self.tau ** 2 / 2
+        press = self._shell_pressure()
+        acceleration = press * self.gun.cs_area / self.gun.shell
+        velocity = self.v_interface[..., -1] + acceleration * self.tau
+        x = self.x_interface[..., -1] + self.v_interface[..., -1] * self.tau \
+                                      + acceleration * self.tau ** 2 / 2
         return velocity, x
@@ -0,0 +1,409 @@
+"""
+surrogate.py - модуль отвечает за таблицы-заменители газодинамических
+    решений: интерполяцию величин выстрела по параметрам заряжания
+"""
+
+__author__ = 'Anthony Byuraev'
+
+__all__ = ['surrogate', 'Surrogate', 'SurrogateResult']
+
+import json
+import itertools
+import typing
+
+import numpy as np
+
+from balltic.core.gas import Gas
+from balltic.core.guns import ArtilleryGun, PneumaticGun
+from balltic.gasdynamics.sweep import SWEEP_KEYS, sweep
+
+OUTPUTS = (
+    'muzzle_velocity',
+    'muzzle_time',
+    'max_shell_pressure',
+    'max_stem_pressure',
+)
+GUNS = {
+    'ArtilleryGun': ArtilleryGun,
+    'PneumaticGun': PneumaticGun,
+}
+FORMAT_VERSION = 1
+
+
+class SurrogateResult(typing.NamedTuple):
+    """
+    Ответ таблицы-заменителя
+
+    values: dict
+        Интерполированные величины формы точек запроса
+    error: dict
+        Оценка абсолютной погрешности величин той же формы
+    """
+    values: typing.Dict[str, np.ndarray]
+    error:  typing.Dict[str, np.ndarray]
+
+
+class Surrogate(object):
+    """
+    Таблица величин выстрела на тензорной сетке параметров
+
+    Величины интерполируются кубическими многочленами Лагранжа
+    по четырем ближайшим узлам вдоль каждой оси (тензорное произведение).
+    Оценка погрешности - модуль разности кубической и полилинейной
+    интерполяции: это оценка погрешности полилинейной интерполяции,
+    поэтому для кубической она, как правило, завышена.
+    Вне таблицы и рядом с неудачными расчетами величины равны NaN
+
+    Parameters
+    ----------
+    gun: ArtilleryGun or PneumaticGun
+        Базовое орудие
+    medium: str or Gas
+        Название пороха для ArtilleryGun или легкий газ для PneumaticGun
+    axes: dict
+        Узлы таблицы по каждому параметру, по возрастанию
+    values: dict
+        Величины в узлах, массивы формы (len(axes[name]) for name in axes)
+    nodes: int, optional
+        Количество узлов сетки прямых расчетов
+    """
+    def __repr__(self):
+        shape = ' x '.join(f'{name}[{axis.size}]'
+                           for name, axis in self.axes.items())
+        return f'{self.__class__.__name__}({shape})'
+
+    def __init__(self, gun: typing.Union[ArtilleryGun, PneumaticGun],
+                 medium: typing.Union[str, Gas],
+                 axes: typing.Dict[str, np.ndarray],
+                 values: typing.Dict[str, np.ndarray],
+                 nodes: int = 100) -> None:
+        self.gun = gun
+        self.medium = medium
+        self.axes = {name: np.asarray(axis, dtype=float)
+                     for name, axis in axes.items()}
+        self.values = {name: np.asarray(value, dtype=float)
+                       for name, value in values.items()}
+        self.nodes = nodes
+        self.solves = 0
+
+    @property
+    def names(self) -> typing.Tuple[str, ...]:
+        return tuple(self.axes)
+
+    @property
+    def outputs(self) -> typing.Tuple[str, ...]:
+        return tuple(self.values)
+
+    @property
+    def samples(self) -> int:
+        return int(np.prod([axis.size for axis in self.axes.values()]))
+
+    def query(self, **points) -> SurrogateResult:
+        """
+        Величины и оценки их погрешности в точках запроса
+
+        Parameters
+        ----------
+        points: array_like
+            Значения всех параметров таблицы, согласуемые по правилам
+            broadcasting
+
+        Returns
+        -------
+        result: SurrogateResult
+        """
+        if set(points) != set(self.names):
+            raise ValueError('Необходимо задать параметры: '
+                             + ', '.join(self.names))
+        coordinates = np.broadcast_arrays(
+            *(np.asarray(points[name], dtype=float) for name in self.names))
+        shape = coordinates[0].shape
+        coordinates = [coordinate.ravel() for coordinate in coordinates]
+        table = np.stack([self.values[name] for name in self.outputs])
+
+        cubic = _tensor(table, [
+            _stencil(axis, coordinate, 4)
+            for axis, coordinate in zip(self.axes.values(), coordinates)])
+        linear = _tensor(table, [
+            _stencil(axis, coordinate, 2)
+            for axis, coordinate in zip(self.axes.values(), coordinates)])
+        inside = np.all([(coordinate >= axis[0]) & (coordinate <= axis[-1])
+                         for axis, coordinate
+                         in zip(self.axes.values(), coordinates)], axis=0)
+        cubic[:, ~inside] = np.nan
+        error = np.abs(cubic - linear)
+        return SurrogateResult(
+            values={name: cubic[i].reshape(shape)
+                    for i, name in enumerate(self.outputs)},
+            error={name: error[i].reshape(shape)
+                   for i, name in enumerate(self.outputs)},
+        )
+
+    def axis_error(self, name: str) -> np.ndarray:
+        """
+        Оценка относительной погрешности в серединах интервалов оси
+
+        Для каждого интервала - наибольший по остальным узлам
+        и по величинам модуль разности кубической и линейной
+        интерполяции вдоль оси, отнесенный к наибольшему модулю величины.
+        При двух узлах оси погрешность не оценивается и равна inf
+        """
+        axis = self.axes[name]
+        if axis.size < 3:
+            return np.full(axis.size - 1, np.inf)
+        k = self.names.index(name)
+        middle = (axis[:-1] + axis[1:]) / 2
+        weights, start = _weights(axis, middle, 4)
+        errors = np.zeros(axis.size - 1)
+        for value in self.values.values():
+            lines = np.moveaxis(value, k, -1)
+            stencil = start[:, np.newaxis] + np.arange(weights.shape[1])
+            cubic = np.sum(lines[..., stencil] * weights, axis=-1)
+            linear = (lines[..., :-1] + lines[..., 1:]) / 2
+            scale = np.nanmax(np.abs(value))
+            with np.errstate(invalid='ignore'):
+                error = np.abs(cubic - linear) / scale
+            error = error.reshape(-1, axis.size - 1)
+            errors = np.fmax(errors, np.nanmax(error, axis=0, initial=0.0))
+        return errors
+
+    def refine(self, tolerance: float = 1e-3,
+               max_samples: int = 2000,
+               executor: str = 'process',
+               workers: int = None) -> 'Surrogate':
+        """
+        Адаптивное добавление узлов в интервалы, оценка погрешности
+            которых превышает `tolerance`
+
+        Оси уточняются по очереди: середины интервалов оси добавляются
+        вместе со всеми узлами остальных осей, поэтому таблица остается
+        тензорной. Если новые узлы не помещаются в `max_samples`,
+        добавляются узлы интервалов с наибольшей погрешностью
+
+        Parameters
+        ----------
+        tolerance: float, optional
+            Допустимая относительная погрешность величин
+        max_samples: int, optional
+            Наибольшее количество узлов таблицы
+        executor, workers: optional
+            Параметры `sweep`
+
+        Returns
+        -------
+        self: Surrogate
+        """
+        refined = True
+        while refined:
+            refined = False
+            for name in self.names:
+                errors = self.axis_error(name)
+                bad = np.flatnonzero(errors > tolerance)
+                if not bad.size:
+                    continue
+                plane = self.samples // self.axes[name].size
+                fit = (max_samples - self.samples) // plane
+                if fit < 1:
+                    continue
+                bad = bad[np.argsort(errors[bad], kind='stable')[::-1][:fit]]
+                axis = self.axes[name]
+                self._insert(name, np.sort(axis[bad] + axis[bad + 1]) / 2,
+                             executor, workers)
+                refined = True
+        return self
+
+    def save(self, path: str) -> None:
+        """
+        Запись таблицы в сжатый файл ``.npz``
+        """
+        medium = self.medium if isinstance(self.medium, str) \
+            else dict(self.medium._asdict())
+        config = {
+            'format': FORMAT_VERSION,
+            'kind': type(self.gun).__name__,
+            'gun': self.gun._asdict(),
+            'medium': medium,
+            'nodes': self.nodes,
+            'names': list(self.names),
+            'outputs': list(self.outputs),
+        }
+        arrays = {f'axis_{i}': axis
+                  for i, axis in enumerate(self.axes.values())}
+        arrays.update((f'value_{i}', value)
+                      for i, value in enumerate(self.values.values()))
+        with open(path, 'wb') as file_:
+            np.savez_compressed(file_, config=np.array(json.dumps(config)),
+                                **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> 'Surrogate':
+        """
+        Чтение таблицы, записанной `save`
+        """
+        with np.load(path, allow_pickle=False) as data:
+            config = json.loads(str(data['config']))
+            if config.get('format') != FORMAT_VERSION:
+                raise ValueError('Неподдерживаемый формат таблицы')
+            axes = {name: data[f'axis_{i}']
+                    for i, name in enumerate(config['names'])}
+            values = {name: data[f'value_{i}']
+                      for i, name in enumerate(config['outputs'])}
+        medium = config['medium']
+        if isinstance(medium, dict):
+            medium = Gas(**medium)
+        gun = GUNS[config['kind']](**config['gun'])
+        return cls(gun, medium, axes, values, nodes=config['nodes'])
+
+    def _sample(self, ranges: dict, outputs: typing.Sequence[str],
+                executor: str, workers: int) -> typing.Dict[str, np.ndarray]:
+        """
+        Прямые расчеты на тензорной сетке `ranges`
+        """
+        result = sweep(self.gun, self.medium, executor=executor,
+                       workers=workers, history=False,
+                       **ranges, nodes=self.nodes)
+        shape = tuple(np.size(ranges[name]) for name in self.names)
+        self.solves += result.failed.size
+        return {name: np.where(result.failed, np.nan,
+                               getattr(result, name)).reshape(shape)
+                for name in outputs}
+
+    def _insert(self, name: str, points: np.ndarray,
+                executor: str, workers: int) -> None:
+        """
+        Добавление узлов `points` на ось `name`
+        """
+        k = self.names.index(name)
+        ranges = dict(self.axes, **{name: points})
+        block = self._sample(ranges, self.outputs, executor, workers)
+        axis = np.concatenate([self.axes[name], points])
+        order = np.argsort(axis, kind='stable')
+        self.axes[name] = axis[order]
+        for output, value in block.items():
+            self.values[output] = np.take(
+                np.concatenate([self.values[output], value], axis=k),
+                order, axis=k)
+
+
+def surrogate(gun: typing.Union[ArtilleryGun, PneumaticGun],
+              medium: typing.Union[str, Gas],
+              points: int = 5,
+              tolerance: float = 1e-3,
+              max_samples: int = 2000,
+              outputs: typing.Sequence[str] = OUTPUTS,
+              executor: str = 'process',
+              workers: int = None,
+              nodes: int = 100,
+              **box) -> Surrogate:
+    """
+    Строит таблицу-заменитель величин выстрела в области параметров
+
+    Начальная таблица - равномерная тензорная сетка из `points` узлов
+    по каждому параметру. Затем таблица уточняется `Surrogate.refine`
+    до погрешности `tolerance` или до `max_samples` узлов.
+    Все прямые расчеты выполняются через `sweep`
+
+    Parameters
+    ----------
+    gun: ArtilleryGun or PneumaticGun
+        Базовое орудие
+    medium: str or Gas
+        Название пороха для ArtilleryGun или легкий газ для PneumaticGun
+    points: int, optional
+        Количество узлов начальной сетки по каждому параметру
+    tolerance: float, optional
+        Допустимая относительная погрешность величин, None - без уточнения
+    max_samples: int, optional
+        Наибольшее количество узлов таблицы
+    outputs: sequence of str, optional
+        Интерполируемые величины
+    executor, workers: optional
+        Параметры `sweep`
+    nodes: int, optional
+        Количество узлов сетки прямых расчетов
+    box: tuple or sequence
+        Границы (low, high) каждого параметра или начальные узлы:
+        omega_q, denload, barrel, kurant, boostp - для ArtilleryGun,
+        initialp, chamber, barrel, kurant - для PneumaticGun
+
+    Returns
+    -------
+    surrogate: Surrogate
+
+    Examples
+    --------
+    >>> table = surrogate(gun, '16\\\\1 тр', omega_q=(0.2, 0.4),
+    ...                   denload=(600, 800), tolerance=1e-3)
+    >>> table.query(omega_q=0.3, denload=[650, 700]).values['muzzle_velocity']
+    """
+    kind = type(gun)
+    if kind not in SWEEP_KEYS:
+        raise ValueError('Параметр gun должен быть ArtilleryGun или PneumaticGun')
+    if not box:
+        raise ValueError('Необходимо задать хотя бы один параметр')
+    for name in box:
+        if name not in SWEEP_KEYS[kind] or name == 'nodes':
+            raise ValueError(f'Параметр {name} не поддерживается')
+    for name in outputs:
+        if name not in OUTPUTS:
+            raise ValueError(f'Величина {name} не поддерживается')
+    if points < 2:
+        raise ValueError('Параметр points должен быть не меньше 2')
+
+    axes = {}
+    for name, bounds in box.items():
+        bounds = np.asarray(bounds, dtype=float)
+        if bounds.ndim != 1 or bounds.size < 2:
+            raise ValueError(f'Параметр {name} должен быть парой границ '
+                             'или последовательностью узлов')
+        axis = np.linspace(bounds[0], bounds[1], points) \
+            if bounds.size == 2 else np.unique(bounds)
+        if not np.all(np.diff(axis) > 0):
+            raise ValueError(f'Границы параметра {name} должны различаться')
+        axes[name] = axis
+
+    table = Surrogate(gun, medium, axes, {}, nodes=nodes)
+    table.values = table._sample(axes, outputs, executor, workers)
+    if tolerance is not None:
+        table.refine(tolerance, max_samples, executor, workers)
+    return table
+
+
+def _weights(axis: np.ndarray, x: np.ndarray,
+             order: int) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """
+    Веса многочлена Лагранжа по `order` ближайшим узлам оси
+        и номер первого узла шаблона
+    """
+    order = min(order, axis.size)
+    interval = np.clip(np.searchsorted(axis, x, side='right') - 1,
+                       0, axis.size - 2)
+    start = np.clip(interval - (order - 1) // 2, 0, axis.size - order)
+    stencil = axis[start[:, np.newaxis] + np.arange(order)]
+    weights = np.ones((x.size, order))
+    for m in range(order):
+        for n in range(order):
+            if m != n:
+                weights[:, m] *= (x - stencil[:, n]) \
+                    / (stencil[:, m] - stencil[:, n])
+    return weights, start
+
+
+def _stencil(axis: np.ndarray, x: np.ndarray, order: int) -> tuple:
+    weights, start = _weights(axis, x, order)
+    return [(start + m, weights[:, m]) for m in range(weights.shape[1])]
+
+
+def _tensor(table: np.ndarray, stencils: list) -> np.ndarray:
+    """
+    Тензорное произведение одномерных шаблонов интерполяции
+
+    table: np.ndarray
+        Величины формы (величины, *оси)
+    """
+    result = 0.0
+    for terms in itertools.product(*stencils):
+        index = tuple(term[0] for term in terms)
+        weight = np.prod([term[1] for term in terms], axis=0)
+        result = result + table[(slice(None),) + index] * weight
+    return result
@@ -0,0 +1,274 @@
+"""
+sweep.py - модуль отвечает за параллельный перебор параметров
+    газодинамических решений
+"""
+
+__author__ = 'Anthony Byuraev'
+
+__all__ = ['sweep', 'SweepResult']
+
+import os
+import typing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, \
+    as_completed, wait
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from balltic.core.gas import Gas
+from balltic.core.grid import HISTORY_NAMES
+from balltic.core.history import History
+from balltic.core.guns import ArtilleryGun, PneumaticGun
+from balltic.gasdynamics.ensemble import ArtilleryEnsemble, PneumaticEnsemble
+
+SCALARS = (
+    'muzzle_velocity',
+    'muzzle_time',
+    'max_shell_pressure',
+    'max_stem_pressure',
+    'steps',
+    'failed',
+)
+SWEEP_KEYS = {
+    ArtilleryGun: ('omega_q', 'denload', 'barrel', 'kurant', 'boostp', 'nodes'),
+    PneumaticGun: ('initialp', 'chamber', 'barrel', 'kurant', 'nodes'),
+}
+ENSEMBLES = {
+    ArtilleryGun: ArtilleryEnsemble,
+    PneumaticGun: PneumaticEnsemble,
+}
+
+
+class SweepResult(typing.NamedTuple):
+    """
+    Результаты перебора параметров
+
+    parameters: dict
+        Значения перебираемых параметров для каждого расчета, формы (N,)
+    muzzle_velocity, muzzle_time: np.ndarray
+        Дульная скорость и время выстрела, формы (N,)
+    max_shell_pressure, max_stem_pressure: np.ndarray
+        Максимальные давления на снаряд и на дно канала, формы (N,)
+    steps: np.ndarray
+        Количество шагов по времени, формы (N,)
+    failed: np.ndarray
+        Признак расчета, решение которого перестало быть конечным
+    time, shell_position, shell_velocity, shell_pressure, stem_pressure:
+        Истории формы (N, записи), дополненные NaN; None без `history`
+    """
+    parameters:         typing.Dict[str, np.ndarray]
+    muzzle_velocity:    np.ndarray
+    muzzle_time:        np.ndarray
+    max_shell_pressure: np.ndarray
+    max_stem_pressure:  np.ndarray
+    steps:              np.ndarray
+    failed:             np.ndarray
+    time:               np.ndarray = None
+    shell_position:     np.ndarray = None
+    shell_velocity:     np.ndarray = None
+    shell_pressure:     np.ndarray = None
+    stem_pressure:      np.ndarray = None
+
+
+def sweep(gun: typing.Union[ArtilleryGun, PneumaticGun],
+          medium: typing.Union[str, Gas, typing.Sequence[str]],
+          executor: str = 'process',
+          workers: int = None,
+          chunksize: int = None,
+          history: typing.Union[bool, History] = True,
+          **ranges) -> SweepResult:
+    """
+    Решает задачу для всех сочетаний значений параметров
+
+    Расчеты делятся на части, каждая часть решается одним ансамблем
+    (ArtilleryEnsemble или PneumaticEnsemble) в пуле процессов или потоков.
+    Результаты возвращаются через разделяемую память,
+    объекты решений между процессами не передаются
+
+    Parameters
+    ----------
+    gun: ArtilleryGun or PneumaticGun
+        Базовое орудие
+    medium: str, Gas or sequence
+        Название пороха для ArtilleryGun или легкий газ для PneumaticGun.
+        Последовательность названий порохов или газов, например результат
+        `registry.query`, перебирается вместе с параметрами, а номер
+        среды каждого расчета сохраняется в `parameters['medium']`
+    executor: str, optional
+        'process', 'thread' или 'serial'
+    workers: int, optional
+        Количество процессов или потоков, по умолчанию - число ядер
+    chunksize: int, optional
+        Количество расчетов в одной части
+    history: bool or History, optional
+        Возвращать ли истории выстрела или политика их записи
+    ranges: scalar or sequence
+        Значения параметров `ArtilleryGrid`/`PneumaticGrid`:
+        omega_q, denload, barrel, kurant, boostp, nodes - для ArtilleryGun,
+        initialp, chamber, barrel, kurant, nodes - для PneumaticGun
+
+    Returns
+    -------
+    result: SweepResult
+    """
+    kind = type(gun)
+    if kind not in SWEEP_KEYS:
+        raise ValueError('Параметр gun должен быть ArtilleryGun или PneumaticGun')
+    media = [medium] if isinstance(medium, (str, Gas)) else list(medium)
+    for item in media:
+        if kind is ArtilleryGun and not isinstance(item, str):
+            raise ValueError('Параметр medium должен быть названием пороха')
+        if kind is PneumaticGun and not isinstance(item, Gas):
+            raise ValueError('Параметр medium должен быть Gas')
+    if not media:
+        raise ValueError('Параметр medium не должен быть пустым')
+    for key in ranges:
+        if key not in SWEEP_KEYS[kind]:
+            raise ValueError(f'Параметр {key} не поддерживается')
+
+    ranges.setdefault('nodes', 100)
+    if len(media) > 1 or not isinstance(medium, (str, Gas)):
+        ranges['medium'] = np.arange(len(media))
+    names = list(ranges)
+    grids = np.meshgrid(*(np.atleast_1d(ranges[name]) for name in names),
+                        indexing='ij')
+    parameters = {name: grid.ravel() for name, grid in zip(names, grids)}
+    parameters['nodes'] = parameters['nodes'].astype(int)
+    if 'medium' in parameters:
+        parameters['medium'] = parameters['medium'].astype(int)
+    size = parameters['nodes'].size
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = -(-size // workers)
+    chunks = [np.arange(start, min(start + chunksize, size))
+              for start in range(0, size, chunksize)]
+
+    # блоки историй частей; освобождаются и при ошибке в любой части
+    blocks = [None] * len(chunks)
+    scalars_memory = SharedMemory(create=True, size=len(SCALARS) * size * 8)
+    try:
+        tasks = [
+            (kind, gun, media,
+             {name: value[indices] for name, value in parameters.items()},
+             indices, scalars_memory.name, size, history)
+            for indices in chunks
+        ]
+        if executor == 'serial':
+            for i, task in enumerate(tasks):
+                blocks[i] = _solve_chunk(task)
+        elif executor in ('process', 'thread'):
+            pool = ProcessPoolExecutor if executor == 'process' \
+                else ThreadPoolExecutor
+            with pool(max_workers=workers) as pool_:
+                futures = {pool_.submit(_solve_chunk, task): i
+                           for i, task in enumerate(tasks)}
+                try:
+                    for future in as_completed(futures):
+                        blocks[futures[future]] = future.result()
+                except BaseException:
+                    # блоки уже запущенных частей собираются для освобождения
+                    for future in futures:
+                        future.cancel()
+                    wait(futures)
+                    for future, i in futures.items():
+                        if not future.cancelled() \
+                                and future.exception() is None:
+                            blocks[i] = future.result()
+                    raise
+        else:
+            raise ValueError('Параметр executor должен быть '
+                             '"process", "thread" или "serial"')
+
+        scalars = np.ndarray((len(SCALARS), size), buffer=scalars_memory.buf)
+        columns = {name: scalars[i].copy() for i, name in enumerate(SCALARS)}
+        del scalars
+    except BaseException:
+        _release_blocks(blocks)
+        raise
+    finally:
+        scalars_memory.close()
+        scalars_memory.unlink()
+    columns['steps'] = columns['steps'].astype(int)
+    columns['failed'] = columns['failed'].astype(bool)
+
+    if history:
+        try:
+            steps = max(shape[2] for _, shape in blocks)
+            histories = np.full((len(HISTORY_NAMES), size, steps), np.nan)
+            for (name, shape), indices in zip(blocks, chunks):
+                memory = SharedMemory(name=name)
+                try:
+                    block = np.ndarray(shape, buffer=memory.buf)
+                    histories[:, indices, :shape[2]] = block
+                    del block
+                finally:
+                    memory.close()
+        finally:
+            _release_blocks(blocks)
+        columns.update(zip(HISTORY_NAMES, histories))
+
+    return SweepResult(parameters=parameters, **columns)
+
+
+def _release_blocks(blocks: typing.Sequence) -> None:
+    """
+    Удаляет блоки разделяемой памяти с историями частей
+    """
+    for block in blocks:
+        if block is None:
+            continue
+        try:
+            memory = SharedMemory(name=block[0])
+        except FileNotFoundError:
+            continue
+        memory.close()
+        memory.unlink()
+
+
+def _solve_chunk(task) -> typing.Optional[typing.Tuple[str, tuple]]:
+    """
+    Решает часть расчетов в рабочем процессе
+
+    Скалярные результаты записываются в общий блок разделяемой памяти,
+    истории - в новый блок, имя и форма которого возвращаются
+    """
+    kind, gun, media, cases, indices, scalars_name, size, history = task
+    policy = history if isinstance(history, History) \
+        else History(scalars_only=not history)
+    solutions = []
+    scalars_memory = SharedMemory(name=scalars_name)
+    try:
+        scalars = np.ndarray((len(SCALARS), size), buffer=scalars_memory.buf)
+        medium = cases.get('medium', np.zeros(len(indices), dtype=int))
+        keys = np.stack([cases['nodes'], medium])
+        for nodes, item in np.unique(keys, axis=1).T:
+            group = np.flatnonzero((cases['nodes'] == nodes)
+                                   & (medium == item))
+            overrides = {name: value[group] for name, value in cases.items()
+                         if name not in ('nodes', 'medium')}
+            solution = ENSEMBLES[kind](gun, media[item], nodes=int(nodes),
+                                       history=policy, **overrides)
+            for i, name in enumerate(SCALARS):
+                scalars[i, indices[group]] = getattr(solution, name)
+            if history:
+                solutions.append(
+                    (group, [getattr(solution, name) for name in HISTORY_NAMES]))
+        del scalars
+    finally:
+        scalars_memory.close()
+
+    if not history:
+        return None
+    steps = max(rows[0].shape[0] for _, rows in solutions)
+    shape = (len(HISTORY_NAMES), len(indices), steps)
+    memory = SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+    block = np.ndarray(shape, buffer=memory.buf)
+    block[:] = np.nan
+    for group, rows in solutions:
+        for i, values in enumerate(rows):
+            block[i, group, :values.shape[0]] = values.T
+    del block
+    memory.close()
+    return memory.name, shape
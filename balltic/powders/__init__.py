@@ -1,34 +1,26 @@
 import os
 import json
 
+from balltic.core.gunpowder import registry
 
-PATH = os.getcwd()
+
+PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                    'gpowders.json')
 
 
 def _load_many() -> dict:
-    try:
-        with open(PATH + r'\powders\gpowders.json') as f:
-            gpowders = json.load(f)
-    except Exception:
-        raise Exception
-    return gpowders
+    with open(PATH, encoding='utf-8') as f:
+        return json.load(f)
 
 
 def load(gunpowder: str = None) -> dict:
-    try:
-        with open(PATH + '\\balltic\powders\gpowders.json') as f:
-            gpowders = json.load(f)
-        return gpowders[gunpowder]
-    except FileNotFoundError:
-        print('FileNotFoundError: Файл не найден или не существует')
+    return registry.record(gunpowder)
 
 
-def _save_gpowders(gpowders: dict) -> json:
-    try:
-        with open(PATH + r'\powders\gpowder.json', 'w') as f:
-            json.dump(gpowders, f)
-    except Exception:
-        raise Exception
+def _save_gpowders(gpowders: dict) -> None:
+    with open(PATH, 'w', encoding='utf-8') as f:
+        json.dump(gpowders, f)
+    registry.reload()
 
 
 def show_all():
@@ -45,8 +37,7 @@ def show_all():
         List with gunpowders names
     """
 
-    gpowders = _load_many()
-    print(gpowders.keys())
+    print(registry.names)
 
 
 def show_one(gpname: str):
@@ -64,8 +55,7 @@ def show_one(gpname: str):
         Gunpowder characteristics
     """
 
-    gpowders = _load_many()
-    print(gpowders[gpname])
+    print(registry.record(gpname))
 
 
 def check(gpname: str):
@@ -83,8 +73,7 @@ def check(gpname: str):
         `True` if gunpowder in gpowders.json, `False` otherwise
     """
 
-    gpowders = _load_many()
-    return True if gpname in gpowders else False
+    return gpname in registry
 
 
 def fetch(gpname: str):
@@ -102,8 +91,36 @@ def fetch(gpname: str):
         Gunpowder in dictionary form
     """
 
-    gpowders = _load_many()
-    return gpowders[gpname]
+    return registry.record(gpname)
+
+
+def query(sort_by: str = None, descending: bool = False, limit: int = None,
+          **ranges) -> list:
+    """
+    Find gunpowders by parameter ranges, see `PowderRegistry.query`
+
+    Parameters
+    ----------
+    sort_by: str, optional
+        Field to sort by
+    descending: bool, optional
+        Sort in descending order
+    limit: int, optional
+        Maximum number of gunpowders
+    ranges: tuple or float
+        (low, high) ranges or exact values of GUNPOWDER_KEYS fields
+
+    Returns
+    -------
+    names: list
+        Gunpowders names, ready to be passed to `sweep`
+
+    Examples
+    --------
+    >>> query(I_k=(0.5, 1.5), f=(1.0, None), sort_by='alpha_k')
+    """
+    return registry.query(sort_by=sort_by, descending=descending,
+                          limit=limit, **ranges)
 
 
 def add(gpname: str, gpowder: dict):
@@ -133,7 +150,7 @@ def add(gpname: str, gpowder: dict):
     gpowders[gpname] = gpowder
     try:
         _save_gpowders(gpowders)
-    except Exception:
+    except OSError:
         return False
     else:
         return True
@@ -157,7 +174,8 @@ def delete(gpname: str):
     gpowders = _load_many()
     try:
         del gpowders[gpname]
-    except Exception:
-        return True
-    else:
+        _save_gpowders(gpowders)
+    except (KeyError, OSError):
         return False
+    else:
+        return True
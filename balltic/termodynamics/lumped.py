@@ -0,0 +1,483 @@
+"""
+lumped.py - модуль отвечает за решение основной задачи внутренней баллистики
+    в термодинамической постановке (модель с сосредоточенными параметрами)
+"""
+
+__author__ = 'Anthony Byuraev'
+
+__all__ = ['ArtilleryLumped', 'cross_check', 'CrossCheckResult']
+
+import typing
+
+import numpy as np
+
+from balltic.core.burning import BurningLaw, get_law
+from balltic.core.ensemble import stack_guns
+from balltic.core.grid import HISTORY_NAMES
+from balltic.core.guns import ArtilleryGun
+from balltic.core.gunpowder import GunPowder
+from balltic.core.history import History
+
+ArrayLike = typing.Union[int, float, typing.Sequence[float]]
+
+# Метод Дормана - Принса 5(4)
+DOPRI_C = (0.0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1.0, 1.0)
+DOPRI_A = (
+    (),
+    (1 / 5,),
+    (3 / 40, 9 / 40),
+    (44 / 45, -56 / 15, 32 / 9),
+    (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+    (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+    (35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84),
+)
+DOPRI_E = (71 / 57600, 0.0, -71 / 16695, 71 / 1920, -17253 / 339200,
+           22 / 525, -1 / 40)
+
+CROSS_CHECK_NAMES = (
+    'muzzle_velocity',
+    'muzzle_time',
+    'max_shell_pressure',
+    'max_stem_pressure',
+)
+
+
+class ArtilleryLumped(object):
+    """
+    Класс - решение основной задачи внутренней баллистики
+        в термодинамической постановке для ансамбля артиллерийских орудий
+
+    Газопороховая смесь описывается средним давлением p, уравнение
+    энергии - уравнение Резаля с давлением вспышки, распределение
+    давления по заснарядному пространству - по Лагранжу:
+
+        p W = p_vsp W_0 + f ω ψ - (k - 1) φ q v^2 / 2
+        W = W_k + S l - ω (1 - ψ) / δ - α ω ψ
+        dz/dt = p / I_k,  ψ = ψ(z)
+        φ q dv/dt = S p,  dl/dt = v,  после p >= p_0
+        φ = K + ω / (3 q),  p_сн = K p / φ,  p_кн = (φ_1 + ω / (2 q)) p / φ
+
+    Система интегрируется явным методом Дормана - Принса 5(4)
+    с отдельным адаптивным шагом для каждого орудия. Все орудия
+    ансамбля рассчитываются одновременно векторными операциями,
+    частями по `chunk` орудий
+
+    Parameters
+    ----------
+    gun: ArtilleryGun or sequence of ArtilleryGun
+        Орудие или последовательность орудий ансамбля
+
+    gunpowder: str
+        Название пороха, общего для всего ансамбля
+
+    omega_q, denload, barrel, boostp, press_vsp: array_like, optional
+        Значения параметров для каждого орудия ансамбля
+
+    burning: str or BurningLaw, optional
+        Закон газообразования: 'formula', 'table' или BurningLaw
+
+    secondary: bool, optional
+        Учитывать ли второстепенные работы (K, fi_1). Без них φ_1 = 1,
+        как в газодинамической постановке
+
+    rtol: float, optional
+        Допустимая относительная погрешность шага
+
+    history: bool or History, optional
+        Записывать ли истории выстрела или политика их записи
+
+    chunk: int, optional
+        Количество орудий, рассчитываемых одновременно
+
+    max_steps: int, optional
+        Наибольшее количество шагов для одного орудия
+
+    Returns
+    -------
+    solution:
+        `muzzle_velocity`, `muzzle_time`, `max_pressure`,
+        `max_shell_pressure`, `max_stem_pressure`, `burnt_time`, `steps`,
+        `failed` формы (N,). С историей - массивы формы (записи, N)
+        time, shell_position, shell_velocity, shell_pressure,
+        stem_pressure, дополненные NaN
+    """
+    def __str__(self):
+        return 'ArtilleryLumped Class'
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(gun, gunpowder)'
+
+    def __init__(self, gun, gunpowder: str,
+                 omega_q: ArrayLike = None,
+                 denload: ArrayLike = None,
+                 barrel: ArrayLike = None,
+                 boostp: ArrayLike = None,
+                 press_vsp: ArrayLike = None,
+                 burning: typing.Union[str, BurningLaw] = 'formula',
+                 secondary: bool = True,
+                 rtol: float = 1e-6,
+                 history: typing.Union[bool, History] = False,
+                 chunk: int = 65536,
+                 max_steps: int = 10000) -> None:
+        self.gun = stack_guns(gun, ArtilleryGun,
+                              omega_q=omega_q, denload=denload,
+                              barrel=barrel, boostp=boostp,
+                              press_vsp=press_vsp)
+        self.gunpowder = GunPowder(gunpowder)
+        self.burning = get_law(self.gunpowder, burning)
+        self.secondary = secondary
+        self.rtol = rtol
+        self.history = history if isinstance(history, History) \
+            else History(scalars_only=not history) if history else None
+        self.chunk = chunk
+        self.max_steps = max_steps
+        self._solve()
+
+    def _solve(self):
+        """
+        Решение задачи по частям ансамбля
+        """
+        size = self.gun.shell.size
+        results = {}
+        histories = []
+        for start in range(0, size, self.chunk):
+            members = slice(start, min(start + self.chunk, size))
+            chunk, history = self._solve_chunk({
+                field: value[members]
+                for field, value in self.gun._asdict().items()
+                if value is not None})
+            for name, value in chunk.items():
+                results.setdefault(name, []).append(value)
+            histories.append(history)
+        for name, values in results.items():
+            setattr(self, name, np.concatenate(values))
+
+        if self.history is not None and not self.history.scalars_only:
+            records = max(history[0].shape[0] for history in histories)
+            for i, name in enumerate(HISTORY_NAMES):
+                setattr(self, name, np.concatenate([
+                    np.pad(history[i], ((0, records - history[i].shape[0]),
+                                        (0, 0)), constant_values=np.nan)
+                    for history in histories], axis=1))
+        self.is_solved = True
+
+    def _solve_chunk(self, gun: dict) -> tuple:
+        """
+        Интегрирование системы для части ансамбля
+        """
+        powder = self.gunpowder
+        size = gun['shell'].size
+        shell = gun['shell']
+        omega = gun['omega_q'] * shell
+        area = np.pi * gun['caliber'] ** 2 / 4
+        volume = omega / gun['denload']
+        travel = gun['barrel'] - volume / area
+        if self.secondary:
+            phi_1 = gun['K']
+            phi_2 = gun.get('fi_1', phi_1)
+        else:
+            phi_1 = phi_2 = np.ones(size)
+        phi = phi_1 + omega / shell / 3
+        shell_ratio = phi_1 / phi
+        stem_ratio = (phi_2 + omega / shell / 2) / phi
+        free_volume = volume - omega / powder.ro
+        constants = {
+            'energy': gun['press_vsp'] * free_volume,
+            'force': powder.f * omega,
+            'kinetic': (powder.k - 1) * phi * shell / 2,
+            'volume': volume,
+            'area': area,
+            'omega': omega,
+            'acceleration': area / (phi * shell),
+            'boostp': gun['boostp'],
+        }
+
+        state = np.zeros((3, size))
+        time = np.zeros(size)
+        tau = np.full(size, 1e-6)
+        started = gun['press_vsp'] >= gun['boostp']
+        active = np.full(size, True)
+        failed = np.full(size, False)
+        steps = np.zeros(size, dtype=int)
+        muzzle_time = np.full(size, np.nan)
+        muzzle_velocity = np.full(size, np.nan)
+        burnt_time = np.full(size, np.nan)
+        pressure = self._pressure(state, constants)
+        peak = PeakTracker(time, pressure, started)
+        scale = np.array([1.0, 0.0, 100.0])[:, np.newaxis] \
+            + np.array([0.0, 1.0, 0.0])[:, np.newaxis] * travel
+        history = None
+        if self.history is not None:
+            history = History(**{name: getattr(self.history, name) for name in
+                                 ('every', 'interval', 'rtol', 'scalars_only',
+                                  'chunk')})
+            history.start(HISTORY_NAMES, width=size)
+
+        while active.any():
+            index = np.flatnonzero(active)
+            sub = {name: value[index] if np.ndim(value) else value
+                   for name, value in constants.items()}
+            new_state, error = self._dopri_step(
+                state[:, index], tau[index], started[index], sub)
+            tolerance = self.rtol * (
+                scale[:, index]
+                + np.maximum(np.abs(state[:, index]), np.abs(new_state)))
+            norm = np.sqrt(np.mean((error / tolerance) ** 2, axis=0))
+            accepted = norm <= 1
+            factor = np.clip(
+                0.9 * np.where(norm > 0, norm, 1e-10) ** (-1 / 5), 0.2, 5.0)
+
+            done = index[accepted]
+            old_state = state[:, done].copy()
+            old_time = time[done].copy()
+            state[:, done] = new_state[:, accepted]
+            time[done] += tau[done]
+            tau[index] *= np.where(accepted, factor, np.minimum(factor, 1.0))
+            steps[done] += 1
+
+            sub = {name: value[done] if np.ndim(value) else value
+                   for name, value in constants.items()}
+            pressure_done = self._pressure(state[:, done], sub)
+            started[done] |= pressure_done >= constants['boostp'][done]
+            burnt = np.isnan(burnt_time[done]) \
+                & (state[0, done] >= self.burning.z_end)
+            burnt_time[done[burnt]] = time[done[burnt]]
+            peak.update(done, time[done], pressure_done, started[done])
+
+            # вылет снаряда внутри шага
+            exited = state[1, done] >= travel[done]
+            fraction = np.ones(done.size)
+            if exited.any():
+                members = done[exited]
+                span = time[members] - old_time[exited]
+                fraction[exited], velocity = _exit_hermite(
+                    old_state[1:, exited], state[1:, members], span,
+                    travel[members])
+                muzzle_time[members] = old_time[exited] \
+                    + fraction[exited] * span
+                muzzle_velocity[members] = velocity
+                active[members] = False
+            broken = ~np.all(np.isfinite(state[:, index]), axis=0) \
+                | (steps[index] >= self.max_steps) \
+                | (~started[index] & (state[0, index] >= self.burning.z_end))
+            failed[index[broken]] = True
+            active[index[broken]] = False
+
+            if history is not None and done.size:
+                # последняя запись - момент вылета снаряда
+                position = np.where(exited, travel[done], state[1, done])
+                velocity = np.where(exited, muzzle_velocity[done],
+                                    state[2, done])
+                if exited.any():
+                    before = self._pressure(old_state, sub)
+                    pressure_done = before \
+                        + fraction * (pressure_done - before)
+                moving = started[done]
+                row = np.full((len(HISTORY_NAMES), size), np.nan)
+                row[0, done] = np.where(exited, muzzle_time[done], time[done])
+                row[1, done] = position + volume[done] / area[done]
+                row[2, done] = velocity
+                row[3, done] = np.where(moving, shell_ratio[done], 1.0) \
+                    * pressure_done
+                row[4, done] = np.where(moving, stem_ratio[done], 1.0) \
+                    * pressure_done
+                history.record(*row)
+
+        max_pressure = peak.maximum()
+        results = {
+            'muzzle_velocity': muzzle_velocity,
+            'muzzle_time': muzzle_time,
+            'max_pressure': max_pressure,
+            'max_shell_pressure': np.maximum(
+                shell_ratio * max_pressure, peak.rest),
+            'max_stem_pressure': np.maximum(
+                stem_ratio * max_pressure, peak.rest),
+            'burnt_time': burnt_time,
+            'steps': steps,
+            'failed': failed,
+        }
+        if history is None:
+            return results, None
+        history.finish()
+        arrays = history.arrays()
+        # шаги орудий не совпадают: пропуски каждого орудия - в конец
+        order = np.argsort(np.isnan(arrays['time']), axis=0, kind='stable')
+        return results, [np.take_along_axis(arrays[name], order, axis=0)
+                         for name in HISTORY_NAMES]
+
+    def _pressure(self, state: np.ndarray, constants: dict) -> np.ndarray:
+        """
+        Среднее давление по уравнению энергии
+        """
+        zet, travel, velocity = state
+        psi = self.burning(zet)
+        omega = constants['omega']
+        volume = constants['volume'] + constants['area'] * travel \
+            - omega * (1 - psi) / self.gunpowder.ro \
+            - self.gunpowder.alpha_k * omega * psi
+        return (constants['energy'] + constants['force'] * psi
+                - constants['kinetic'] * velocity ** 2) / volume
+
+    def _rates(self, state: np.ndarray, started: np.ndarray,
+               constants: dict) -> np.ndarray:
+        """
+        Правые части системы: dz/dt, dl/dt, dv/dt
+        """
+        pressure = self._pressure(state, constants)
+        moving = started | (pressure >= constants['boostp'])
+        return np.array([
+            pressure / self.gunpowder.I_k,
+            np.where(moving, state[2], 0.0),
+            np.where(moving, constants['acceleration'] * pressure, 0.0),
+        ])
+
+    def _dopri_step(self, state: np.ndarray, tau: np.ndarray,
+                    started: np.ndarray, constants: dict) -> tuple:
+        """
+        Шаг метода Дормана - Принса: решение пятого порядка
+            и оценка погрешности
+        """
+        rates = []
+        for coefficients in DOPRI_A:
+            stage = state.copy()
+            for coefficient, rate in zip(coefficients, rates):
+                if coefficient:
+                    stage += (coefficient * tau) * rate
+            rates.append(self._rates(stage, started, constants))
+        error = sum((coefficient * tau) * rate
+                    for coefficient, rate in zip(DOPRI_E, rates)
+                    if coefficient)
+        # stage последней стадии - решение пятого порядка
+        return stage, error
+
+
+class PeakTracker(object):
+    """
+    Максимум давления ансамбля с уточнением по параболе через три
+        последние точки в окрестности локального максимума
+    """
+    def __init__(self, time: np.ndarray, pressure: np.ndarray,
+                 started: np.ndarray) -> None:
+        size = time.size
+        self._times = np.full((3, size), np.nan)
+        self._values = np.full((3, size), np.nan)
+        self._times[-1] = time
+        self._values[-1] = pressure
+        self._peak = np.where(started, pressure, -np.inf)
+        self.rest = np.where(started, -np.inf, pressure)
+
+    def update(self, index: np.ndarray, time: np.ndarray,
+               pressure: np.ndarray, started: np.ndarray) -> None:
+        times, values = self._times[:, index], self._values[:, index]
+        times = np.concatenate([times[1:], time[np.newaxis]])
+        values = np.concatenate([values[1:], pressure[np.newaxis]])
+        self._times[:, index], self._values[:, index] = times, values
+        self.rest[index] = np.where(
+            started, self.rest[index], np.maximum(self.rest[index], pressure))
+        moving = np.where(started, pressure, -np.inf)
+        self._peak[index] = np.maximum(self._peak[index], moving)
+
+        (t_a, t_b, t_c), (p_a, p_b, p_c) = times, values
+        local = started & (p_b >= p_a) & (p_b > p_c)
+        if not local.any():
+            return
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # парабола через три точки в форме Ньютона
+            slope_ab = (p_b - p_a) / (t_b - t_a)
+            slope_bc = (p_c - p_b) / (t_c - t_b)
+            curvature = (slope_bc - slope_ab) / (t_c - t_a)
+            vertex = 0.5 * (t_a + t_b) - slope_ab / (2 * curvature)
+            value = p_a + slope_ab * (vertex - t_a) \
+                + curvature * (vertex - t_a) * (vertex - t_b)
+        valid = local & np.isfinite(value) & (curvature < 0)
+        self._peak[index[valid]] = np.maximum(self._peak[index[valid]],
+                                              value[valid])
+
+    def maximum(self) -> np.ndarray:
+        return np.where(np.isfinite(self._peak), self._peak, self.rest)
+
+
+def _exit_hermite(previous: np.ndarray, current: np.ndarray,
+                  tau: np.ndarray, travel: np.ndarray) -> tuple:
+    """
+    Доля шага до вылета и скорость вылета по кубическому полиному Эрмита
+        для пути снаряда l(t) с производными v(t) на концах шага
+    """
+    (l_0, v_0), (l_1, v_1) = previous, current
+    fraction = np.clip((travel - l_0) / (l_1 - l_0), 0.0, 1.0)
+    for _ in range(8):
+        s = fraction
+        h00 = 2 * s ** 3 - 3 * s ** 2 + 1
+        h10 = s ** 3 - 2 * s ** 2 + s
+        h01 = -2 * s ** 3 + 3 * s ** 2
+        h11 = s ** 3 - s ** 2
+        value = h00 * l_0 + h10 * tau * v_0 + h01 * l_1 + h11 * tau * v_1
+        derivative = (6 * s ** 2 - 6 * s) * l_0 \
+            + (3 * s ** 2 - 4 * s + 1) * tau * v_0 \
+            + (-6 * s ** 2 + 6 * s) * l_1 + (3 * s ** 2 - 2 * s) * tau * v_1
+        fraction = np.clip(s - (value - travel) / derivative, 0.0, 1.0)
+    s = fraction
+    derivative = (6 * s ** 2 - 6 * s) * l_0 \
+        + (3 * s ** 2 - 4 * s + 1) * tau * v_0 \
+        + (-6 * s ** 2 + 6 * s) * l_1 + (3 * s ** 2 - 2 * s) * tau * v_1
+    return fraction, derivative / tau
+
+
+class CrossCheckResult(typing.NamedTuple):
+    """
+    Сравнение термодинамической и газодинамической постановок
+
+    lumped, grid: dict
+        Величины обеих постановок формы (N,): muzzle_velocity,
+        muzzle_time, max_shell_pressure, max_stem_pressure
+    error: dict
+        Относительное отличие термодинамической постановки
+        от газодинамической
+    """
+    lumped: typing.Dict[str, np.ndarray]
+    grid:   typing.Dict[str, np.ndarray]
+    error:  typing.Dict[str, np.ndarray]
+
+
+def cross_check(gun, gunpowder: str, nodes: int = 100,
+                burning: typing.Union[str, BurningLaw] = 'formula',
+                **params) -> CrossCheckResult:
+    """
+    Сравнивает ArtilleryLumped с ArtilleryEnsemble на тех же орудиях
+
+    Газодинамическая постановка не учитывает второстепенные работы,
+    поэтому термодинамическая решается с φ_1 = 1. Отличие величин
+    показывает погрешность допущений Лагранжа и осреднения давления
+    для выбранных параметров заряжания
+
+    Parameters
+    ----------
+    gun: ArtilleryGun or sequence of ArtilleryGun
+        Орудие или последовательность орудий
+    gunpowder: str
+        Название пороха
+    nodes: int, optional
+        Количество узлов сетки газодинамической постановки
+    burning: str or BurningLaw, optional
+        Закон газообразования
+    params: array_like, optional
+        omega_q, denload, barrel, boostp для каждого орудия ансамбля
+
+    Returns
+    -------
+    result: CrossCheckResult
+    """
+    from balltic.gasdynamics.ensemble import ArtilleryEnsemble
+
+    lumped = ArtilleryLumped(gun, gunpowder, burning=burning,
+                             secondary=False, **params)
+    grid = ArtilleryEnsemble(gun, gunpowder, nodes=nodes, burning=burning,
+                             history=History(scalars_only=True), **params)
+    values = {name: getattr(lumped, name) for name in CROSS_CHECK_NAMES}
+    reference = {name: getattr(grid, name) for name in CROSS_CHECK_NAMES}
+    return CrossCheckResult(
+        lumped=values,
+        grid=reference,
+        error={name: (values[name] - reference[name]) / reference[name]
+               for name in CROSS_CHECK_NAMES},
+    )
@@ -4,27 +4,75 @@ plevel.py - модуль отвечает за обоснование уровн
 
 __author__ = 'Anthony Byuraev'
 
-__all__ = ['PressureLevel']
+__all__ = ['PressureLevel', 'export_levels']
 
 import os
-import math
+import csv
 import typing
 
 import openpyxl
 import numpy as np
 
+from balltic.core.ensemble import stack_guns
 from balltic.core.guns import ArtilleryGun
 
+CHUEV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          'chuev.npz')
+_chuev = None
+
+#: Столбцы отчета: заголовок и величина
+COLUMNS = (
+    ('v_0, м/с', 'velocity'),
+    ('d, м', 'caliber'),
+    ('q, кг', 'shell'),
+    ('C_q, кг/дм3', 'cq'),
+    ('C_e, тм/дм3', 'ce'),
+    ('ETA_omega, тм/кг', 'etaomega_ce'),
+    ('C_e15, тм/дм3', 'ce15'),
+    ('ETA_omega15, тм/кг', 'etaomega_ce15'),
+    ('p_kr, кгс/см2', 'kresherp'),
+    ('omega/q', 'omega_q'),
+    ('n_kr', 'n_kresher'),
+    ('p_max, Па', 'maximum'),
+)
+GUN_COLUMNS = ('caliber', 'shell')
+#: Первые строки листа `PressureLevel.to_excel`
+SHEET_ORDER = ('cq', 'ce', 'etaomega_ce', 'ce15')
+ROWS_CHUNK = 4096
+
+
+def chuev_tables() -> typing.Dict[str, np.ndarray]:
+    """
+    Таблицы Чуева: ce, kresherp, etaomega
+
+    Таблицы читаются один раз за процесс и используются всеми
+    расчетами как массивы только для чтения
+    """
+    global _chuev
+    if _chuev is None:
+        with np.load(CHUEV_PATH) as table:
+            tables = {name: table[name].astype(float)
+                      for name in ('ce', 'kresherp', 'etaomega')}
+        for value in tables.values():
+            value.flags.writeable = False
+        _chuev = tables
+    return _chuev
+
 
 class PressureLevel(object):
     """
     Рассчитывает уровень максимального давления на основе аналогов АО
     ---
 
+    Расчет векторизован: скорости и параметры орудий согласуются
+    по правилам broadcasting, а результаты (ce, cq, ce15, omega_q,
+    maximum и др.) имеют общую форму. Для скаляров результаты - числа
+
     Parameters:
-        gun: ArtilleryGun
-            Именованный кортеж начальных условий и параметров АО
-        velocity: int, float
+        gun: ArtilleryGun or sequence of ArtilleryGun
+            Именованный кортеж начальных условий и параметров АО,
+            его поля могут быть массивами
+        velocity: int, float or array_like
             Требуемая дульная скорость снаряда
 
     Returns:
@@ -37,20 +85,25 @@ class PressureLevel(object):
         self.G = 9.80665
         if isinstance(gun, ArtilleryGun):
             self.gun = gun
+        elif isinstance(gun, (list, tuple)):
+            self.gun = stack_guns(gun, ArtilleryGun)
         else:
             raise ValueError('Параметр gun должен быть ArtilleryGun')
         if isinstance(velocity, (int, float)):
             self.velocity = velocity
         else:
-            raise ValueError('Параметр velocity должен быть int или float')
+            try:
+                self.velocity = np.asarray(velocity, dtype=float)
+            except (TypeError, ValueError):
+                raise ValueError('Параметр velocity должен быть числом '
+                                 'или массивом чисел')
         self._solve()
 
     def _load_chuev(self):
-        file = os.getcwd() + r'\balltic\termodynamics\chuev.npz'
-        table = np.load(file)
-        self.table_ce = table['ce']
-        self.table_kresherp = table['kresherp']
-        self.table_etaomega = table['etaomega']
+        tables = chuev_tables()
+        self.table_ce = tables['ce']
+        self.table_kresherp = tables['kresherp']
+        self.table_etaomega = tables['etaomega']
 
     def _solve(self):
         self._load_chuev()
@@ -63,7 +116,7 @@ class PressureLevel(object):
         self.ce15 = 0.5 * self.C_Q15 / self.cq * \
             (
                 - (3 * self.etaomega_ce * self.cq - self.ce)
-                + math.sqrt(
+                + np.sqrt(
                     (3 * self.etaomega_ce * self.cq - self.ce) ** 2
                     + 12 * self.etaomega_ce * self.ce * (self.cq ** 2) / self.C_Q15
                     )
@@ -84,28 +137,88 @@ class PressureLevel(object):
             * self.G * 1e4
         return self
 
-    def to_excel(self) -> None:
+    def rows(self) -> typing.Iterator[tuple]:
+        """
+        Строки отчета по одной на каждый расчет в порядке COLUMNS
+        """
+        values = np.broadcast_arrays(*(
+            np.asarray(self.velocity if name == 'velocity'
+                       else getattr(self.gun, name) if name in GUN_COLUMNS
+                       else getattr(self, name), dtype=float)
+            for _, name in COLUMNS))
+        columns = [value.ravel() for value in values]
+        for start in range(0, columns[0].size, ROWS_CHUNK):
+            yield from zip(*(column[start:start + ROWS_CHUNK].tolist()
+                             for column in columns))
+
+    def to_excel(self, path: str = 'Pressure_level.xlsx') -> None:
+        """
+        Запись результатов в книгу Excel: в столбце A - названия величин,
+            в следующих столбцах - значения, по одному столбцу на расчет
+
+        Первые строки совпадают с прежним листом (C_q, C_e, ETA_omega,
+        C_e15), остальные величины COLUMNS записываются ниже. Отчет
+        по строке на расчет записывает `export_levels`
+        """
         workbook = openpyxl.Workbook()
         worksheet = workbook.create_sheet('Уровень максимального давления', 0)
-
-        worksheet['A1'] = 'C_q, кг/дм3'
-        worksheet['B1'] = self.cq
-        worksheet['A2'] = 'C_e, тм/дм3'
-        worksheet['B2'] = self.ce
-        worksheet['A3'] = 'ETA_omega, тм/кг'
-        worksheet['B3'] = self.etaomega_ce
-        worksheet['A4'] = 'C_e15, тм/дм3'
-        worksheet['B4'] = self.ce15
-
-        # TODO: дописать три оставшихся столбца
-        # worksheet['C1'] = 'C_q, кг/дм3'
-        # worksheet['D1'] = self.cq
-        # worksheet['C2'] = 'C_e, тм/дм3'
-        # worksheet['D2'] = self.ce
-        # worksheet['C3'] = 'ETA_omega, тм/кг'
-        # worksheet['D3'] = self.etaomega_ce
-        # worksheet['C4'] = 'C_e15, тм/дм3'
-        # worksheet['D4'] = self.ce15
-
-        workbook.save('Pressure_level.xlsx')
+        values = dict(zip((name for _, name in COLUMNS), zip(*self.rows())))
+        labels = {name: label for label, name in COLUMNS}
+        for name in SHEET_ORDER + tuple(name for _, name in COLUMNS
+                                        if name not in SHEET_ORDER):
+            worksheet.append((labels[name],) + values[name])
+        workbook.save(path)
         return None
+
+
+def export_levels(levels: typing.Iterable[PressureLevel], path: str,
+                  format: str = None,
+                  sheet: str = 'Уровень максимального давления') -> int:
+    """
+    Потоковая запись результатов PressureLevel в одну книгу Excel
+        или в файл CSV, по одной строке на расчет
+
+    Книга записывается в режиме write-only, а результаты читаются
+    из итерируемого объекта по одному, поэтому потребление памяти
+    не зависит от количества строк
+
+    Parameters
+    ----------
+    levels: iterable of PressureLevel
+        Результаты, в том числе векторизованные, или генератор результатов
+    path: str
+        Путь к файлу отчета
+    format: str, optional
+        'xlsx' или 'csv', по умолчанию - по расширению файла
+    sheet: str, optional
+        Название листа книги Excel
+
+    Returns
+    -------
+    rows: int
+        Количество записанных строк без заголовка
+    """
+    if format is None:
+        format = os.path.splitext(path)[1].lstrip('.').lower() or 'xlsx'
+    header = [label for label, _ in COLUMNS]
+    count = 0
+    if format == 'csv':
+        with open(path, 'w', newline='', encoding='utf-8') as file_:
+            writer = csv.writer(file_)
+            writer.writerow(header)
+            for level in levels:
+                for row in level.rows():
+                    writer.writerow(row)
+                    count += 1
+    elif format == 'xlsx':
+        workbook = openpyxl.Workbook(write_only=True)
+        worksheet = workbook.create_sheet(sheet)
+        worksheet.append(header)
+        for level in levels:
+            for row in level.rows():
+                worksheet.append(row)
+                count += 1
+        workbook.save(path)
+    else:
+        raise ValueError('Параметр format должен быть "xlsx" или "csv"')
+    return count
@@ -62,6 +62,7 @@ setup(
     url="https://github.com/tohabyuraev/balltic",
     packages=packages,
     install_requires=requirements,
+    extras_require={'jit': ['numba']},
     classifiers=[_f for _f in CLASSIFIERS],
     python_requires='>=3.6'
 )
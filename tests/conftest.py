@@ -0,0 +1,27 @@
+import pytest
+
+from balltic import ArtilleryGun, Gas, PneumaticGun
+from balltic.config import G_CANNON, P_CANNON
+
+
+@pytest.fixture(scope='session')
+def gun():
+    return PneumaticGun(
+        shell=P_CANNON['shell'],
+        kurant=P_CANNON['kurant'],
+        barrel=P_CANNON['barrel'],
+        chamber=P_CANNON['chamber'],
+        caliber=P_CANNON['caliber'],
+        initialp=P_CANNON['initialp'],
+    )
+
+
+@pytest.fixture(scope='session')
+def gas():
+    return Gas(k=P_CANNON['k'], R=P_CANNON['R'], ro=P_CANNON['ro'])
+
+
+@pytest.fixture(scope='session')
+def artillery_gun():
+    return ArtilleryGun(**{key: value for key, value in G_CANNON.items()
+                           if key != 'nodes'})
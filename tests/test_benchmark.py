@@ -0,0 +1,27 @@
+from balltic.benchmark import compare, read_results, run_benchmarks, \
+    write_results
+
+
+def test_benchmark_roundtrip_and_budget(tmp_path):
+    results = run_benchmarks(nodes=(20, 40), kurants=(0.4,), steps=5,
+                             repeat=1)
+    assert [result.key for result in results] == [
+        ('pneumatic', 'numpy', 20, 0.4), ('pneumatic', 'numpy', 40, 0.4),
+        ('artillery', 'numpy', 20, 0.4), ('artillery', 'numpy', 40, 0.4)]
+    for result in results:
+        assert result.steps == 5 and not result.solved
+        assert result.peak_memory > 0
+        assert result.us_per_cell_step == \
+            1e6 * result.wall_time / (5 * result.nodes)
+
+    write_results(tmp_path / 'bench.json', results)
+    baseline = read_results(tmp_path / 'bench.json')
+    assert baseline == results
+    assert compare(results, baseline, budget=0.0) == []
+
+    faster = [result._replace(us_per_cell_step=result.us_per_cell_step / 2)
+              for result in baseline]
+    regressions = compare(results, faster, budget=0.5)
+    assert [regression.key for regression in regressions] == \
+        [result.key for result in results]
+    assert all(abs(regression.ratio - 2) < 1e-9 for regression in regressions)
@@ -0,0 +1,34 @@
+import numpy as np
+
+from balltic.core.burning import GeometricLaw, TwoStageLaw
+
+
+def test_two_stage_law():
+    # характеристики пороха СФ 033
+    law = TwoStageLaw(0.309, 1.7, 0.743, -0.996, 1.331)
+    zet = np.array([[0.0, 0.5, 1.0], [1.0 + 1e-9, 1.331, 2.0]])
+    psi = law(zet)
+
+    assert psi.shape == zet.shape
+    assert psi[0, 0] == 0
+    assert np.isclose(psi[0, 2], psi[1, 0])
+    assert np.isclose(psi[1, 1], 1, atol=2e-3)
+    assert psi[1, 2] == 1
+
+
+def test_geometric_law():
+    zet = np.linspace(0, 1.5, 151)
+    for law in (GeometricLaw.tube(0.01), GeometricLaw.ribbon(0.1, 0.02),
+                GeometricLaw.cube()):
+        psi = law(zet)
+        assert np.isclose(law(1.0), 1)
+        assert np.all(np.diff(psi) >= 0)
+        assert np.all(psi[zet > 1] == 1)
+
+
+def test_table():
+    law = TwoStageLaw(0.811, 0.081, 0.505, -1.024, 1.488)
+    table = law.tabulate(8193)
+    zet = np.random.default_rng(0).uniform(0, 2, 1000)
+
+    assert np.allclose(table(zet), law(zet), atol=1e-6)
@@ -0,0 +1,64 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from balltic import Diagnostics, PneumaticGrid, SolutionCache, \
+    StepController
+
+
+def _solve(path, gun, gas):
+    return PneumaticGrid(gun, gas, nodes=30,
+                         cache=SolutionCache(path)).muzzle_velocity
+
+
+def test_cache_hit_restores_solution(tmp_path, gun, gas):
+    cache = SolutionCache(str(tmp_path))
+    first = PneumaticGrid(gun, gas, nodes=30, cache=cache)
+    second = PneumaticGrid(gun, gas, nodes=30, cache=cache)
+
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert second.is_solved
+    assert second.muzzle_velocity == first.muzzle_velocity
+    assert np.array_equal(second.shell_velocity, first.shell_velocity)
+    assert np.array_equal(second.press_cell, first.press_cell)
+
+    PneumaticGrid(gun, gas, nodes=30, initialp=6e6, cache=cache)
+    assert cache.misses == 2
+    assert len(cache) == 2
+
+
+def test_checkpoint_after_cache_hit(tmp_path, gun, gas):
+    cache = SolutionCache(str(tmp_path / 'cache'))
+    options = dict(nodes=30, cache=cache, controller=StepController(),
+                   diagnostics=Diagnostics())
+    first = PneumaticGrid(gun, gas, **options)
+    second = PneumaticGrid(gun, gas, **options)
+    assert cache.hits == 1
+
+    path = str(tmp_path / 'state.npz')
+    second.checkpoint(path)
+    resumed = PneumaticGrid.resume(path)
+    assert resumed.is_solved
+    assert resumed.muzzle_velocity == first.muzzle_velocity
+    assert np.array_equal(resumed.shell_velocity, first.shell_velocity)
+    assert np.array_equal(resumed.step_stats.kurant, first.step_stats.kurant)
+    assert resumed.quality == first.quality
+
+
+def test_lru_eviction(tmp_path, gun, gas):
+    cache = SolutionCache(str(tmp_path), max_entries=2)
+    for nodes in (20, 21, 20, 22):
+        PneumaticGrid(gun, gas, nodes=nodes, cache=cache)
+
+    assert len(cache) == 2
+    PneumaticGrid(gun, gas, nodes=20, cache=cache)
+    assert cache.hits == 2
+
+
+def test_shared_between_processes(tmp_path, gun, gas):
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        velocities = list(pool.map(_solve, [str(tmp_path)] * 8,
+                                   [gun] * 8, [gas] * 8))
+
+    assert len(set(velocities)) == 1
+    assert len(SolutionCache(str(tmp_path))) == 1
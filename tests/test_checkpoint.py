@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from balltic import Checkpoint, PneumaticEnsemble, PneumaticGrid, \
+    StepController
+from balltic.core.grid import EulerianGrid
+
+
+@pytest.mark.parametrize('controller', [None, StepController()])
+def test_resume_matches_full_run(tmp_path, controller, gun, gas):
+    path = str(tmp_path / 'state.npz')
+    full = PneumaticGrid(gun, gas, nodes=50, controller=controller)
+    PneumaticGrid(gun, gas, nodes=50, controller=controller,
+                  autosave=Checkpoint(path, every=100))
+
+    # последняя контрольная точка записана до вылета снаряда
+    resumed = EulerianGrid.resume(path, autosave=Checkpoint(path, every=10**6))
+    assert isinstance(resumed, PneumaticGrid)
+    assert resumed.is_solved
+    assert np.array_equal(resumed.time, full.time)
+    assert np.array_equal(resumed.shell_velocity, full.shell_velocity)
+    assert np.array_equal(resumed.press_cell, full.press_cell)
+
+
+def test_solved_checkpoint(tmp_path, gun, gas):
+    path = str(tmp_path / 'solved.npz')
+    solution = PneumaticGrid(gun, gas, nodes=30)
+    solution.checkpoint(path)
+    restored = PneumaticGrid.resume(path)
+    assert np.array_equal(restored.stem_pressure, solution.stem_pressure)
+
+
+def test_ensemble_checkpoint(tmp_path, gun, gas):
+    ensemble = PneumaticEnsemble(gun, gas, nodes=30, initialp=[3e6, 5e6])
+    with pytest.raises(TypeError):
+        ensemble.checkpoint(str(tmp_path / 'ensemble.npz'))
+
+
+def test_resume_restores_events_fields_and_profile(tmp_path, gun, gas):
+    from balltic import Crossing, FieldRecorder, PeakPressure, ShotStart, \
+        open_fields
+
+    half = gun.chamber + (gun.barrel - gun.chamber) / 2
+
+    def make_events():
+        return [ShotStart(), PeakPressure('stem'),
+                Crossing('half', lambda grid: grid.x_interface[-1] - half, 1)]
+
+    path = str(tmp_path / 'state.npz')
+    full = PneumaticGrid(gun, gas, nodes=50, events=make_events())
+    PneumaticGrid(gun, gas, nodes=50, events=make_events(),
+                  autosave=Checkpoint(path, every=100))
+
+    resumed = EulerianGrid.resume(
+        path, autosave=Checkpoint(path, every=10**6), events=make_events(),
+        field_recorder=FieldRecorder(str(tmp_path / 'fields'), every=5),
+        profile=True)
+    assert resumed.events == full.events
+    assert resumed.profile['_update_cells'].calls > 0
+    fields = open_fields(str(tmp_path / 'fields'))
+    assert fields['time'][-1] == resumed.time[-1]
+    assert fields['time'][0] > 0
+
+    with pytest.raises(ValueError):
+        EulerianGrid.resume(path, events=[ShotStart()], solve=False)
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from balltic import convergence
+
+
+def test_convergence(gun, gas):
+    result = convergence(gun, gas, nodes=(25, 50, 100), tolerance=1e-2,
+                         executor='serial')
+    velocity = result.values['muzzle_velocity']
+
+    assert result.nodes.tolist() == [25, 50, 100]
+    assert result.order['muzzle_velocity'] > 0.5
+    assert np.all(np.diff(result.error['muzzle_velocity']) < 0)
+    assert abs(result.extrapolated['muzzle_velocity'] - velocity[-1]) \
+        < abs(velocity[-1] - velocity[0])
+    assert result.recommended in result.nodes
+
+
+def test_estimated_nodes(gun, gas):
+    result = convergence(gun, gas, nodes=(25, 50, 100), tolerance=1e-4,
+                         executor='serial')
+    assert result.recommended > 100
+
+
+def test_too_few_grids(gun, gas):
+    with pytest.raises(ValueError):
+        convergence(gun, gas, nodes=(50, 100))
@@ -0,0 +1,53 @@
+import numpy as np
+
+from balltic import ArtilleryGrid, Checkpoint, Diagnostics, PneumaticGrid, \
+    SolutionCache
+from balltic.core.grid import EulerianGrid
+
+
+def test_quality_summary(gun, gas):
+    plain = PneumaticGrid(gun, gas, nodes=50)
+    checked = PneumaticGrid(gun, gas, nodes=50,
+                            diagnostics=Diagnostics(every=1))
+    assert np.array_equal(plain.shell_velocity, checked.shell_velocity)
+
+    quality = checked.quality
+    assert quality.steps == len(checked.time)
+    assert quality.finite and not quality.suspect
+    assert 0 < quality.mass_error < 0.05
+    assert abs(quality.mass / quality.initial_mass - 1) <= quality.mass_error
+    assert quality.min_density > 0 and quality.min_pressure > 0
+    assert np.isclose(quality.max_cfl, gun.kurant, rtol=0.05)
+
+    strict = PneumaticGrid(gun, gas, nodes=50, diagnostics=Diagnostics(
+        every=10, mass_tolerance=1e-4, max_mach=0.5))
+    assert strict.quality.flags == ('mass', 'mach')
+    assert strict.quality.steps == len(checked.time)
+    # экстремумы проверяются на каждом шаге, масса и энергия - выборочно
+    for name in ('min_density', 'min_pressure', 'max_mach', 'max_cfl'):
+        assert getattr(strict.quality, name) == getattr(quality, name)
+
+
+def test_artillery_energy_includes_powder(artillery_gun):
+    solution = ArtilleryGrid(artillery_gun, '16\\1 тр', nodes=50,
+                             diagnostics=Diagnostics())
+    assert np.isclose(solution.quality.initial_mass,
+                      artillery_gun.omega_q * artillery_gun.shell, rtol=1e-12)
+    assert 0 < solution.quality.energy_error < 0.1
+    assert not solution.quality.suspect
+
+
+def test_quality_survives_checkpoint_and_cache(tmp_path, gun, gas):
+    path = str(tmp_path / 'state.npz')
+    full = PneumaticGrid(gun, gas, nodes=40, diagnostics=Diagnostics())
+    PneumaticGrid(gun, gas, nodes=40, diagnostics=Diagnostics(),
+                  autosave=Checkpoint(path, every=100))
+    resumed = EulerianGrid.resume(path, autosave=Checkpoint(path, every=10**6))
+    assert resumed.quality == full.quality
+
+    cache = SolutionCache(str(tmp_path / 'cache'))
+    PneumaticGrid(gun, gas, nodes=40, diagnostics=Diagnostics(), cache=cache)
+    cached = PneumaticGrid(gun, gas, nodes=40, diagnostics=Diagnostics(),
+                           cache=cache)
+    assert cache.hits == 1
+    assert cached.quality == full.quality
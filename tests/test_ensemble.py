@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from balltic import PneumaticGrid, PneumaticEnsemble
+
+
+def test_ensemble_matches_single_runs(gun, gas):
+    initialp = np.array([3e6, 5e6, 8e6])
+    barrel = np.array([2.0, 1.5, 2.5])
+    ensemble = PneumaticEnsemble(gun, gas, nodes=50,
+                                 initialp=initialp, barrel=barrel)
+
+    assert ensemble.time.shape[1] == 3
+    for i in range(3):
+        single = PneumaticGrid(gun, gas, nodes=50,
+                               initialp=initialp[i], barrel=barrel[i])
+        assert ensemble.steps[i] == len(single.time)
+        assert np.allclose(
+            ensemble.shell_velocity[:ensemble.steps[i], i],
+            single.shell_velocity
+        )
+        assert np.isclose(ensemble.muzzle_velocity[i],
+                          single.muzzle_velocity)
+        assert np.isclose(ensemble.muzzle_time[i], single.muzzle_time)
+        assert np.isclose(ensemble.max_stem_pressure[i],
+                          max(single.stem_pressure))
+    assert not ensemble.failed.any()
+
+
+def test_ensemble_rejects_stepwise_api(tmp_path, gun, gas):
+    ensemble = PneumaticEnsemble(gun, gas, nodes=30, initialp=[3e6, 5e6])
+    with pytest.raises(TypeError):
+        ensemble.iter_steps()
+    with pytest.raises(TypeError):
+        ensemble.checkpoint(str(tmp_path / 'ensemble.npz'))
@@ -0,0 +1,34 @@
+import numpy as np
+
+from balltic import Crossing, PeakPressure, PneumaticGrid, ShotStart
+
+
+def test_muzzle_exit_interpolation(gun, gas):
+    fine = PneumaticGrid(gun, gas, nodes=400)
+    coarse = PneumaticGrid(gun, gas, nodes=40)
+
+    muzzle = coarse.events['muzzle']
+    assert muzzle.shell_position == gun.barrel
+    assert coarse.time[-2] < coarse.muzzle_time <= coarse.time[-1]
+    assert coarse.shell_velocity[-2] < coarse.muzzle_velocity \
+        <= coarse.shell_velocity[-1]
+    assert abs(coarse.muzzle_velocity - fine.muzzle_velocity) \
+        < abs(coarse.shell_velocity[-1] - fine.muzzle_velocity)
+
+
+def test_user_events(gun, gas):
+    half = gun.chamber + (gun.barrel - gun.chamber) / 2
+    solution = PneumaticGrid(gun, gas, nodes=40, events=[
+        ShotStart(),
+        PeakPressure('stem'),
+        Crossing('half', lambda grid: grid.x_interface[-1] - half, 1),
+    ])
+
+    assert solution.events['shot_start'].time == 0.0
+    peak = solution.events['peak_stem_pressure']
+    assert peak.stem_pressure >= max(solution.stem_pressure)
+    assert np.isclose(peak.stem_pressure, max(solution.stem_pressure),
+                      rtol=1e-2)
+    assert np.isclose(solution.events['half'].shell_position, half,
+                      rtol=1e-4)
+    assert 0 < solution.events['half'].time < solution.muzzle_time
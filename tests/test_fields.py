@@ -0,0 +1,45 @@
+import numpy as np
+
+from balltic import FieldRecorder, PneumaticEnsemble, PneumaticGrid, \
+    open_fields
+
+
+def test_field_recorder(tmp_path, gun, gas):
+    path = str(tmp_path / 'fields')
+    recorder = FieldRecorder(path, every=7, chunk=16)
+    solver = PneumaticGrid(gun, gas, nodes=40, solve=False,
+                           field_recorder=recorder)
+    snapshots = {state.step: state.fields['press_cell'].copy()
+                 for state in solver.iter_steps(every=7, fields=True)}
+    fields = open_fields(path)
+    steps = len(solver.time)
+
+    assert set(fields) == {'time', 'x_interface', 'press_cell',
+                           'ro_cell', 'v_cell'}
+    assert isinstance(fields['press_cell'], np.memmap)
+    assert fields['press_cell'].shape == (steps // 7 + 1, 40)
+    assert fields['x_interface'].shape[1] == 39
+    assert fields['time'][-1] == solver.time[-1]
+    assert fields['x_interface'][-1, -1] == solver.shell_position[-1]
+    assert np.array_equal(fields['press_cell'][0], snapshots[7])
+    assert np.array_equal(fields['press_cell'][-1], solver.press_cell)
+
+
+def test_ensemble_fields(tmp_path, gun, gas):
+    path = str(tmp_path / 'ensemble')
+    ensemble = PneumaticEnsemble(gun, gas, nodes=30,
+                                 barrel=[2.0, 1.0],
+                                 field_recorder=FieldRecorder(path, every=5))
+    fields = open_fields(path)
+
+    assert fields['press_cell'].shape[1:] == (2, 30)
+    assert fields['time'].shape[1:] == (2,)
+    finished = fields['time'][:, 1]
+    # расчет с коротким стволом завершается раньше
+    assert ensemble.steps[1] < ensemble.steps[0]
+    assert np.isnan(finished[-1])
+    assert np.count_nonzero(~np.isnan(finished)) == ensemble.steps[1] // 5
+    # последний шаг записан, хотя прореживание его пропускает
+    assert ensemble.steps[0] % 5
+    assert fields['time'].shape[0] == ensemble.steps[0] // 5 + 1
+    assert fields['x_interface'][-1, 0, -1] >= 2.0
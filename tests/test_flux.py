@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from balltic import PneumaticGrid
+from balltic.core.flux import SCHEMES, ausm_split, get_scheme
+
+
+def test_ausm_split():
+    mach = np.linspace(-3, 3, 601)
+    split = ausm_split(mach, mach, np.empty((4, mach.size)))
+    sub = np.abs(mach) < 1
+
+    assert np.allclose(split[0][~sub], 0.5 * (mach + np.abs(mach))[~sub])
+    assert np.allclose(split[1][~sub], 0.5 * (mach - np.abs(mach))[~sub])
+    assert np.allclose(split[2][~sub], (mach > 0)[~sub])
+    assert np.allclose(split[3][~sub], (mach < 0)[~sub])
+    assert np.allclose(split[0][sub], (0.25 * (mach + 1) ** 2
+                                       * (1 + 0.5 * (mach - 1) ** 2))[sub])
+    # полиномы непрерывны, а сумма функций давления равна единице
+    assert np.allclose(split[2] + split[3], 1)
+    assert np.allclose(split[0] + split[1], mach)
+
+
+def test_ausm_split_in_place():
+    import tracemalloc
+
+    mach = np.linspace(-3, 3, 100001)
+    expected = ausm_split(mach, mach[::-1], np.empty((4, mach.size)))
+    out, work = np.empty((4, mach.size)), np.empty((3, mach.size))
+    mask = np.empty(mach.size, dtype=bool)
+    tracemalloc.start()
+    try:
+        ausm_split(mach, mach[::-1], out, work=work, mask=mask)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert np.array_equal(out, expected)
+    assert peak < mach.nbytes / 10
+
+
+@pytest.mark.parametrize('scheme', list(SCHEMES))
+def test_schemes(scheme, gun, gas):
+    reference = PneumaticGrid(gun, gas, nodes=50)
+    solution = PneumaticGrid(gun, gas, nodes=50, scheme=scheme)
+
+    assert np.isclose(solution.shell_velocity[-1],
+                      reference.shell_velocity[-1], rtol=0.01)
+
+
+def test_unknown_scheme():
+    with pytest.raises(ValueError):
+        get_scheme('roe')
@@ -1,4 +1,72 @@
 # from balltic.core.gpowder import GunPowder, GPOWDER_KEYS
+import json
+
+import pytest
+
 from balltic import GunPowder
 
 gpowder = GunPowder('16\\1 тр')
+
+
+def test_registry_interns_powders():
+    assert GunPowder('16\\1 тр') is gpowder
+    assert gpowder.f == 1.004e6
+    assert gpowder.I_k == 1.13e6
+    with pytest.raises(AttributeError):
+        gpowder.f = 0.0
+
+
+def test_registry_columns_and_snapshot(tmp_path):
+    from balltic.core.gunpowder import DATABASE_PATH, PowderRegistry, \
+        registry
+
+    i = registry.index('16\\1 тр')
+    assert registry.columns['alpha_k'][i] == gpowder.alpha_k
+    with open(DATABASE_PATH, encoding='utf-8') as file_:
+        assert len(registry) == len(json.load(file_))
+
+    snapshot = str(tmp_path / 'powders.npz')
+    registry.save_snapshot(snapshot)
+    copy = PowderRegistry(snapshot=snapshot)
+    assert copy.names == registry.names
+    assert copy.record('16\\1 тр') == registry.record('16\\1 тр')
+
+
+def test_registry_rejects_incomplete_powder():
+    with pytest.raises(ValueError):
+        GunPowder('НБ')
+
+
+def test_registry_query():
+    from balltic.core.gunpowder import registry
+
+    names = registry.query(I_k=(0.5, 1.5), f=(1.0, None), sort_by='alpha_k')
+    raw = registry.raw
+    for name in registry.names:
+        i = registry.index(name)
+        selected = 0.5 <= raw['I_k'][i] <= 1.5 and raw['f'][i] >= 1.0
+        assert (name in names) == selected
+    alpha = [raw['alpha_k'][registry.index(name)] for name in names]
+    assert alpha == sorted(alpha)
+    assert registry.query(I_k=1.13, limit=1) == ['16\\1 тр']
+
+
+def test_add_and_delete_update_registry(tmp_path, monkeypatch):
+    import shutil
+    import balltic.powders as powders
+    from balltic.core.gunpowder import DATABASE_PATH, PowderRegistry
+
+    path = str(tmp_path / 'gpowders.json')
+    shutil.copy(DATABASE_PATH, path)
+    local = PowderRegistry(path, snapshot=str(tmp_path / 'powders.npz'))
+    monkeypatch.setattr(powders, 'PATH', path)
+    monkeypatch.setattr(powders, 'registry', local)
+
+    record = dict(local.record('16\\1 тр'), name='Опытный', f=1.1)
+    assert local.get('16\\1 тр') is local.get('16\\1 тр')
+    assert powders.add('Опытный', record)
+    assert powders.check('Опытный')
+    assert local.get('Опытный').f == 1.1e6
+    assert powders.delete('Опытный')
+    assert not powders.check('Опытный')
+    assert not powders.delete('Опытный')
@@ -0,0 +1,28 @@
+import numpy as np
+
+from balltic import PneumaticGrid, PneumaticEnsemble
+
+
+def test_workspace_is_reused(gun, gas):
+    solution = PneumaticGrid(gun, gas, nodes=30)
+    press_cell = solution.press_cell
+    x_interface = solution.x_interface
+    solution._move_grid()
+    solution._update_cells()
+
+    assert solution.press_cell is press_cell
+    assert solution.x_interface is x_interface
+    assert np.shares_memory(solution.ro_cell, solution.q_param)
+    assert np.shares_memory(solution.F_param_m, solution.F_param_p)
+    assert np.array_equal(
+        solution.x_interface,
+        np.linspace(0, solution.x_interface[-1], solution.nodes - 1)
+    )
+
+
+def test_workspace_after_compaction(gun, gas):
+    ensemble = PneumaticEnsemble(gun, gas, nodes=30,
+                                 initialp=[3e6, 5e6, 8e6, 4e6])
+    for initialp, steps in zip([3e6, 8e6], ensemble.steps[[0, 2]]):
+        single = PneumaticGrid(gun, gas, nodes=30, initialp=initialp)
+        assert len(single.time) == steps
@@ -0,0 +1,36 @@
+import numpy as np
+
+from balltic import History, PneumaticGrid
+
+
+def test_every(gun, gas):
+    full = PneumaticGrid(gun, gas, nodes=50)
+    sparse = PneumaticGrid(gun, gas, nodes=50, history=History(every=10))
+
+    assert isinstance(full.time, np.ndarray)
+    every = full.shell_velocity[::10]
+    assert np.allclose(sparse.shell_velocity[:len(every)], every)
+    assert sparse.shell_velocity[-1] == full.shell_velocity[-1]
+    assert sparse.time[-1] == full.time[-1]
+
+
+def test_interval_and_rtol(gun, gas):
+    interval = PneumaticGrid(gun, gas, nodes=50,
+                             history=History(interval=1e-3))
+    assert np.all(np.diff(interval.time[:-1]) >= 1e-3)
+
+    full = PneumaticGrid(gun, gas, nodes=50)
+    adaptive = PneumaticGrid(gun, gas, nodes=50, history=History(rtol=0.05))
+    assert len(adaptive.time) < len(full.time)
+    assert adaptive.shell_velocity[-1] == full.shell_velocity[-1]
+
+
+def test_scalars_only(gun, gas):
+    full = PneumaticGrid(gun, gas, nodes=50)
+    policy = History(scalars_only=True, chunk=16)
+    solution = PneumaticGrid(gun, gas, nodes=50, history=policy)
+
+    assert solution.shell_velocity.shape == (1,)
+    assert solution.shell_velocity[-1] == full.shell_velocity[-1]
+    maximum = dict(zip(solution.history.names, solution.history.maximum))
+    assert maximum['stem_pressure'] == max(full.stem_pressure)
@@ -0,0 +1,26 @@
+import numpy as np
+
+from balltic import PneumaticGrid, inverse
+
+
+def test_inverse_hits_target(gun, gas):
+    result = inverse(gun, gas, 200.0, parameter='initialp', nodes=40,
+                     tolerance=1e-4, executor='serial')
+
+    assert result.converged
+    assert result.solves == result.parameters.size <= 40
+    low, high = result.bracket
+    assert low <= result.value <= high
+    single = PneumaticGrid(gun, gas, nodes=40, initialp=result.value)
+    assert np.isclose(single.muzzle_velocity, 200.0, rtol=1e-4)
+
+
+def test_warm_start_reuses_evaluations(gun, gas):
+    first = inverse(gun, gas, 200.0, parameter='initialp', nodes=40,
+                    executor='serial')
+    second = inverse(gun, gas, 205.0, parameter='initialp', nodes=40,
+                     guess=first, executor='serial')
+
+    assert second.converged
+    assert second.solves < first.solves
+    assert second.parameters.size == first.parameters.size + second.solves
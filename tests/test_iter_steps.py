@@ -0,0 +1,31 @@
+import numpy as np
+
+from balltic import PneumaticGrid
+
+
+def test_iter_steps_matches_constructor(gun, gas):
+    full = PneumaticGrid(gun, gas, nodes=40)
+    solver = PneumaticGrid(gun, gas, nodes=40, solve=False)
+    assert not solver.is_solved
+
+    states = list(solver.iter_steps(every=10))
+    assert solver.is_solved
+    assert states[-1].step == len(full.time)
+    assert states[-1].shell_velocity == full.shell_velocity[-1]
+    assert [state.time for state in states[:-1]] == full.time[9::10].tolist()
+    assert np.array_equal(solver.shell_velocity, full.shell_velocity)
+
+
+def test_stop_and_continue(gun, gas):
+    full = PneumaticGrid(gun, gas, nodes=40)
+    solver = PneumaticGrid(gun, gas, nodes=40, solve=False)
+    for state in solver.iter_steps(fields=True):
+        assert state.fields['press_cell'].shape == (40,)
+        if state.step == 100:
+            break
+    assert not solver.is_solved
+    assert state.shell_position == full.shell_position[99]
+
+    solver.solve()
+    assert solver.is_solved
+    assert np.array_equal(solver.stem_pressure, full.stem_pressure)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from balltic import ArtilleryGrid, PneumaticGrid
+from balltic.core import jit
+
+
+def test_numba_matches_numpy(gun, gas):
+    pytest.importorskip('numba')
+    numpy_ = PneumaticGrid(gun, gas, nodes=50)
+    numba_ = PneumaticGrid(gun, gas, nodes=50, backend='numba')
+
+    assert numba_.backend == 'numba'
+    assert len(numba_.time) == len(numpy_.time)
+    assert np.allclose(numba_.shell_velocity, numpy_.shell_velocity)
+    assert np.allclose(numba_.press_cell, numpy_.press_cell)
+
+
+def test_artillery_numba_matches_numpy(artillery_gun):
+    pytest.importorskip('numba')
+    numpy_ = ArtilleryGrid(artillery_gun, '16\\1 тр', nodes=50)
+    numba_ = ArtilleryGrid(artillery_gun, '16\\1 тр', nodes=50,
+                           backend='numba')
+
+    assert numba_.backend == 'numba'
+    assert len(numba_.time) == len(numpy_.time)
+    assert np.allclose(numba_.shell_velocity, numpy_.shell_velocity)
+    assert np.allclose(numba_.press_cell, numpy_.press_cell)
+    assert np.allclose(numba_.zet_cell, numpy_.zet_cell)
+
+
+def test_fallback_without_numba(monkeypatch, gun, gas):
+    monkeypatch.setattr(jit, 'numba', None)
+    with pytest.warns(RuntimeWarning):
+        solution = PneumaticGrid(gun, gas, nodes=30, backend='numba')
+    assert solution.backend == 'numpy'
+
+
+def test_unsupported_scheme(gun, gas):
+    pytest.importorskip('numba')
+    with pytest.raises(ValueError):
+        PneumaticGrid(gun, gas, nodes=30, scheme='hllc', backend='numba')
+    with pytest.raises(ValueError):
+        PneumaticGrid(gun, gas, nodes=30, backend='cuda')
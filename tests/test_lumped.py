@@ -0,0 +1,44 @@
+import numpy as np
+
+from balltic import ArtilleryGrid, ArtilleryLumped, cross_check
+
+POWDER = '16\\1 тр'
+
+
+def test_batch_matches_single(artillery_gun):
+    batch = ArtilleryLumped(artillery_gun, POWDER, omega_q=[0.2, 0.257, 0.3])
+    single = ArtilleryLumped(artillery_gun, POWDER)
+    assert batch.muzzle_velocity.shape == (3,)
+    assert not batch.failed.any()
+    assert np.all(np.diff(batch.muzzle_velocity) > 0)
+    assert np.isclose(batch.muzzle_velocity[1], single.muzzle_velocity[0],
+                      rtol=1e-6)
+    assert np.isclose(batch.max_pressure[1], single.max_pressure[0],
+                      rtol=1e-6)
+
+
+def test_history_ends_at_muzzle(artillery_gun):
+    solution = ArtilleryLumped(artillery_gun, POWDER, omega_q=[0.2, 0.3],
+                               history=True)
+    for i in range(2):
+        time = solution.time[:, i]
+        last = np.flatnonzero(~np.isnan(time))[-1]
+        assert np.all(np.diff(time[:last + 1]) > 0)
+        assert time[last] == solution.muzzle_time[i]
+        assert solution.shell_velocity[last, i] == \
+            solution.muzzle_velocity[i]
+
+
+def test_never_starts_is_failed(artillery_gun):
+    solution = ArtilleryLumped(artillery_gun, POWDER,
+                               boostp=[artillery_gun.boostp, 1e10])
+    assert solution.failed.tolist() == [False, True]
+
+
+def test_cross_check_against_grid(artillery_gun):
+    result = cross_check(artillery_gun, POWDER, nodes=50, omega_q=[0.257])
+    grid = ArtilleryGrid(artillery_gun, POWDER, nodes=50).solve()
+    assert np.isclose(result.grid['muzzle_velocity'][0],
+                      grid.muzzle_velocity, rtol=1e-3)
+    assert abs(result.error['muzzle_velocity'][0]) < 0.05
+    assert abs(result.error['max_stem_pressure'][0]) < 0.2
@@ -0,0 +1,51 @@
+import numpy as np
+
+from balltic import PressureLevel
+
+
+def test_batched_matches_scalar(artillery_gun):
+    velocities = [500, 700.0, 950, 1200]
+    guns = [artillery_gun._replace(caliber=caliber)
+            for caliber in (0.057, 0.076)]
+    batch = PressureLevel(guns, np.array(velocities)[:, np.newaxis])
+
+    assert batch.maximum.shape == (4, 2)
+    for i, velocity in enumerate(velocities):
+        for j, gun in enumerate(guns):
+            single = PressureLevel(gun, velocity)
+            for name in ('ce', 'cq', 'ce15', 'omega_q', 'maximum'):
+                value = np.broadcast_to(getattr(batch, name), (4, 2))[i, j]
+                assert np.isclose(value, getattr(single, name), rtol=1e-14)
+
+
+def test_chuev_tables_loaded_once(artillery_gun):
+    first = PressureLevel(artillery_gun, 700)
+    second = PressureLevel(artillery_gun, 800)
+    assert first.table_ce is second.table_ce
+    assert not first.table_ce.flags.writeable
+
+
+def test_export_levels(tmp_path, artillery_gun):
+    import csv
+
+    import openpyxl
+
+    from balltic import export_levels
+
+    levels = (PressureLevel(artillery_gun, np.linspace(500, 900, 5) + shift)
+              for shift in (0, 1))
+    assert export_levels(levels, str(tmp_path / 'levels.csv')) == 10
+    with open(tmp_path / 'levels.csv', encoding='utf-8') as file_:
+        rows = list(csv.reader(file_))
+    assert len(rows) == 11
+    assert float(rows[1][-1]) == PressureLevel(artillery_gun, 500.0).maximum
+
+    PressureLevel(artillery_gun, 700).to_excel(str(tmp_path / 'level.xlsx'))
+    worksheet = openpyxl.load_workbook(tmp_path / 'level.xlsx').active
+    level = PressureLevel(artillery_gun, 700)
+    assert worksheet['A1'].value == 'C_q, кг/дм3'
+    assert worksheet['B1'].value == level.cq
+    assert worksheet['A4'].value == 'C_e15, тм/дм3'
+    pairs = dict(worksheet.iter_rows(values_only=True))
+    assert pairs['v_0, м/с'] == 700
+    assert pairs['p_max, Па'] == level.maximum
@@ -1,23 +1,20 @@
 import math
 
-import pytest
-
-from balltic import Pneumatic
+from balltic import Gas, PneumaticGrid, PneumaticGun
 from balltic.config import P_CANNON
-from .dataset import PNEUMATIC_CANNON as cannon
 
-def test_init():
-    sol = Pneumatic(cannon, nodes=350, barrel=5.098)
+GAS = Gas(**{key: P_CANNON[key] for key in Gas._fields})
+GUN = PneumaticGun(**{key: P_CANNON[key] for key in PneumaticGun._fields
+                      if key in P_CANNON})
 
-    assert sol.default == PNEUMATIC_CANNON
 
-    assert sol.nodes == 350
-    assert sol.press == cannon['initialp']
-    assert sol.ro == cannon['ro']
-    assert sol.chamber == cannon['chamber']
-    assert sol.barrel == 5.098
-    assert sol.square == math.pi * cannon['caliber'] ** 2 / 4
-    assert sol.shell == sol.default['shell']
-    assert sol.k == cannon['k']
-    assert sol.kurant == cannon['Ku']
-    assert sol.R == cannon['R']
+def test_init():
+    sol = PneumaticGrid(GUN, GAS, nodes=35, barrel=1.5, solve=False)
+
+    assert sol.nodes == 35
+    assert sol.gun.barrel == 1.5
+    assert sol.gun.chamber == P_CANNON['chamber']
+    assert sol.gun.initialp == P_CANNON['initialp']
+    assert sol.gun.cs_area == math.pi * P_CANNON['caliber'] ** 2 / 4
+    assert sol.gas == GAS
+    assert not sol.is_solved
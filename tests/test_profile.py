@@ -0,0 +1,42 @@
+import numpy as np
+
+from balltic import ArtilleryGrid, History, PneumaticGrid
+
+
+def test_profile_counts_phases(gun, gas):
+    plain = PneumaticGrid(gun, gas, nodes=40)
+    profiled = PneumaticGrid(gun, gas, nodes=40, profile=True)
+    assert plain.profile is None
+    assert np.array_equal(plain.shell_velocity, profiled.shell_velocity)
+
+    steps = len(profiled.time)
+    profile = profiled.profile
+    # начальная сетка строится до первого шага
+    assert profile['_new_x_interfaces'].calls == steps + 1
+    for name in ('_move_grid', '_calculate_tau', '_end_vel_x',
+                 '_velocity_parameters', '_get_mah_press_interface',
+                 '_get_F', '_get_f', '_get_q', 'history'):
+        assert profile[name].calls == steps
+        assert profile[name].time > 0
+    assert '_psi' not in profile
+    assert profile['_move_grid'].time >= profile['_calculate_tau'].time
+
+
+def test_profile_artillery_burning(artillery_gun):
+    solution = ArtilleryGrid(artillery_gun, '16\\1 тр', nodes=30, profile=True)
+    assert solution.profile['_psi'].calls == \
+        solution.profile['_get_q'].calls
+
+
+def test_profile_shared_history(gun, gas):
+    policy = History(every=2)
+    first = PneumaticGrid(gun, gas, nodes=30, history=policy, profile=True)
+    second = PneumaticGrid(gun, gas, nodes=40, history=policy, profile=True)
+    third = PneumaticGrid(gun, gas, nodes=30, history=first.history,
+                          profile=True)
+    assert 'record' not in vars(policy)
+    for solution in (first, second, third):
+        assert 'record' not in vars(solution.history)
+        steps = solution.profile['_move_grid'].calls
+        assert solution.profile['history'].calls == steps
+    assert np.array_equal(third.shell_velocity, first.shell_velocity)
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from balltic import ArtilleryGrid, Checkpoint, MUSCL, PneumaticGrid, \
+    SolutionCache
+from balltic.core.grid import EulerianGrid
+from balltic.core.reconstruction import LIMITERS
+
+
+@pytest.mark.parametrize('name', list(LIMITERS))
+def test_limiters(name):
+    limit = LIMITERS[name]
+    a = np.array([1.0, 2.0, -1.0, 1.0, 0.0, -3.0])
+    b = np.array([1.0, 1.0, -2.0, -1.0, 2.0, -1.0])
+    slope = limit(a, b)
+    # нулевой наклон в экстремумах, знак и величина разностей иначе
+    assert np.array_equal(slope[[3, 4]], [0.0, 0.0])
+    assert slope[0] == 1.0
+    assert np.all(np.sign(slope[[1, 2, 5]]) == np.sign(a[[1, 2, 5]]))
+    assert np.all(np.abs(slope) <= 2 * np.minimum(np.abs(a), np.abs(b)))
+
+
+def test_invalid_reconstruction(gun, gas):
+    with pytest.raises(ValueError):
+        MUSCL('superbee')
+    with pytest.raises(ValueError):
+        PneumaticGrid(gun, gas, nodes=20, reconstruction='upwind')
+    with pytest.raises(ValueError):
+        PneumaticGrid(gun, gas, nodes=20, reconstruction='minmod',
+                      backend='numba', solve=False)
+
+
+def test_muscl_converges_faster(gun, gas):
+    reference = PneumaticGrid(gun, gas, nodes=400).muzzle_velocity
+    first = PneumaticGrid(gun, gas, nodes=50).muzzle_velocity
+    for limiter in LIMITERS:
+        second = PneumaticGrid(gun, gas, nodes=50, reconstruction=limiter)
+        assert second.reconstruction.limiter == limiter
+        assert abs(second.muzzle_velocity - reference) \
+            < abs(first - reference) / 2
+
+
+def test_muscl_second_order(gun, gas):
+    reference = PneumaticGrid(gun, gas, nodes=800,
+                              reconstruction='minmod').muzzle_velocity
+    errors = [abs(PneumaticGrid(gun, gas, nodes=nodes,
+                                reconstruction='minmod').muzzle_velocity
+                  - reference) for nodes in (25, 50, 100)]
+    orders = np.log2(np.array(errors[:-1]) / np.array(errors[1:]))
+    assert np.all(orders > 1.3)
+
+
+def test_artillery_muscl(artillery_gun):
+    powder = '16\\1 тр'
+    first = ArtilleryGrid(artillery_gun, powder, nodes=30, scheme='hllc')
+    second = ArtilleryGrid(artillery_gun, powder, nodes=30, scheme='hllc',
+                           reconstruction=MUSCL('mc'))
+    reference = ArtilleryGrid(artillery_gun, powder, nodes=120, scheme='hllc')
+    assert np.all(np.isfinite(second.press_cell))
+    assert abs(second.muzzle_velocity - reference.muzzle_velocity) \
+        < abs(first.muzzle_velocity - reference.muzzle_velocity)
+    with pytest.raises(ValueError):
+        ArtilleryGrid(artillery_gun, powder, nodes=30,
+                      reconstruction='minmod', solve=False)
+
+
+def test_reconstruction_survives_checkpoint_and_cache(tmp_path, gun, gas):
+    path = str(tmp_path / 'state.npz')
+    full = PneumaticGrid(gun, gas, nodes=40, reconstruction='vanleer')
+    PneumaticGrid(gun, gas, nodes=40, reconstruction='vanleer',
+                  autosave=Checkpoint(path, every=100))
+    resumed = EulerianGrid.resume(path, autosave=Checkpoint(path, every=10**6))
+    assert resumed.reconstruction.limiter == 'vanleer'
+    assert np.array_equal(resumed.shell_velocity, full.shell_velocity)
+
+    cache = SolutionCache(str(tmp_path / 'cache'))
+    PneumaticGrid(gun, gas, nodes=40, cache=cache)
+    PneumaticGrid(gun, gas, nodes=40, reconstruction='mc', cache=cache)
+    assert cache.hits == 0
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from balltic import PneumaticGrid, StepController
+
+
+def test_fixed_kurant_stats(gun, gas):
+    fixed = PneumaticGrid(gun, gas, nodes=50)
+    solution = PneumaticGrid(gun, gas, nodes=50,
+                             controller=StepController(kurant_max=gun.kurant))
+    stats = solution.step_stats
+
+    assert np.array_equal(solution.shell_velocity, fixed.shell_velocity)
+    assert stats.tau.shape == solution.time.shape
+    assert np.allclose(np.cumsum(stats.tau), solution.time)
+    assert np.all(stats.kurant == gun.kurant)
+    assert np.all((stats.limiting_cell > 0) & (stats.limiting_cell < 49))
+    assert stats.rejected == 0
+
+
+def test_adaptive_kurant(gun, gas):
+    fixed = PneumaticGrid(gun, gas, nodes=100)
+    solution = PneumaticGrid(gun, gas, nodes=100,
+                             controller=StepController())
+    stats = solution.step_stats
+
+    assert len(solution.time) < len(fixed.time)
+    assert stats.kurant.max() <= 0.9
+    assert stats.kurant.min() >= gun.kurant
+    assert np.isclose(solution.shell_velocity[-1], fixed.shell_velocity[-1],
+                      rtol=1e-2)
+
+
+def test_kurant_bound():
+    with pytest.raises(ValueError):
+        StepController(kurant_max=1.5)
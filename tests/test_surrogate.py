@@ -0,0 +1,46 @@
+import numpy as np
+
+from balltic import Surrogate, surrogate, sweep
+
+POWDER = '16\\1 тр'
+
+
+def test_surrogate_interpolates_samples(tmp_path, artillery_gun):
+    table = surrogate(artillery_gun, POWDER, omega_q=(0.2, 0.4),
+                      denload=(700, 800), points=4, tolerance=None,
+                      executor='serial', nodes=20)
+    assert table.samples == table.solves == 16
+
+    omega_q, denload = np.meshgrid(table.axes['omega_q'],
+                                   table.axes['denload'], indexing='ij')
+    result = table.query(omega_q=omega_q, denload=denload)
+    assert np.allclose(result.values['muzzle_velocity'],
+                       table.values['muzzle_velocity'], rtol=1e-12)
+    assert np.allclose(result.error['muzzle_velocity'], 0, atol=1e-9)
+
+    direct = sweep(artillery_gun, POWDER, executor='serial', history=False,
+                   nodes=20, omega_q=0.33, denload=750)
+    middle = table.query(omega_q=0.33, denload=750)
+    assert abs(middle.values['muzzle_velocity'] / direct.muzzle_velocity[0]
+               - 1) < 1e-2
+    assert np.isnan(table.query(omega_q=0.5, denload=750)
+                    .values['muzzle_velocity'])
+
+    table.save(tmp_path / 'table.npz')
+    loaded = Surrogate.load(tmp_path / 'table.npz')
+    assert loaded.gun == artillery_gun
+    assert loaded.names == ('omega_q', 'denload')
+    point = dict(omega_q=[0.25, 0.35], denload=720)
+    assert np.array_equal(
+        loaded.query(**point).values['max_stem_pressure'],
+        table.query(**point).values['max_stem_pressure'])
+
+
+def test_refine_adds_samples_where_error_is_high(artillery_gun):
+    table = surrogate(artillery_gun, POWDER, omega_q=(0.2, 0.5), points=3,
+                      tolerance=None, executor='serial', nodes=20)
+    before = table.axis_error('omega_q').max()
+    table.refine(tolerance=1e-4, max_samples=9, executor='serial')
+    assert 3 < table.samples <= 9
+    assert np.all(np.diff(table.axes['omega_q']) > 0)
+    assert table.axis_error('omega_q').max() < before
@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+import pytest
+
+from balltic import PneumaticGun, PneumaticGrid, sweep
+
+
+@pytest.mark.parametrize('executor', ['serial', 'thread', 'process'])
+def test_sweep(executor, gun, gas):
+    result = sweep(gun, gas, executor=executor, workers=2,
+                   initialp=[4e6, 6e6], nodes=[30, 40])
+
+    assert result.muzzle_velocity.shape == (4,)
+    assert result.shell_velocity.shape[0] == 4
+    for i in range(4):
+        single = PneumaticGrid(gun, gas,
+                               nodes=int(result.parameters['nodes'][i]),
+                               initialp=result.parameters['initialp'][i])
+        assert result.steps[i] == len(single.time)
+        assert np.isclose(result.muzzle_velocity[i], single.muzzle_velocity)
+        assert np.allclose(result.shell_velocity[i, :result.steps[i]],
+                           single.shell_velocity)
+        assert np.isnan(result.shell_velocity[i, result.steps[i]:]).all()
+
+
+def test_sweep_rejects_unknown_parameter(gun, gas):
+    with pytest.raises(ValueError):
+        sweep(gun, gas, executor='serial', omega_q=[0.2])
+
+
+def test_sweep_over_powders(artillery_gun):
+    from balltic.core.gunpowder import registry
+
+    powders = registry.query(I_k=(1.0, 1.2), limit=2)
+    result = sweep(artillery_gun, powders, executor='serial', history=False,
+                   nodes=30, omega_q=[0.25, 0.26])
+
+    assert result.parameters['medium'].tolist() == [0, 1, 0, 1]
+    assert np.all(result.muzzle_velocity > 0)
+    assert np.all(result.muzzle_velocity[2:] > result.muzzle_velocity[:2])
+
+
+@pytest.mark.skipif(not os.path.isdir('/dev/shm'),
+                    reason='Нужен каталог разделяемой памяти /dev/shm')
+@pytest.mark.parametrize('executor', ['serial', 'thread'])
+def test_failed_chunk_releases_shared_memory(executor, monkeypatch, gun, gas):
+    from balltic.gasdynamics import sweep as sweep_
+
+    class Failing(sweep_.PneumaticEnsemble):
+        def __init__(self, *args, nodes, **kwargs):
+            if nodes == 40:
+                raise RuntimeError('Ошибка части')
+            super().__init__(*args, nodes=nodes, **kwargs)
+
+    monkeypatch.setitem(sweep_.ENSEMBLES, PneumaticGun, Failing)
+    before = set(os.listdir('/dev/shm'))
+    with pytest.raises(RuntimeError):
+        sweep(gun, gas, executor=executor, workers=3, chunksize=1,
+              nodes=[20, 30, 40])
+    assert set(os.listdir('/dev/shm')) <= before